@@ -1,38 +1,143 @@
-from openai import OpenAI
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.utils.config import config
+from src.utils.clients import completion_usage, get_openai_client, get_resilient_client
+from src.utils.singleflight import flight_group, request_key
+from src.utils.scheduler import call_context, current_context
 from src.agents.router import QueryRouter
+from src.agents.history import HistorySummarizer
+from src.agents.single_call import SingleCallAnswerer
 from src.retrieval.vector_store import VectorStore
+from src.retrieval.faq_index import load_faq_index
+from src.retrieval.dedup import document_sources
+from src.retrieval.chunking import chunk_sort_key, document_citations
 from src.prompts.templates import (
     RAG_SYSTEM_PROMPT, 
-    RAG_USER_TEMPLATE, 
+    ROUTE_GUIDANCE,
+    RAG_CONTEXT_TEMPLATE,
+    RAG_QUESTION_TEMPLATE,
     DIRECT_LLM_PROMPT
 )
+from src.prompts.builder import PromptBuilder
 from src.guardrails.content_guardrails import ContentGuardrails, InputValidator, ResponseGuardrails
+from src.guardrails.pipeline import GuardrailPipeline
+
+
+def format_startup_report(report: Dict) -> str:
+    """Multi-line summary of AITrainingAssistant.startup_report for logs"""
+    lines = [f"✅ Assistant started: init {report['init_ms']:.0f} ms, "
+             f"warm-up {report.get('warm_up_ms', 0):.0f} ms"]
+    lines += [f"   {name}: {ms:.0f} ms" for name, ms in report.get("steps_ms", {}).items()]
+    if report.get("failed"):
+        lines.append(f"   ⚠️ failed: {', '.join(report['failed'])}")
+    return "\n".join(lines)
 
 
 class AITrainingAssistant:
     """Complete AI Training Assistant with routing, RAG, and guardrails"""
     
-    def __init__(self):
+    def __init__(self, vector_store: VectorStore = None):
+        """
+        Args:
+            vector_store: Shared vector store to use instead of creating one (optional)
+        """
         print("🤖 Initializing AI Training Assistant...")
+        init_start = time.perf_counter()
         
-        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+        self.client = get_resilient_client()
+        self.generation_flights = flight_group("generation")
         self.router = QueryRouter()
-        self.vector_store = VectorStore()
+        self.vector_store = vector_store or VectorStore()
+        self.summarizer = HistorySummarizer()
+        self.prompt_builder = PromptBuilder(summarize=self.summarizer)
+        self.single_call = SingleCallAnswerer(self)
+        self.faq = self._load_faq()
         
         # Initialize guardrails
         self.guardrails = ContentGuardrails()
         self.input_validator = InputValidator()
         self.response_validator = ResponseGuardrails()
+        self.input_guardrails = GuardrailPipeline(self.guardrails)
+        
+        # Set by warm_up() once every collection is open and paged in
+        self.ready = False
+        self.startup_report = {"init_ms": (time.perf_counter() - init_start) * 1000}
         
         print("✅ Assistant ready with guardrails!\n")
     
-    def answer(self, question: str, user_id: int = None,conversation_history: List[Dict] = None) -> Dict:
+    def _load_faq(self):
+        """Pre-generated FAQ answers for the current corpus, or None if disabled or unavailable"""
+        if not config.FAQ_ENABLED:
+            return None
+        try:
+            faq = load_faq_index(self.vector_store.embeddings)
+        except Exception as e:
+            print(f"⚠️ FAQ index unavailable ({type(e).__name__}): {e}")
+            return None
+        if faq.stale_sections:
+            print(f"   FAQ index: {faq.stale_sections} changed sections skipped until the next build")
+        print(f"   FAQ index: {len(faq)} questions")
+        return faq if len(faq) else None
+    
+    def warm_up(self, max_workers: int = 4) -> Dict:
+        """
+        Open all route collections, page in their indexes and touch the API
+        client in parallel so the first real request sees steady-state latency
+        
+        Returns:
+            Startup report with per-step timings in milliseconds
+        """
+        if self.ready:
+            return self.startup_report
+        
+        print("🔥 Warming up assistant...")
+        start = time.perf_counter()
+        
+        def timed(step):
+            step_start = time.perf_counter()
+            step()
+            return (time.perf_counter() - step_start) * 1000
+        
+        steps = {"openai_client": get_openai_client, "reranker": self.vector_store.load_reranker}
+        for route in self.vector_store.rag_routes():
+            steps[f"collection:{route}"] = (
+                lambda route=route: self.vector_store.warm_up_route(route)
+            )
+        
+        step_ms = {}
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {name: pool.submit(timed, step) for name, step in steps.items()}
+            for name, future in futures.items():
+                try:
+                    step_ms[name] = future.result()
+                except Exception as e:
+                    print(f"⚠️ Warm-up step {name} failed: {e}")
+                    failed.append(name)
+        
+        self.startup_report.update({
+            "steps_ms": step_ms,
+            "failed": failed,
+            "warm_up_ms": (time.perf_counter() - start) * 1000,
+        })
+        self.ready = not failed
+        
+        print(format_startup_report(self.startup_report))
+        return self.startup_report
+    
+    def answer(
+        self,
+        question: str,
+        user_id: int = None,
+        conversation_history: List[Dict] = None,
+        session_id: str = None,
+        mode: str = None
+    ) -> Dict:
         """
         Answer a user question with intelligent routing and guardrails
         
@@ -40,67 +145,128 @@ class AITrainingAssistant:
             question: User's question
             user_id: User ID for rate limiting (optional)
             conversation_history: List of previous messages [{"role": "user/assistant", "content": "..."}]
+            session_id: Chat session ID, used to cache the rolling history summary (optional)
+            mode: "two_call" or "single_call"; defaults to config.ANSWER_MODE
         Returns:
             Dict with answer, route, sources, and metadata
         """
-        if conversation_history is None:
-            conversation_history = []
+        # LLM calls for this question queue under its user, at the caller's
+        # priority (interactive unless a batch job set background)
+        priority, user = current_context()
+        if user_id is not None or session_id is not None:
+            user = user_id if user_id is not None else session_id
+        with call_context(priority, user):
+            return self._answer(question, user_id, conversation_history or [], session_id, mode)
+    
+    def _answer(
+        self,
+        question: str,
+        user_id: int,
+        conversation_history: List[Dict],
+        session_id: str,
+        mode: str
+    ) -> Dict:
+        trace = {}
+        start = time.perf_counter()
         
-        # STEP 1: Sanitize input
-        question = self.input_validator.sanitize_input(question)
+        # STEPS 1-4: Input guardrails, cheapest check first, before any LLM work
+        question, blocked = self.check_input(question, user_id, trace)
+        if blocked:
+            trace["total_ms"] = (time.perf_counter() - start) * 1000
+            blocked["trace"] = trace
+            return blocked
         
-        # STEP 2: Validate input format
-        is_valid_format, format_error = self.input_validator.validate_question_format(question)
-        if not is_valid_format:
-            return {
-                "question": question,
-                "answer": format_error,
-                "route": "guardrail_blocked",
-                "sources": [],
-                "blocked": True,
-                "reason": "Invalid format"
-            }
+        # Pre-generated FAQ answer: no routing or generation call. Follow-ups
+        # that lean on the conversation go through the full pipeline.
+        if self.faq is not None and not (conversation_history and self.router.needs_history(question)):
+            step_start = time.perf_counter()
+            result = self.faq_answer(question)
+            trace["faq_ms"] = (time.perf_counter() - step_start) * 1000
+            if result is not None:
+                print(f"🎯 Routed to: {result['route']} (FAQ, {result['faq_match']['score']:.2f})")
+                trace["mode"] = "faq"
+                return self._finish(result, question, trace, start)
         
-        # STEP 3: Check for prompt injection
-        if self.input_validator.detect_prompt_injection(question):
-            print("⚠️ Prompt injection detected!")
-            return {
-                "question": question,
-                "answer": "⚠️ Your message appears to contain invalid instructions. Please ask a normal question about the company.",
-                "route": "guardrail_blocked",
-                "sources": [],
-                "blocked": True,
-                "reason": "Prompt injection attempt"
-            }
-        
-        # STEP 4: Content guardrails validation
-        is_valid, error_message = self.guardrails.validate_input(question, user_id)
-        if not is_valid:
-            # Log the violation
-            if user_id:
-                self.guardrails.log_violation(user_id, "input_validation", question)
-            
-            return {
-                "question": question,
-                "answer": error_message,
-                "route": "guardrail_blocked",
-                "sources": [],
-                "blocked": True,
-                "reason": "Content policy violation"
-            }
+        # STEPS 5-6 in one completion, falling back to the two-call pipeline
+        if (mode or config.ANSWER_MODE) == "single_call":
+            step_start = time.perf_counter()
+            result = self.single_call.answer(question, conversation_history, session_id)
+            trace["generate_ms"] = (time.perf_counter() - step_start) * 1000
+            if result is not None:
+                print(f"🎯 Routed to: {result['route']} (single call)")
+                trace["mode"] = "single_call"
+                return self._finish(result, question, trace, start)
+            trace["single_call_failed"] = True
         
         # STEP 5: Route the question
+        step_start = time.perf_counter()
         routing_info = self.router.classify_with_confidence(question,conversation_history)
         route = routing_info['route']
+        trace["route_ms"] = (time.perf_counter() - step_start) * 1000
         
         print(f"🎯 Routed to: {route}")
         
         # STEP 6: Generate response based on route
+        step_start = time.perf_counter()
         if route == "direct_llm":
-            result = self._direct_answer(question, route, conversation_history)
+            result = self._direct_answer(question, route, conversation_history, session_id)
         else:
-            result = self._rag_answer(question, route, conversation_history)
+            result = self._rag_answer(question, route, conversation_history, session_id)
+        if "error" in routing_info:
+            result["routing_error"] = routing_info["error"]
+        if routing_info.get("usage"):
+            result["router_usage"] = routing_info["usage"]
+        trace["generate_ms"] = (time.perf_counter() - step_start) * 1000
+        trace["mode"] = "two_call"
+        return self._finish(result, question, trace, start)
+    
+    def _finish(self, result: Dict, question: str, trace: Dict, start: float) -> Dict:
+        """STEPS 7-8: Output guardrails, then attach the trace"""
+        step_start = time.perf_counter()
+        result = self.finalize_response(result, question)
+        trace["output_guardrails_ms"] = (time.perf_counter() - step_start) * 1000
+        trace["total_ms"] = (time.perf_counter() - start) * 1000
+        result["trace"] = trace
+        return result
+    
+    def faq_answer(self, question: str) -> Optional[Dict]:
+        """Answer from the FAQ index if a stored question matches closely enough"""
+        try:
+            match = self.faq.lookup(question)
+        except Exception as e:
+            print(f"❌ FAQ lookup error ({type(e).__name__}): {e}")
+            return None
+        if match is None:
+            return None
+        return {
+            "question": question,
+            "answer": match["answer"],
+            "route": match["route"],
+            "sources": [match["source_file"]],
+            "citations": [match["citation"]],
+            "context_used": True,
+            "num_chunks": 0,
+            "faq_match": {"question": match["question"], "score": match["score"], "match": match["match"]}
+        }
+    
+    def check_input(self, question: str, user_id: int = None, trace: Dict = None):
+        """
+        Sanitize and validate a question before any model call
         
+        Args:
+            trace: Request trace to record per-check timings in (optional)
+        Returns:
+            (sanitized question, blocked result or None)
+        """
+        checked = self.input_guardrails.run(question, user_id)
+        if trace is not None:
+            trace["input_guardrails_ms"] = checked.timings_ms
+            if not checked.passed:
+                trace["blocked_by"] = checked.check
+        return checked.question, checked.blocked_response()
+    
+    def finalize_response(self, result: Dict, question: str) -> Dict:
+        """Validate and sanitize a generated answer in place"""
         # STEP 7: Validate response
         response = result["answer"]
         
@@ -127,15 +293,37 @@ class AITrainingAssistant:
         
         return result
     
-    def _rag_answer(self, question: str, route: str, conversation_history: List[Dict]) -> Dict:
-        """Generate answer using RAG with conversation context"""
+    def prepare_generation(
+        self,
+        question: str,
+        route: str,
+        conversation_history: List[Dict],
+        session_id: str = None
+    ):
+        """
+        Retrieve context (for RAG routes) and build the answer request
         
+        Returns:
+            (chat completion parameters or None, result dict without the answer);
+            parameters are None when there is nothing to generate
+        """
+        if route == "direct_llm":
+            return self._prepare_direct(question, route, conversation_history, session_id)
+        return self._prepare_rag(question, route, conversation_history, session_id)
+    
+    def _prepare_rag(
+        self,
+        question: str,
+        route: str,
+        conversation_history: List[Dict],
+        session_id: str = None
+    ):
         # Retrieve relevant documents
         print(f"📚 Retrieving from {route} collection...")
-        docs = self.vector_store.query(question, route, k=config.TOP_K)
+        docs = self.vector_store.query(question, route)
         
         if not docs:
-            return {
+            return None, {
                 "question": question,
                 "answer": "I couldn't find relevant information in the knowledge base for this question.",
                 "route": route,
@@ -143,57 +331,95 @@ class AITrainingAssistant:
                 "context_used": False
             }
         
-        # Prepare context
-        context_parts = []
-        sources = []
-        
-        for i, doc in enumerate(docs, 1):
-            source_file = doc.metadata.get('source_file', 'unknown')
-            context_parts.append(f"{doc.page_content}")
-            sources.append(source_file)
+        print(f"✅ Retrieved {len(docs)} documents")
         
-        context = "\n---\n".join(context_parts)
+        # Fit system prompt, context and history into the token budget; docs
+        # are ranked best first so the weakest chunks are dropped first, and
+        # the stable part (instructions, context) goes ahead of the volatile
+        # part (history, question) so the provider can cache the prefix
+        guidance = ROUTE_GUIDANCE.get(route)
+        prompt = self.prompt_builder.build_cacheable(
+            f"{RAG_SYSTEM_PROMPT}\n\n{guidance}" if guidance else RAG_SYSTEM_PROMPT,
+            RAG_CONTEXT_TEMPLATE,
+            RAG_QUESTION_TEMPLATE,
+            question,
+            conversation_history,
+            chunks=[doc.page_content for doc in docs],
+            chunk_keys=[chunk_sort_key(doc) for doc in docs],
+            session_key=session_id
+        )
+        used_docs = docs[:prompt["chunks_used"]]
+        sources = [source for doc in used_docs for source in document_sources(doc)]
+        citations = [citation for doc in used_docs for citation in document_citations(doc)]
         
-        print(f"✅ Retrieved {len(docs)} documents")
-
-        messages = [
-        {"role": "system", "content": RAG_SYSTEM_PROMPT}
-        ]
-        
-        # Add conversation history (limit to last 10 messages to avoid token limits)
-        recent_history = conversation_history[-10:] if len(conversation_history) > 10 else conversation_history
-        messages.extend(recent_history)
-        
-        # Add current question with context
-        messages.append({
-            "role": "user", 
-            "content": RAG_USER_TEMPLATE.format(
-                context=context,
-                question=question
-            )
-        })
-        # Generate answer
+        params = {"messages": prompt["messages"], **config.completion_params(route)}
+        return params, {
+            "question": question,
+            "answer": "",
+            "route": route,
+            "sources": list(set(sources)),  # Unique sources
+            "citations": list(dict.fromkeys(citations)),  # Section-level, in rank order
+            "context_used": True,
+            "num_chunks": len(used_docs),
+            "prompt_tokens_estimate": prompt["prompt_tokens"],
+            "stable_prefix_tokens": prompt["stable_prefix_tokens"]
+        }
+    
+    def _prepare_direct(
+        self,
+        question: str,
+        route: str,
+        conversation_history: List[Dict],
+        session_id: str = None
+    ):
+        # Build messages with budgeted history
+        prompt = self.prompt_builder.build(
+            None,
+            DIRECT_LLM_PROMPT,
+            question,
+            conversation_history,
+            session_key=session_id
+        )
+        params = {"messages": prompt["messages"], **config.completion_params(route)}
+        return params, {
+            "question": question,
+            "answer": "",
+            "route": route,
+            "sources": [],
+            "context_used": False
+        }
+    
+    def generate(self, route: str, params: Dict):
+        """
+        Chat completion for an answer under the route's timeout; identical
+        requests (same prompt, route and corpus version) in flight at the
+        same time share one call
+        """
+        timeout = config.route_timeout(route)
+        key = request_key(route, self.vector_store.corpus_version, params)
+        return self.generation_flights.do(key, lambda: self.client.chat_completion(timeout=timeout, **params))
+    
+    def _rag_answer(
+        self,
+        question: str,
+        route: str,
+        conversation_history: List[Dict],
+        session_id: str = None
+    ) -> Dict:
+        """Generate answer using RAG with conversation context"""
         try:
-            response = self.client.chat.completions.create(
-            model=config.OPENAI_MODEL,
-            messages=messages,
-            temperature=0.3,
-            max_tokens=500
-            )
+            params, result = self._prepare_rag(question, route, conversation_history, session_id)
+            if params is None:
+                return result
             
-            answer = response.choices[0].message.content.strip()
-            
-            return {
-                "question": question,
-                "answer": answer,
-                "route": route,
-                "sources": list(set(sources)),  # Unique sources
-                "context_used": True,
-                "num_chunks": len(docs)
-            }
+            # Generate answer
+            response = self.generate(route, params)
+            result["answer"] = response.choices[0].message.content.strip()
+            result["usage"] = completion_usage(response)
+            return result
             
         except Exception as e:
-            print(f"❌ Error generating answer: {e}")
+            print(f"❌ Error generating answer ({type(e).__name__}): {e}")
             return {
                 "question": question,
                 "answer": "I encountered an error generating the answer. Please try again.",
@@ -203,41 +429,24 @@ class AITrainingAssistant:
                 "error": str(e)
             }
     
-    def _direct_answer(self, question: str, route: str, conversation_history: List[Dict]) -> Dict:
+    def _direct_answer(
+        self,
+        question: str,
+        route: str,
+        conversation_history: List[Dict],
+        session_id: str = None
+    ) -> Dict:
         """Handle direct LLM responses (no retrieval)"""
         
         try:
-            # Build messages with history
-            messages = []
-            
-            # Add conversation history (limit to last 10 messages)
-            recent_history = conversation_history[-10:] if len(conversation_history) > 10 else conversation_history
-            messages.extend(recent_history)
+            params, result = self._prepare_direct(question, route, conversation_history, session_id)
             
-            # Add current question
-            messages.append({
-                "role": "user", 
-                "content": DIRECT_LLM_PROMPT.format(question=question)
-            })
-            
-            response = self.client.chat.completions.create(
-                model=config.OPENAI_MODEL,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=300
-            )
-            
-            answer = response.choices[0].message.content.strip()
-            
-            return {
-                "question": question,
-                "answer": answer,
-                "route": route,
-                "sources": [],
-                "context_used": False
-            }
+            response = self.generate(route, params)
+            result["answer"] = response.choices[0].message.content.strip()
+            result["usage"] = completion_usage(response)
+            return result
         except Exception as e:
-            print(f"❌ Error: {e}")
+            print(f"❌ Error ({type(e).__name__}): {e}")
             return {
                 "question": question,
                 "answer": "I encountered an error. Please try again.",
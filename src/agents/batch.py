@@ -0,0 +1,239 @@
+# src/agents/batch.py
+"""
+Offline batch question answering.
+
+Reads questions from CSV or JSONL, answers them through a worker pool with a
+bounded number of in-flight questions and streams results to JSONL in input
+order. Re-running with the same output file resumes where it stopped.
+
+Usage:
+    python src/agents/batch.py questions.csv answers.jsonl --concurrency 8
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.utils.clients import configure_scheduler
+from src.utils.scheduler import BACKGROUND, call_context
+
+
+_worker_assistant = None
+
+
+def read_questions(path: str) -> List[Dict]:
+    """
+    Read questions from a CSV (needs a `question` column) or JSONL file
+
+    Returns:
+        List of {"id": ..., "question": ...}; ids default to the row number
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+
+    questions = []
+    for index, row in enumerate(rows, 1):
+        question_id = row.get("id") or row.get("question_id") or str(index)
+        questions.append({"id": str(question_id), "question": row["question"]})
+    return questions
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids already present in an output JSONL file"""
+    path = Path(output_path)
+    if not path.exists():
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(str(json.loads(line)["id"]))
+            except (ValueError, KeyError):
+                continue  # Partially written last line from an interrupted run
+    return done
+
+
+def _answer_one(assistant, item: Dict) -> Dict:
+    start = time.perf_counter()
+    try:
+        # Batch questions yield to live users on the shared scheduler
+        with call_context(BACKGROUND, "batch"):
+            result = assistant.answer(item["question"])
+    except Exception as e:
+        result = {"question": item["question"], "answer": "", "route": "error", "sources": [], "error": str(e)}
+    result["id"] = item["id"]
+    result["latency_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def _init_process_worker(requests_per_minute: float, tokens_per_minute: float):
+    """Build one assistant per worker process with its share of the rate limits"""
+    global _worker_assistant
+    import io
+    import contextlib
+    from src.agents.assistant import AITrainingAssistant
+
+    configure_scheduler(requests_per_minute, tokens_per_minute)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker_assistant = AITrainingAssistant()
+
+
+def _process_answer(item: Dict) -> Dict:
+    return _answer_one(_worker_assistant, item)
+
+
+def answer_batch(
+    questions: Iterable[Dict],
+    concurrency: int = 4,
+    assistant=None,
+    max_in_flight: int = None,
+    use_processes: bool = False,
+    requests_per_minute: float = None,
+    tokens_per_minute: float = None
+) -> Iterator[Dict]:
+    """
+    Answer questions concurrently, yielding results in input order
+
+    Args:
+        questions: Iterable of {"id", "question"} dicts (or plain strings)
+        concurrency: Number of worker threads or processes
+        assistant: Assistant to share across threads (created if omitted)
+        max_in_flight: Upper bound on submitted-but-unyielded questions
+            (defaults to 2 x concurrency)
+        use_processes: Run one assistant per worker process instead of
+            sharing one across threads
+        requests_per_minute: Process mode: OpenAI request budget (defaults to
+            config), split evenly between the worker processes
+        tokens_per_minute: Process mode: OpenAI token budget, split the same way
+
+    Threads share this process's scheduler (and its budgets) with any live
+    traffic, as background work, so a batch never replaces it.
+    """
+    max_in_flight = max_in_flight or 2 * concurrency
+
+    if use_processes:
+        if requests_per_minute is None:
+            requests_per_minute = float(config.OPENAI_REQUESTS_PER_MINUTE or 0)
+        if tokens_per_minute is None:
+            tokens_per_minute = float(config.OPENAI_TOKENS_PER_MINUTE or 0)
+        executor = ProcessPoolExecutor(
+            max_workers=concurrency,
+            initializer=_init_process_worker,
+            initargs=(requests_per_minute / concurrency, tokens_per_minute / concurrency)
+        )
+        submit = lambda item: executor.submit(_process_answer, item)
+    else:
+        if assistant is None:
+            from src.utils.registry import registry
+            assistant = registry.get_assistant(warm_up=False)
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        submit = lambda item: executor.submit(_answer_one, assistant, item)
+
+    pending = deque()
+    try:
+        for index, item in enumerate(questions, 1):
+            if isinstance(item, str):
+                item = {"id": str(index), "question": item}
+            pending.append(submit(item))
+            # Bounded window: wait for the oldest before submitting more
+            while len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 4,
+    resume: bool = True,
+    use_processes: bool = False,
+    requests_per_minute: float = None,
+    tokens_per_minute: float = None
+) -> Dict:
+    """
+    Answer every question in input_path and append results to output_path
+
+    Returns:
+        Stats with answered, skipped, elapsed seconds and questions/min
+    """
+    questions = read_questions(input_path)
+    done = completed_ids(output_path) if resume else set()
+    todo = [q for q in questions if q["id"] not in done]
+
+    print(f"📥 {len(questions)} questions, {len(questions) - len(todo)} already answered, "
+          f"{len(todo)} to go (concurrency {concurrency})")
+
+    start = time.perf_counter()
+    answered = 0
+    mode = "a" if resume else "w"
+    with open(output_path, mode, encoding="utf-8") as out:
+        if resume and out.tell() > 0 and not Path(output_path).read_text(encoding="utf-8").endswith("\n"):
+            out.write("\n")  # Terminate a partial line left by an interrupted run
+        for result in answer_batch(
+            todo, concurrency,
+            use_processes=use_processes,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute
+        ):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            answered += 1
+            if answered % 50 == 0:
+                print(f"   ✅ {answered}/{len(todo)}")
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "answered": answered,
+        "skipped": len(questions) - len(todo),
+        "elapsed_s": elapsed,
+        "questions_per_min": answered / elapsed * 60 if elapsed > 0 else 0.0,
+    }
+    print(f"✅ Answered {answered} questions in {elapsed:.1f}s "
+          f"({stats['questions_per_min']:.1f} questions/min)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch question answering")
+    parser.add_argument("input", help="CSV (question column) or JSONL file")
+    parser.add_argument("output", help="JSONL file to write results to")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--processes", action="store_true", help="Use worker processes")
+    parser.add_argument("--rpm", type=float, default=None, help="OpenAI requests per minute")
+    parser.add_argument("--tpm", type=float, default=None, help="OpenAI tokens per minute")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output file")
+    args = parser.parse_args()
+
+    if not args.processes and (args.rpm is not None or args.tpm is not None):
+        # This process only runs the batch, so its scheduler is the batch's
+        configure_scheduler(args.rpm, args.tpm)
+    run_batch(
+        args.input, args.output,
+        concurrency=args.concurrency,
+        resume=not args.no_resume,
+        use_processes=args.processes,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm
+    )
+
+
+if __name__ == "__main__":
+    main()
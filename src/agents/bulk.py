@@ -0,0 +1,270 @@
+# src/agents/bulk.py
+"""
+Bulk (Batch API) mode for non-interactive workloads.
+
+Splits the answering pipeline into stages so each model step runs as one
+Batch API job instead of one chat completion per question:
+
+    1. input guardrails (local)
+    2. route every question            -> one routing batch job
+    3. retrieve contexts, build prompts (local)
+    4. generate every answer           -> one generation batch job
+    5. output guardrails (local)
+
+Batch jobs are billed at a discount and do not count against the
+per-minute limits, at the cost of minutes-to-hours of latency.
+
+Usage:
+    python src/agents/bulk.py questions.csv answers.jsonl
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.utils.clients import completion_usage, get_openai_client
+from src.utils.scheduler import BACKGROUND, call_context
+
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchJobRunner:
+    """Submit requests as Batch API jobs, poll them and join results by custom_id"""
+
+    def __init__(
+        self,
+        client=None,
+        poll_interval: float = None,
+        completion_window: str = None,
+        max_requests_per_job: int = None
+    ):
+        self.client = client or get_openai_client()
+        self.poll_interval = poll_interval if poll_interval is not None else config.BULK_POLL_INTERVAL
+        self.completion_window = completion_window or config.BULK_COMPLETION_WINDOW
+        self.max_requests_per_job = max_requests_per_job or config.BULK_MAX_REQUESTS_PER_JOB
+
+    def run(self, requests: Dict[str, Dict], endpoint: str = "/v1/chat/completions") -> Dict[str, Dict]:
+        """
+        Execute requests through the Batch API
+
+        Args:
+            requests: custom_id -> request body
+            endpoint: API endpoint every request targets
+        Returns:
+            custom_id -> {"body": response body} or {"error": message};
+            requests missing from the output (e.g. an expired job) get an error
+        """
+        if not requests:
+            return {}
+
+        items = list(requests.items())
+        chunks = [
+            items[i:i + self.max_requests_per_job]
+            for i in range(0, len(items), self.max_requests_per_job)
+        ]
+        # Submit every job up front so they are processed in parallel
+        batch_ids = [self._submit(chunk, endpoint) for chunk in chunks]
+
+        results = {}
+        for batch_id in batch_ids:
+            batch = self._wait(batch_id)
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    results.update(self._download(file_id))
+            if batch.status != "completed":
+                print(f"⚠️ Batch {batch_id} ended as {batch.status}")
+
+        for custom_id in requests:
+            results.setdefault(custom_id, {"error": "No result returned by the batch job"})
+        return results
+
+    def _submit(self, items: List, endpoint: str) -> str:
+        lines = "".join(
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": endpoint, "body": body}) + "\n"
+            for custom_id, body in items
+        )
+        batch_file = self.client.files.create(
+            file=("batch_input.jsonl", io.BytesIO(lines.encode("utf-8"))),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=endpoint,
+            completion_window=self.completion_window
+        )
+        print(f"📤 Submitted batch {batch.id} ({len(items)} requests)")
+        return batch.id
+
+    def _wait(self, batch_id: str):
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in TERMINAL_STATUSES:
+                return batch
+            time.sleep(self.poll_interval)
+
+    def _download(self, file_id: str) -> Dict[str, Dict]:
+        results = {}
+        for line in self.client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                error = record.get("error") or response.get("body", {}).get("error")
+                results[record["custom_id"]] = {"error": str(error)}
+            else:
+                results[record["custom_id"]] = {"body": response["body"]}
+        return results
+
+
+def _message_content(body: Dict) -> str:
+    return body["choices"][0]["message"]["content"]
+
+
+class BulkAnswerer:
+    """Answer many questions with one routing and one generation batch job"""
+
+    def __init__(self, assistant=None, jobs: BatchJobRunner = None):
+        if assistant is None:
+            from src.utils.registry import registry
+            assistant = registry.get_assistant(warm_up=False)
+        self.assistant = assistant
+        self.jobs = jobs or BatchJobRunner()
+        self.stage_seconds = {}
+
+    def answer_all(self, questions: List[Dict]) -> List[Dict]:
+        """
+        Answer questions in bulk
+
+        Args:
+            questions: List of {"id", "question"} dicts (or plain strings)
+        Returns:
+            Results in input order, shaped like AITrainingAssistant.answer
+            output plus the question "id"
+        """
+        # Job uploads and status polls yield to live users on the shared scheduler
+        with call_context(BACKGROUND, "bulk"):
+            return self._answer_all(questions)
+
+    def _answer_all(self, questions: List[Dict]) -> List[Dict]:
+        items = [
+            q if isinstance(q, dict) else {"id": str(i), "question": q}
+            for i, q in enumerate(questions, 1)
+        ]
+        assistant = self.assistant
+        router = assistant.router
+        results = {}
+
+        # Stage 1: input guardrails
+        stage_start = time.perf_counter()
+        pending = {}
+        for item in items:
+            question, blocked = assistant.check_input(item["question"])
+            if blocked:
+                results[item["id"]] = blocked
+            else:
+                pending[item["id"]] = question
+        self._mark("guardrails", stage_start)
+
+        # Stage 2: routing batch
+        stage_start = time.perf_counter()
+        routed = self.jobs.run({
+            f"route-{qid}": router.request_params(router.build_messages(question))
+            for qid, question in pending.items()
+        })
+        routes = {}
+        for qid, question in pending.items():
+            outcome = routed[f"route-{qid}"]
+            if "body" in outcome:
+                routes[qid] = router.parse_route(question, _message_content(outcome["body"]))["route"]
+            else:
+                print(f"❌ Router error for {qid}: {outcome['error']}")
+                routes[qid] = "direct_llm"
+        self._mark("routing", stage_start)
+
+        # Stage 3: retrieval and prompt assembly
+        stage_start = time.perf_counter()
+        generation_requests = {}
+        drafts = {}
+        for qid, question in pending.items():
+            params, draft = assistant.prepare_generation(question, routes[qid], [])
+            drafts[qid] = draft
+            if params is None:
+                results[qid] = draft
+            else:
+                generation_requests[f"answer-{qid}"] = params
+        self._mark("retrieval", stage_start)
+
+        # Stage 4: generation batch
+        stage_start = time.perf_counter()
+        generated = self.jobs.run(generation_requests)
+        for custom_id, outcome in generated.items():
+            qid = custom_id[len("answer-"):]
+            draft = drafts[qid]
+            if "body" in outcome:
+                draft["answer"] = _message_content(outcome["body"]).strip()
+                draft["usage"] = completion_usage(outcome["body"])
+                results[qid] = draft
+            else:
+                print(f"❌ Error generating answer for {qid}: {outcome['error']}")
+                results[qid] = {
+                    "question": draft["question"],
+                    "answer": "I encountered an error generating the answer. Please try again.",
+                    "route": draft["route"],
+                    "sources": [],
+                    "context_used": False,
+                    "error": outcome["error"]
+                }
+        self._mark("generation", stage_start)
+
+        # Stage 5: output guardrails
+        stage_start = time.perf_counter()
+        ordered = []
+        for item in items:
+            result = results[item["id"]]
+            if not result.get("blocked"):
+                result = assistant.finalize_response(result, result["question"])
+            result["id"] = item["id"]
+            ordered.append(result)
+        self._mark("output_guardrails", stage_start)
+
+        return ordered
+
+    def _mark(self, stage: str, start: float):
+        self.stage_seconds[stage] = time.perf_counter() - start
+
+
+def main():
+    from src.agents.batch import read_questions
+
+    parser = argparse.ArgumentParser(description="Answer questions with the Batch API")
+    parser.add_argument("input", help="CSV (question column) or JSONL file")
+    parser.add_argument("output", help="JSONL file to write results to")
+    parser.add_argument("--poll-interval", type=float, default=None)
+    args = parser.parse_args()
+
+    questions = read_questions(args.input)
+    answerer = BulkAnswerer()
+    if args.poll_interval is not None:
+        answerer.jobs.poll_interval = args.poll_interval
+
+    start = time.perf_counter()
+    results = answerer.answer_all(questions)
+    with open(args.output, "w", encoding="utf-8") as out:
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    print(f"✅ Answered {len(results)} questions in {time.perf_counter() - start:.1f}s")
+    for stage, seconds in answerer.stage_seconds.items():
+        print(f"   {stage}: {seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# src/agents/history.py
+
+import hashlib
+import json
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.utils.clients import get_resilient_client
+from src.utils.scheduler import BACKGROUND, call_context
+from src.prompts.templates import HISTORY_SUMMARY_PROMPT
+
+
+class HistorySummarizer:
+    """
+    Rolling per-session summary of conversation turns that fell out of the
+    prompt window.
+
+    With a session id, each turn is folded into the session's summary once,
+    in the background: a turn uses the summary as it stands and, when newer
+    turns have fallen out of the window, schedules one call that extends it
+    for the next turn. The user's turn never waits for the summary.
+
+    Without a session id (batch, bulk and API callers) the summary is keyed
+    on a hash of the turns it covers instead, so it is still folded once in
+    the background and reused by any later call whose history starts with
+    those turns. Only identical turns share a summary.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_workers: int = 2):
+        self.client = get_resilient_client()
+        self.max_sessions = max_sessions
+        # session_key -> (number of messages covered, summary text)
+        self._cache: Dict[str, tuple] = {}
+        # session_key -> running background update
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="history-summary")
+
+    def __call__(self, session_key: str, older: List[Dict]) -> str:
+        return self.summarize(session_key, older)
+
+    def summarize(self, session_key: str, older: List[Dict]) -> str:
+        """
+        Summary of `older` for the prompt
+
+        Returns the cached summary immediately (empty until the first
+        background update finishes) and schedules an update if it does not
+        cover all of `older` yet. Never calls the model itself.
+        """
+        if not older:
+            return ""
+
+        with self._lock:
+            if session_key:
+                key = session_key
+                covered, summary = self._cache.get(session_key, (0, ""))
+                # A shorter history than we covered means the session was reset
+                if covered > len(older):
+                    covered, summary = 0, ""
+            else:
+                key, covered, summary = self._cached_prefix(older)
+            if covered < len(older) and key not in self._pending:
+                self._pending[key] = self._executor.submit(
+                    self._update, key, covered, summary, list(older)
+                )
+        return summary
+
+    def _cached_prefix(self, older: List[Dict]) -> tuple:
+        """
+        Key for `older` plus the summary of its longest already-summarized
+        leading turns, as (key, number of messages covered, summary)
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        covered, summary = 0, ""
+        for message in older:
+            digest.update(json.dumps([message["role"], message["content"]]).encode())
+            cached = self._cache.get(f"turns:{digest.hexdigest()}")
+            if cached is not None:
+                covered, summary = cached
+        return f"turns:{digest.hexdigest()}", covered, summary
+
+    def wait(self, timeout: float = None):
+        """Block until the scheduled summary updates have finished"""
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.result(timeout=timeout)
+
+    def _update(self, session_key: str, covered: int, summary: str, older: List[Dict]):
+        try:
+            with call_context(BACKGROUND, session_key):
+                folded = self._fold(summary, older[covered:])
+            if folded is None:
+                return
+            with self._lock:
+                if len(self._cache) >= self.max_sessions and session_key not in self._cache:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[session_key] = (len(older), folded)
+        finally:
+            with self._lock:
+                self._pending.pop(session_key, None)
+
+    def _fold(self, summary: str, new_messages: List[Dict]) -> Optional[str]:
+        """Extend a summary with new turns; None if the call failed"""
+        new_turns = "\n".join(f"{m['role']}: {m['content']}" for m in new_messages)
+        try:
+            response = self.client.chat_completion(
+                model=config.OPENAI_MODEL,
+                messages=[{
+                    "role": "user",
+                    "content": HISTORY_SUMMARY_PROMPT.format(
+                        summary=summary or "(none)",
+                        new_turns=new_turns
+                    )
+                }],
+                temperature=0.0,
+                max_tokens=config.HISTORY_SUMMARY_MAX_TOKENS
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"⚠️ History summary error: {e}")
+            return None
@@ -1,20 +1,40 @@
 # src/agents/router.py
 
-from openai import OpenAI
+import re
 import sys
 from pathlib import Path
 from typing import Dict, List
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.utils.config import config
-from src.prompts.templates import ROUTER_SYSTEM_PROMPT, ROUTER_USER_TEMPLATE
+from src.utils.clients import completion_usage, get_resilient_client
+from src.utils.singleflight import flight_group, request_key
+from src.prompts.templates import ROUTER_SYSTEM_PROMPT, ROUTER_USER_TEMPLATE, ROUTER_CONTEXT_TEMPLATE
+from src.prompts.builder import truncate_to_tokens
+
+
+# Words that point back at something said earlier ("IT" and "this company" do not)
+REFERENCE_RE = re.compile(
+    r"\b(?-i:(?!IT\b))(it|its|it's|those|these|they|them|their|theirs|he|she|him|her|"
+    r"same|former|latter|above|previous|earlier|"
+    r"(?:this|that)(?!\s+(?:company|organization|organisation|org|business)\b))\b",
+    re.IGNORECASE
+)
+# Phrasing that continues the previous question
+FOLLOW_UP_RE = re.compile(
+    r"^\s*(and|but|also|so|then|or|what about|how about|what if|why|why not|"
+    r"how come|really|ok|okay)\b|\b(as well|too|else|instead|more detail|more about|"
+    r"tell me more|elaborate|the other)\b",
+    re.IGNORECASE
+)
 
 
 class QueryRouter:
     """Routes user queries to appropriate knowledge sources"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+        self.client = get_resilient_client()
+        self.flights = flight_group("router")
         self.valid_routes = ["general_company", "role_specific", "admin_policy", "direct_llm"]
     
     def classify(self, question: str) -> str:
@@ -28,14 +48,14 @@ class QueryRouter:
             Route name (general_company, role_specific, admin_policy, or direct_llm)
         """
         try:
-            response = self.client.chat.completions.create(
-                model=config.OPENAI_MODEL,
+            response = self.client.chat_completion(
+                timeout=config.route_timeout("router"),
+                hedge_after=config.ROUTER_HEDGE_AFTER_SECONDS,
                 messages=[
                     {"role": "system", "content": ROUTER_SYSTEM_PROMPT},
                     {"role": "user", "content": ROUTER_USER_TEMPLATE.format(question=question)}
                 ],
-                temperature=0.1,
-                max_tokens=50
+                **config.completion_params("router")
             )
             
             route = response.choices[0].message.content.strip().lower()
@@ -49,61 +69,88 @@ class QueryRouter:
                 return "direct_llm"
                 
         except Exception as e:
-            print(f"❌ Router error: {e}")
+            print(f"❌ Router error ({type(e).__name__}): {e}")
             return "direct_llm"
     
-    def classify_with_confidence(self, question: str, conversation_history: List[Dict] = None) -> dict:
-        """Classify with conversation context"""
+    @staticmethod
+    def needs_history(question: str) -> bool:
+        """
+        Whether a question looks context-dependent: it refers back with a
+        pronoun, uses follow-up phrasing, or is too short to stand alone
+        """
+        if len(question.split()) <= config.ROUTER_SHORT_QUESTION_WORDS:
+            return True
+        return bool(REFERENCE_RE.search(question) or FOLLOW_UP_RE.search(question))
+    
+    @staticmethod
+    def history_snippets(conversation_history: List[Dict]) -> List[str]:
+        """Truncated recent user turns, oldest first; assistant answers are left out"""
+        user_turns = [m["content"] for m in conversation_history if m.get("role") == "user"]
+        return [
+            truncate_to_tokens(turn, config.ROUTER_SNIPPET_TOKENS)
+            for turn in user_turns[-config.ROUTER_HISTORY_TURNS:]
+        ]
+    
+    def build_messages(self, question: str, conversation_history: List[Dict] = None) -> List[Dict]:
+        """Router prompt for a question, with earlier user turns only for follow-ups"""
+        snippets = []
+        if conversation_history and self.needs_history(question):
+            snippets = self.history_snippets(conversation_history)
         
-        if conversation_history is None:
-            conversation_history = []
+        if snippets:
+            content = ROUTER_CONTEXT_TEMPLATE.format(
+                snippets="\n".join(f"- {snippet}" for snippet in snippets),
+                question=question
+            )
+        else:
+            content = ROUTER_USER_TEMPLATE.format(question=question)
         
-        # Build messages with history for better context understanding
-        messages = [
-            {"role": "system", "content": ROUTER_SYSTEM_PROMPT}
+        return [
+            {"role": "system", "content": ROUTER_SYSTEM_PROMPT},
+            {"role": "user", "content": content}
         ]
+    
+    def request_params(self, messages: List[Dict]) -> Dict:
+        """Chat completion parameters for a routing call (the "router" route policy)"""
+        return {"messages": messages, **config.completion_params("router")}
+    
+    def parse_route(self, question: str, content: str) -> dict:
+        """Turn the model's reply into a routing result, defaulting to direct_llm"""
+        route = (content or "").strip().lower()
         
-        # Add recent history (last 4 messages) for context
-        recent_history = conversation_history[-4:] if len(conversation_history) > 4 else conversation_history
-        messages.extend(recent_history)
+        # Validate route
+        if route not in self.valid_routes:
+            print(f"⚠️ Unknown route '{route}', defaulting to direct_llm")
+            route = "direct_llm"
         
-        # Add current question
-        messages.append({
-            "role": "user", 
-            "content": ROUTER_USER_TEMPLATE.format(question=question)
-        })
+        return {
+            "route": route,
+            "question": question,
+            "is_retrieval_needed": route != "direct_llm"
+        }
+    
+    def classify_with_confidence(self, question: str, conversation_history: List[Dict] = None) -> dict:
+        """Classify with conversation context"""
+        params = self.request_params(self.build_messages(question, conversation_history))
         
         try:
-            response = self.client.chat.completions.create(
-                model=config.OPENAI_MODEL,
-                messages=messages,
-                temperature=0.1,
-                max_tokens=50
-            )
-            
-            route = response.choices[0].message.content.strip().lower()
-            
-            # Validate route
-            if route in self.valid_routes:
-                return {
-                    "route": route,
-                    "question": question,
-                    "is_retrieval_needed": route != "direct_llm"
-                }
-            else:
-                print(f"⚠️ Unknown route '{route}', defaulting to direct_llm")
-                return {
-                    "route": "direct_llm",
-                    "question": question,
-                    "is_retrieval_needed": False
-                }
+            # Identical routing prompts in flight at the same time share one call
+            response = self.flights.do(request_key(params), lambda: self.client.chat_completion(
+                timeout=config.route_timeout("router"),
+                hedge_after=config.ROUTER_HEDGE_AFTER_SECONDS,
+                **params
+            ))
+            routing = self.parse_route(question, response.choices[0].message.content)
+            routing["usage"] = completion_usage(response)
+            return routing
                 
         except Exception as e:
-            print(f"❌ Router error: {e}")
+            print(f"❌ Router error ({type(e).__name__}): {e}")
             return {
                 "route": "direct_llm",
                 "question": question,
-                "is_retrieval_needed": False
+                "is_retrieval_needed": False,
+                "error": f"{type(e).__name__}: {e}"
             }
 
 
@@ -0,0 +1,133 @@
+# src/agents/single_call.py
+"""
+Single-call route-and-answer mode.
+
+The default pipeline makes two sequential completions: the router picks a
+route, then the answer is generated from that route's chunks. In
+single_call mode (config.ANSWER_MODE) the question is embedded once, every
+RAG route is searched with that vector, and one completion gets short
+previews of each route's top hits. It returns the chosen route, the
+answer and the cited sources as JSON that follows ROUTED_ANSWER_SCHEMA,
+so a question costs one LLM round trip instead of two.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.utils.clients import completion_usage
+from src.retrieval.dedup import document_sources
+from src.prompts.templates import SINGLE_CALL_SYSTEM_PROMPT, SINGLE_CALL_USER_TEMPLATE
+from src.prompts.builder import truncate_to_tokens
+
+ROUTED_ANSWER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "route": {"type": "string", "enum": config.ROUTES},
+        "answer": {"type": "string"},
+        "sources": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["route", "answer", "sources"],
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "routed_answer", "strict": True, "schema": ROUTED_ANSWER_SCHEMA},
+}
+
+
+def format_previews(hits: Dict[str, List]) -> List[str]:
+    """One preview block per hit: route, source file and the start of the chunk"""
+    previews = []
+    for route, docs in hits.items():
+        for doc in docs:
+            source = ", ".join(document_sources(doc))
+            text = truncate_to_tokens(" ".join(doc.page_content.split()), config.SINGLE_CALL_PREVIEW_TOKENS)
+            previews.append(f"[{route}] {source}\n{text}")
+    return previews
+
+
+def parse_routed_answer(content: str, hits: Dict[str, List]) -> Optional[Dict]:
+    """
+    Validate the model's JSON reply. Sources are kept only if they were
+    shown for the chosen route. Returns None when the reply is unusable.
+    """
+    try:
+        reply = json.loads(content or "")
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(reply, dict) or reply.get("route") not in config.ROUTES or not reply.get("answer"):
+        return None
+
+    route = reply["route"]
+    shown = [source for doc in hits.get(route, []) for source in document_sources(doc)]
+    cited = [source for source in reply.get("sources") or [] if source in shown]
+    return {"route": route, "answer": reply["answer"].strip(), "sources": list(dict.fromkeys(cited))}
+
+
+class SingleCallAnswerer:
+    """Routes and answers a question with one structured-output completion"""
+
+    def __init__(self, assistant):
+        # Shares the assistant's client, vector store and prompt builder
+        self.assistant = assistant
+
+    def prepare(self, question: str, conversation_history: List[Dict], session_id: str = None):
+        """
+        Search every RAG route and build the completion request
+
+        Returns:
+            (chat completion parameters, route -> retrieved documents)
+        """
+        vector_store = self.assistant.vector_store
+        hits = vector_store.query_routes(question, k=config.SINGLE_CALL_HITS_PER_ROUTE)
+        prompt = self.assistant.prompt_builder.build(
+            SINGLE_CALL_SYSTEM_PROMPT,
+            SINGLE_CALL_USER_TEMPLATE,
+            question,
+            conversation_history,
+            chunks=format_previews(hits),
+            session_key=session_id,
+            separator="\n\n"
+        )
+        params = {
+            "messages": prompt["messages"],
+            **config.completion_params("single_call"),
+            "response_format": RESPONSE_FORMAT
+        }
+        return params, hits
+
+    def answer(self, question: str, conversation_history: List[Dict], session_id: str = None) -> Optional[Dict]:
+        """
+        Route and answer in one call
+
+        Returns:
+            The answer() result, or None if the call failed or its reply was
+            not valid, so the caller can fall back to the two-call pipeline
+        """
+        params, hits = self.prepare(question, conversation_history, session_id)
+        try:
+            response = self.assistant.generate("single_call", params)
+        except Exception as e:
+            print(f"❌ Single-call error ({type(e).__name__}): {e}")
+            return None
+
+        reply = parse_routed_answer(response.choices[0].message.content, hits)
+        if reply is None:
+            print("⚠️ Single-call reply was not valid JSON for the schema")
+            return None
+
+        route = reply["route"]
+        return {
+            "question": question,
+            "answer": reply["answer"],
+            "route": route,
+            "sources": reply["sources"],
+            "context_used": route != "direct_llm" and bool(hits.get(route)),
+            "num_chunks": len(hits.get(route, [])),
+            "usage": completion_usage(response),
+        }
@@ -0,0 +1,73 @@
+# src/database/analytics.py
+"""
+Usage analytics from the daily rollup tables.
+
+Prints questions per route per day, blocked rate by guardrail reason, the
+most cited sources and daily active users. Every query reads the small
+rollup tables that DatabaseHandler.save_message keeps up to date, never
+the messages table itself.
+
+Usage:
+    python src/database/analytics.py [--db data/chatbot.db] [--days 30] [--rebuild]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.database.db_handler import DatabaseHandler
+
+
+def print_report(db: DatabaseHandler, days: int = 30, top: int = 10):
+    start = time.perf_counter()
+    route_stats = db.get_route_stats(days)
+    block_reasons = db.get_block_reasons(days)
+    top_sources = db.get_top_sources(days, limit=top)
+    active_users = db.get_active_users(days)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    print("="*70)
+    print(f"📊 USAGE ANALYTICS (last {days} days)")
+    print("="*70)
+
+    print("\nQuestions per route per day")
+    print(f"{'day':<12}{'route':<22}{'questions':>10}{'blocked':>9}{'avg ms':>10}")
+    for row in route_stats:
+        latency = f"{row['avg_latency_ms']:.0f}" if row['avg_latency_ms'] is not None else "-"
+        print(f"{row['day']:<12}{row['route']:<22}{row['questions']:>10}{row['blocked']:>9}{latency:>10}")
+
+    print("\nBlocked by guardrail reason")
+    for row in block_reasons:
+        print(f"  {row['reason']:<32}{row['blocked']:>8}  ({row['rate']:.1%} of questions)")
+
+    print(f"\nTop {top} cited sources")
+    for row in top_sources:
+        print(f"  {row['source']:<40}{row['citations']:>8}")
+
+    print("\nActive users")
+    for row in active_users:
+        print(f"  {row['day']:<12}{row['active_users']:>6} users{row['messages']:>8} messages")
+
+    print(f"\n⏱️  Queries: {query_ms:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print chat usage analytics")
+    parser.add_argument("--db", default="data/chatbot.db")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Backfill older messages and recompute the rollups first")
+    args = parser.parse_args()
+
+    db = DatabaseHandler(db_path=args.db)
+    if args.rebuild:
+        backfilled = db.rebuild_analytics()
+        print(f"🔁 Rollups rebuilt ({backfilled} older messages backfilled)")
+    print_report(db, args.days, args.top)
+
+
+if __name__ == "__main__":
+    main()
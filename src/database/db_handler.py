@@ -1,27 +1,60 @@
 import sqlite3
 import hashlib
 import json
+import queue
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 import time
 from pathlib import Path
 from typing import Optional, Dict, List
 
+# Typed copies of the answer metadata, written alongside the JSON
+ANALYTICS_COLUMNS = {
+    "route": "TEXT",
+    "blocked": "INTEGER",
+    "reason": "TEXT",
+    "latency_ms": "REAL",
+}
+ROLLUP_TABLES = ["daily_route_stats", "daily_block_reasons", "daily_source_stats",
+                 "daily_active_users", "daily_activity"]
+
+
+def analytics_fields(metadata: Optional[Dict]) -> Dict:
+    """Typed analytics values from a message's metadata (all empty for user messages)"""
+    metadata = metadata or {}
+    route = metadata.get("route")
+    latency = metadata.get("latency_ms")
+    return {
+        "route": route,
+        "blocked": int(bool(metadata.get("blocked"))) if route else None,
+        "reason": metadata.get("reason") or None,
+        "latency_ms": float(latency) if latency is not None else None,
+        "sources": list(dict.fromkeys(metadata.get("sources") or [])),
+    }
+
+
 class DatabaseHandler:
-    def __init__(self, db_path: str = "data/chatbot.db"):
+    def __init__(self, db_path: str = "data/chatbot.db", pool_size: int = 8):
         """Initialize database handler.
 
-        This handler opens short-lived connections per operation to reduce
-        contention and avoids holding a long-lived connection across threads.
+        Connections come from a small pool. Each operation borrows one
+        connection, uses it on a single thread and hands it back, so one
+        handler can be shared by every Streamlit session in the process.
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._pool_lock = threading.Lock()
+        self._closed = False
+
         # Ensure DB initialized and tables created
         self.create_tables()
         print("✅ Database initialized successfully")
 
     def _get_conn(self):
-        """Create a new sqlite3 connection for each operation."""
+        """Create a new sqlite3 connection."""
         conn = sqlite3.connect(
             self.db_path,
             timeout=30.0,
@@ -30,13 +63,37 @@ class DatabaseHandler:
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA journal_mode=WAL")
         return conn
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection; commit on success, roll back on error."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._get_conn()
+
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            with self._pool_lock:
+                if self._closed:
+                    conn.close()
+                else:
+                    try:
+                        self._pool.put_nowait(conn)
+                    except queue.Full:
+                        conn.close()
     
     def create_tables(self):
         """Create necessary tables if they don't exist"""
         # Use a short-lived connection for DDL
         for attempt in range(5):
             try:
-                with self._get_conn() as conn:
+                with self._connection() as conn:
                     cursor = conn.cursor()
                     # Users table
                     cursor.execute("""
@@ -76,6 +133,7 @@ class DatabaseHandler:
                 FOREIGN KEY (session_id) REFERENCES sessions (session_id)
             )
         """)
+                    self._create_analytics_tables(cursor)
                     conn.commit()
                 break
             except sqlite3.OperationalError as e:
@@ -86,6 +144,69 @@ class DatabaseHandler:
                     print(f"❌ create_tables error: {e}")
                     break
     
+    def _create_analytics_tables(self, cursor):
+        """Typed answer columns, cited sources and daily rollup tables"""
+        # Older databases only have the metadata JSON column
+        existing = {row['name'] for row in cursor.execute("PRAGMA table_info(messages)")}
+        for column, column_type in ANALYTICS_COLUMNS.items():
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE messages ADD COLUMN {column} {column_type}")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS message_sources (
+                message_id INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                FOREIGN KEY (message_id) REFERENCES messages (message_id)
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_message_sources_message ON message_sources (message_id)"
+        )
+
+        # Rollups are updated in the same transaction as each message
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS daily_route_stats (
+                day TEXT NOT NULL,
+                route TEXT NOT NULL,
+                questions INTEGER NOT NULL DEFAULT 0,
+                blocked INTEGER NOT NULL DEFAULT 0,
+                latency_ms_total REAL NOT NULL DEFAULT 0,
+                latency_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, route)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS daily_block_reasons (
+                day TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, reason)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS daily_source_stats (
+                day TEXT NOT NULL,
+                source TEXT NOT NULL,
+                citations INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, source)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS daily_active_users (
+                day TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                messages INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, user_id)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS daily_activity (
+                day TEXT PRIMARY KEY,
+                active_users INTEGER NOT NULL DEFAULT 0,
+                messages INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
     def _hash_password(self, password: str) -> str:
         """Hash password using SHA-256"""
         return hashlib.sha256(password.encode()).hexdigest()
@@ -102,7 +223,7 @@ class DatabaseHandler:
 
             for attempt in range(5):
                 try:
-                    with self._get_conn() as conn:
+                    with self._connection() as conn:
                         cursor = conn.cursor()
                         cursor.execute(
                             "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
@@ -131,7 +252,7 @@ class DatabaseHandler:
         """Authenticate user and return user_id if successful"""
         try:
             password_hash = self._hash_password(password)
-            with self._get_conn() as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT user_id FROM users WHERE username = ? AND password_hash = ?",
@@ -160,7 +281,7 @@ class DatabaseHandler:
         try:
             for attempt in range(5):
                 try:
-                    with self._get_conn() as conn:
+                    with self._connection() as conn:
                         cursor = conn.cursor()
                         cursor.execute(
                             "INSERT OR REPLACE INTO sessions (session_id, user_id, session_name) VALUES (?, ?, ?)",
@@ -184,18 +305,22 @@ class DatabaseHandler:
         content: str,
         metadata: Optional[Dict] = None
     ):
-        """Save a chat message"""
+        """Save a chat message and update the daily rollups"""
         try:
             metadata_json = json.dumps(metadata) if metadata else None
+            fields = analytics_fields(metadata)
             for attempt in range(5):
                 try:
-                    with self._get_conn() as conn:
+                    with self._connection() as conn:
                         cursor = conn.cursor()
                         cursor.execute(
-                            """INSERT INTO messages (user_id, session_id, role, content, metadata) 
-                               VALUES (?, ?, ?, ?, ?)""",
-                            (user_id, session_id, role, content, metadata_json)
+                            """INSERT INTO messages (user_id, session_id, role, content, metadata,
+                                                     route, blocked, reason, latency_ms)
+                               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                            (user_id, session_id, role, content, metadata_json,
+                             fields['route'], fields['blocked'], fields['reason'], fields['latency_ms'])
                         )
+                        self._record_analytics(cursor, cursor.lastrowid, user_id, fields)
 
                         # Update session last activity
                         cursor.execute(
@@ -212,10 +337,60 @@ class DatabaseHandler:
         except Exception as e:
             print(f"❌ Message save error: {e}")
     
+    def _record_analytics(self, cursor, message_id: int, user_id: int, fields: Dict):
+        """Store cited sources and bump today's rollup counters"""
+        # The per-user row only exists to tell a user's first message of the day
+        cursor.execute(
+            "INSERT OR IGNORE INTO daily_active_users (day, user_id, messages) VALUES (date('now'), ?, 0)",
+            (user_id,)
+        )
+        first_today = cursor.rowcount == 1
+        cursor.execute(
+            "UPDATE daily_active_users SET messages = messages + 1 WHERE day = date('now') AND user_id = ?",
+            (user_id,)
+        )
+        cursor.execute(
+            """INSERT INTO daily_activity (day, active_users, messages) VALUES (date('now'), ?, 1)
+               ON CONFLICT (day) DO UPDATE SET
+                   active_users = active_users + excluded.active_users,
+                   messages = messages + 1""",
+            (int(first_today),)
+        )
+        if fields['route'] is None:
+            return
+
+        latency = fields['latency_ms']
+        cursor.execute(
+            """INSERT INTO daily_route_stats (day, route, questions, blocked, latency_ms_total, latency_count)
+               VALUES (date('now'), ?, 1, ?, ?, ?)
+               ON CONFLICT (day, route) DO UPDATE SET
+                   questions = questions + 1,
+                   blocked = blocked + excluded.blocked,
+                   latency_ms_total = latency_ms_total + excluded.latency_ms_total,
+                   latency_count = latency_count + excluded.latency_count""",
+            (fields['route'], fields['blocked'], latency or 0.0, int(latency is not None))
+        )
+        if fields['blocked']:
+            cursor.execute(
+                """INSERT INTO daily_block_reasons (day, reason, count) VALUES (date('now'), ?, 1)
+                   ON CONFLICT (day, reason) DO UPDATE SET count = count + 1""",
+                (fields['reason'] or 'unknown',)
+            )
+        if fields['sources']:
+            cursor.executemany(
+                "INSERT INTO message_sources (message_id, source) VALUES (?, ?)",
+                [(message_id, source) for source in fields['sources']]
+            )
+            cursor.executemany(
+                """INSERT INTO daily_source_stats (day, source, citations) VALUES (date('now'), ?, 1)
+                   ON CONFLICT (day, source) DO UPDATE SET citations = citations + 1""",
+                [(source,) for source in fields['sources']]
+            )
+
     def get_chat_history(self, user_id: int, session_id: str) -> List[Dict]:
         """Retrieve chat history for a session"""
         try:
-            with self._get_conn() as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """SELECT role, content, metadata, timestamp 
@@ -244,7 +419,7 @@ class DatabaseHandler:
     def get_user_sessions(self, user_id: int) -> List[Dict]:
         """Get all sessions for a user"""
         try:
-            with self._get_conn() as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """SELECT session_id, session_name, created_at, last_activity 
@@ -262,7 +437,7 @@ class DatabaseHandler:
     def get_user_info(self, user_id: int) -> Optional[Dict]:
         """Get user information"""
         try:
-            with self._get_conn() as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT username, email, created_at, last_login FROM users WHERE user_id = ?",
@@ -280,7 +455,7 @@ class DatabaseHandler:
         try:
             for attempt in range(5):
                 try:
-                    with self._get_conn() as conn:
+                    with self._connection() as conn:
                         cursor = conn.cursor()
                         # Delete messages first (foreign key constraint)
                         cursor.execute(
@@ -303,11 +478,153 @@ class DatabaseHandler:
         except Exception as e:
             print(f"❌ Session deletion error: {e}")
     
+    def update_session_name(self, session_id: str, session_name: str):
+        """Rename a chat session"""
+        try:
+            for attempt in range(5):
+                try:
+                    with self._connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute(
+                            "UPDATE sessions SET session_name = ? WHERE session_id = ?",
+                            (session_name, session_id)
+                        )
+                        conn.commit()
+                    break
+                except sqlite3.OperationalError as e:
+                    if 'locked' in str(e).lower() and attempt < 4:
+                        time.sleep(0.2 * (2 ** attempt))
+                        continue
+                    raise
+        except Exception as e:
+            print(f"❌ Session rename error: {e}")
+    
+    def rebuild_analytics(self) -> int:
+        """
+        Backfill typed columns for messages saved before they existed, then
+        recompute every rollup from the messages table. Returns the number
+        of backfilled messages. Needed once after upgrading an existing
+        database; rollups also keep counting messages of deleted sessions
+        until the next rebuild.
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                legacy = cursor.execute(
+                    """SELECT message_id, metadata FROM messages
+                       WHERE metadata IS NOT NULL AND route IS NULL"""
+                ).fetchall()
+                for row in legacy:
+                    fields = analytics_fields(json.loads(row['metadata']))
+                    cursor.execute(
+                        "UPDATE messages SET route = ?, blocked = ?, reason = ?, latency_ms = ? WHERE message_id = ?",
+                        (fields['route'], fields['blocked'], fields['reason'], fields['latency_ms'],
+                         row['message_id'])
+                    )
+                    cursor.execute("DELETE FROM message_sources WHERE message_id = ?", (row['message_id'],))
+                    cursor.executemany(
+                        "INSERT INTO message_sources (message_id, source) VALUES (?, ?)",
+                        [(row['message_id'], source) for source in fields['sources']]
+                    )
+
+                for table in ROLLUP_TABLES:
+                    cursor.execute(f"DELETE FROM {table}")
+                cursor.execute("""
+                    INSERT INTO daily_active_users (day, user_id, messages)
+                    SELECT date(timestamp), user_id, COUNT(*) FROM messages
+                    GROUP BY date(timestamp), user_id
+                """)
+                cursor.execute("""
+                    INSERT INTO daily_activity (day, active_users, messages)
+                    SELECT day, COUNT(*), SUM(messages) FROM daily_active_users GROUP BY day
+                """)
+                cursor.execute("""
+                    INSERT INTO daily_route_stats (day, route, questions, blocked, latency_ms_total, latency_count)
+                    SELECT date(timestamp), route, COUNT(*), SUM(blocked),
+                           COALESCE(SUM(latency_ms), 0), COUNT(latency_ms)
+                    FROM messages WHERE route IS NOT NULL
+                    GROUP BY date(timestamp), route
+                """)
+                cursor.execute("""
+                    INSERT INTO daily_block_reasons (day, reason, count)
+                    SELECT date(timestamp), COALESCE(NULLIF(reason, ''), 'unknown'), COUNT(*)
+                    FROM messages WHERE route IS NOT NULL AND blocked = 1
+                    GROUP BY 1, 2
+                """)
+                cursor.execute("""
+                    INSERT INTO daily_source_stats (day, source, citations)
+                    SELECT date(m.timestamp), s.source, COUNT(*)
+                    FROM message_sources s JOIN messages m ON m.message_id = s.message_id
+                    GROUP BY 1, 2
+                """)
+                conn.commit()
+                return len(legacy)
+
+        except Exception as e:
+            print(f"❌ Analytics rebuild error: {e}")
+            return 0
+
+    def _rollup_query(self, query: str, params: tuple) -> List[Dict]:
+        try:
+            with self._connection() as conn:
+                return [dict(row) for row in conn.execute(query, params).fetchall()]
+        except Exception as e:
+            print(f"❌ Analytics query error: {e}")
+            return []
+
+    def get_route_stats(self, days: int = 30) -> List[Dict]:
+        """Questions, blocked answers and mean latency per route per day"""
+        return self._rollup_query(
+            """SELECT day, route, questions, blocked,
+                      CASE WHEN latency_count > 0 THEN latency_ms_total / latency_count END AS avg_latency_ms
+               FROM daily_route_stats WHERE day >= date('now', ?)
+               ORDER BY day DESC, questions DESC""",
+            (f"-{days} days",)
+        )
+
+    def get_block_reasons(self, days: int = 30) -> List[Dict]:
+        """Blocked answers per guardrail reason, with their share of all questions"""
+        return self._rollup_query(
+            """SELECT reason, SUM(count) AS blocked,
+                      CAST(SUM(count) AS REAL) / (SELECT MAX(SUM(questions), 1) FROM daily_route_stats
+                                                  WHERE day >= date('now', ?1)) AS rate
+               FROM daily_block_reasons WHERE day >= date('now', ?1)
+               GROUP BY reason ORDER BY blocked DESC""",
+            (f"-{days} days",)
+        )
+
+    def get_top_sources(self, days: int = 30, limit: int = 10) -> List[Dict]:
+        """Most cited sources"""
+        return self._rollup_query(
+            """SELECT source, SUM(citations) AS citations
+               FROM daily_source_stats WHERE day >= date('now', ?)
+               GROUP BY source ORDER BY citations DESC LIMIT ?""",
+            (f"-{days} days", limit)
+        )
+
+    def get_active_users(self, days: int = 30) -> List[Dict]:
+        """Distinct active users and messages per day"""
+        return self._rollup_query(
+            """SELECT day, active_users, messages
+               FROM daily_activity WHERE day >= date('now', ?)
+               ORDER BY day DESC""",
+            (f"-{days} days",)
+        )
+
     def close(self):
-        """Close database connection"""
-        # No persistent connection to close when using per-call connections.
-        print("✅ Database handler cleanup (no persistent connection to close)")
+        """Close pooled database connections"""
+        with self._pool_lock:
+            if self._closed:
+                return
+            self._closed = True
+            while True:
+                try:
+                    self._pool.get_nowait().close()
+                except queue.Empty:
+                    break
+        print("✅ Database handler cleanup (pooled connections closed)")
     
     def __del__(self):
         """Cleanup on object destruction"""
-        self.close()
\ No newline at end of file
+        if hasattr(self, "_pool_lock"):
+            self.close()
\ No newline at end of file
@@ -0,0 +1,122 @@
+# src/evaluation/analytics_benchmark.py
+"""
+Analytics query latency: rollup tables versus scanning metadata JSON.
+
+Fills a scratch database with synthetic chat history spread over 90 days,
+builds the rollups with DatabaseHandler.rebuild_analytics, then times the
+dashboard queries both ways. The JSON baseline is what the dashboards had
+to do before: read every message and json.loads its metadata.
+
+Usage:
+    python src/evaluation/analytics_benchmark.py [--messages 200000]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.database.db_handler import DatabaseHandler
+
+ROUTES = ["admin_policy", "general_company", "role_specific", "direct_llm", "guardrail_blocked"]
+SOURCES = ["expense_policy.md", "leave_policy.md", "company_overview.md", "onboarding_faq.md",
+           "product_manager_role.md", "data_analyst_role.md", "it_tools_access.md"]
+REASONS = ["Content policy violation", "Invalid format", "Prompt injection attempt"]
+
+
+def fill(db: DatabaseHandler, messages: int, users: int = 500, seed: int = 0):
+    """Bulk-insert question/answer pairs, bypassing save_message for speed"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(messages // 2):
+        user_id = rng.randrange(users)
+        day = f"-{rng.randrange(90)} days"
+        route = rng.choice(ROUTES)
+        blocked = route == "guardrail_blocked"
+        metadata = {
+            "route": route,
+            "sources": [] if blocked else rng.sample(SOURCES, rng.randint(0, 3)),
+            "blocked": blocked,
+            "reason": rng.choice(REASONS) if blocked else "",
+            "latency_ms": rng.uniform(300, 4000),
+        }
+        rows.append((user_id, f"s{user_id}", "user", "question", None, day))
+        rows.append((user_id, f"s{user_id}", "assistant", "answer", json.dumps(metadata), day))
+
+    with db._connection() as conn:
+        conn.executemany(
+            """INSERT INTO messages (user_id, session_id, role, content, metadata, timestamp)
+               VALUES (?, ?, ?, ?, ?, datetime('now', ?))""",
+            rows
+        )
+
+
+def json_scan(db: DatabaseHandler, days: int) -> Dict:
+    """The old way: every metadata row parsed in Python"""
+    routes, reasons, sources, users = Counter(), Counter(), Counter(), set()
+    with db._connection() as conn:
+        for row in conn.execute(
+            "SELECT user_id, metadata, date(timestamp) AS day FROM messages WHERE date(timestamp) >= date('now', ?)",
+            (f"-{days} days",)
+        ):
+            users.add((row["day"], row["user_id"]))
+            if not row["metadata"]:
+                continue
+            metadata = json.loads(row["metadata"])
+            routes[(row["day"], metadata["route"])] += 1
+            if metadata.get("blocked"):
+                reasons[metadata.get("reason")] += 1
+            sources.update(metadata.get("sources") or [])
+    return {"routes": len(routes), "reasons": len(reasons), "sources": len(sources), "users": len(users)}
+
+
+def rollup_queries(db: DatabaseHandler, days: int) -> Dict:
+    return {
+        "routes": len(db.get_route_stats(days)),
+        "reasons": len(db.get_block_reasons(days)),
+        "sources": len(db.get_top_sources(days, limit=100)),
+        "users": sum(row["active_users"] for row in db.get_active_users(days)),
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_benchmark(messages: int = 200000, days: int = 30) -> Dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseHandler(db_path=str(Path(tmp) / "analytics.db"))
+        _, fill_ms = timed(fill, db, messages)
+        _, rebuild_ms = timed(db.rebuild_analytics)
+        scanned, scan_ms = timed(json_scan, db, days)
+        rolled, rollup_ms = timed(rollup_queries, db, days)
+        db.close()
+
+    print("="*70)
+    print(f"📊 ANALYTICS QUERIES ({messages:,} messages, last {days} days)")
+    print("="*70 + "\n")
+    print(f"Fill / one-off rebuild:  {fill_ms:,.0f} / {rebuild_ms:,.0f} ms")
+    print(f"JSON scan:               {scan_ms:,.1f} ms")
+    print(f"Rollup queries:          {rollup_ms:,.1f} ms ({scan_ms / rollup_ms:,.0f}x faster)")
+    print(f"Same answers:            {scanned == rolled}")
+    return {"scan_ms": scan_ms, "rollup_ms": rollup_ms, "match": scanned == rolled}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics query latency")
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+    run_benchmark(args.messages, args.days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# src/evaluation/answer_mode_benchmark.py
+"""
+Two-call versus single-call answering on the evaluation set.
+
+Answers every question in data/evaluation_set.csv with the two-call
+pipeline (router completion, then answer completion) and with the
+single-call structured-output mode. Reports end-to-end latency, chat
+completions and tokens per question, and routing accuracy against
+expected_route. By default calls go to the local mock server, whose delay
+grows with prompt size; pass --live to use the configured API. Both modes
+need the corpus loaded into Chroma, or --scratch-index to search a
+temporary int8 index of the corpus instead (no Chroma wrapper needed).
+
+Usage:
+    python src/evaluation/answer_mode_benchmark.py [--live] [--latency-ms 300] [--scratch-index]
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.evaluation.mock_openai_server import MockOpenAIServer
+
+MODES = ("two_call", "single_call")
+
+
+class UsageMeter:
+    """Wraps a ResilientClient and adds up chat completion calls and tokens"""
+
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = self.prompt_tokens = self.completion_tokens = 0
+
+    def chat_completion(self, **kwargs):
+        response = self.client.chat_completion(**kwargs)
+        usage = getattr(response, "usage", None)
+        with self.lock:
+            self.calls += 1
+            if usage is not None:
+                self.prompt_tokens += usage.prompt_tokens
+                self.completion_tokens += usage.completion_tokens
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def load_eval_set(path) -> List[Dict]:
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def build_scratch_index(quantization: str = "int8") -> tempfile.TemporaryDirectory:
+    """Point the vector store at a temporary quantized index of the corpus"""
+    from src.utils.config import Config
+    from src.retrieval.embeddings import create_embedding_provider
+    from src.retrieval.quantized_index import QuantizedIndex
+    from src.retrieval.vector_store import VectorStore
+    from src.evaluation.index_benchmark import corpus_chunks
+
+    scratch = tempfile.TemporaryDirectory()
+    Config.CHROMA_DIR = Path(scratch.name)
+    Config.VECTOR_QUANTIZATION = quantization
+    embeddings = create_embedding_provider()
+    chunks = corpus_chunks()
+    for route in sorted({chunk.metadata["route"] for chunk in chunks}):
+        QuantizedIndex(VectorStore._quantized_path(route), embeddings, quantization).build(
+            [chunk for chunk in chunks if chunk.metadata["route"] == route]
+        )
+    return scratch
+
+
+def run_mode(assistant, meter: UsageMeter, rows: List[Dict], mode: str) -> Dict:
+    meter.reset()
+    latencies, correct, fallbacks = [], 0, 0
+    for row in rows:
+        start = time.perf_counter()
+        result = assistant.answer(row["question"], mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += result["route"] == row["expected_route"]
+        fallbacks += bool(result.get("trace", {}).get("single_call_failed"))
+
+    n = len(rows)
+    return {
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": statistics.median(latencies),
+        "calls_per_question": meter.calls / n,
+        "prompt_tokens": meter.prompt_tokens / n,
+        "completion_tokens": meter.completion_tokens / n,
+        "routing_accuracy": correct / n,
+        "fallbacks": fallbacks,
+    }
+
+
+def run_benchmark(live: bool = False, latency_ms: float = 300.0, prompt_token_latency_ms: float = 0.2,
+                  scratch_index: bool = False) -> Dict:
+    server = None
+    if not live:
+        server = MockOpenAIServer(latency_ms=latency_ms).start()
+        server.state.prompt_token_latency_ms = prompt_token_latency_ms
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "mock"
+    scratch = build_scratch_index() if scratch_index else None
+
+    from src.utils.config import config
+    from src.utils.registry import registry
+
+    rows = load_eval_set(config.EVAL_SET_PATH)
+    with contextlib.redirect_stdout(io.StringIO()):  # Per-question progress logging
+        assistant = registry.get_assistant()
+    meter = UsageMeter(assistant.client)
+    assistant.client = assistant.router.client = meter
+
+    results = {}
+    try:
+        for mode in MODES:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[mode] = run_mode(assistant, meter, rows, mode)
+    finally:
+        if server:
+            server.stop()
+        if scratch:
+            scratch.cleanup()
+
+    print("="*70)
+    print(f"🔀 TWO-CALL vs SINGLE-CALL ({len(rows)} questions, {'live API' if live else 'mock API'})")
+    print("="*70 + "\n")
+    print(f"{'mode':<13}{'mean ms':>9}{'p50 ms':>9}{'calls':>7}{'prompt tok':>12}"
+          f"{'compl tok':>11}{'routing':>9}{'fallbacks':>11}")
+    for mode, r in results.items():
+        print(f"{mode:<13}{r['mean_ms']:>9.0f}{r['p50_ms']:>9.0f}{r['calls_per_question']:>7.2f}"
+              f"{r['prompt_tokens']:>12.0f}{r['completion_tokens']:>11.0f}"
+              f"{r['routing_accuracy']:>9.0%}{r['fallbacks']:>11}")
+
+    saved = 1 - results["single_call"]["mean_ms"] / results["two_call"]["mean_ms"]
+    print(f"\n⏱️  Single call is {saved:.0%} faster end to end")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Two-call vs single-call answering")
+    parser.add_argument("--live", action="store_true", help="Use the configured OpenAI API")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mock delay per call")
+    parser.add_argument("--prompt-token-latency-ms", type=float, default=0.2,
+                        help="Mock delay per prompt token")
+    parser.add_argument("--scratch-index", action="store_true",
+                        help="Search a temporary int8 index of the corpus instead of Chroma")
+    args = parser.parse_args()
+    run_benchmark(args.live, args.latency_ms, args.prompt_token_latency_ms, args.scratch_index)
+
+
+if __name__ == "__main__":
+    main()
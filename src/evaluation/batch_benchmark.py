@@ -0,0 +1,98 @@
+# src/evaluation/batch_benchmark.py
+"""
+Batch answering throughput against the local mock OpenAI server.
+
+Replicates the evaluation-set questions, answers them with answer_batch at
+several concurrency levels and reports questions/min. The mock adds a fixed
+latency per API call so the numbers reflect I/O overlap, not model speed.
+
+Usage:
+    python src/evaluation/batch_benchmark.py [--concurrency 1 4 8] [--latency-ms 200]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.evaluation.mock_openai_server import MockOpenAIServer
+
+
+def load_questions(eval_set_path: str, replicate: int) -> List[Dict]:
+    with open(eval_set_path, newline='', encoding='utf-8') as f:
+        questions = [row['question'] for row in csv.DictReader(f)]
+    return [
+        {"id": f"{n}-{i}", "question": question}
+        for n in range(replicate)
+        for i, question in enumerate(questions)
+    ]
+
+
+def run_benchmark(
+    levels: List[int],
+    latency_ms: float = 200.0,
+    replicate: int = 2,
+    use_processes: bool = False,
+    requests_per_minute: float = 0
+) -> Dict[int, Dict]:
+    server = MockOpenAIServer(latency_ms=latency_ms).start()
+    # Must be set before the config secrets and the OpenAI client are first read
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["OPENAI_API_KEY"] = "mock"
+
+    from src.utils.config import config
+    from src.agents.batch import answer_batch
+
+    questions = load_questions(config.EVAL_SET_PATH, replicate)
+    mode = "processes" if use_processes else "threads"
+
+    print("="*70)
+    print(f"📦 BATCH THROUGHPUT ({len(questions)} questions, {mode}, "
+          f"mock latency {latency_ms:.0f} ms)")
+    print("="*70 + "\n")
+
+    results = {}
+    try:
+        for concurrency in levels:
+            start = time.perf_counter()
+            answers = list(answer_batch(
+                questions, concurrency,
+                use_processes=use_processes,
+                requests_per_minute=requests_per_minute
+            ))
+            elapsed = time.perf_counter() - start
+            errors = sum(1 for a in answers if a.get("error"))
+            in_order = [a["id"] for a in answers] == [q["id"] for q in questions]
+
+            results[concurrency] = {
+                "elapsed_s": elapsed,
+                "questions_per_min": len(answers) / elapsed * 60,
+                "errors": errors,
+                "in_order": in_order,
+            }
+            print(f"⚙️  concurrency {concurrency:>2}: {results[concurrency]['questions_per_min']:7.1f} "
+                  f"questions/min ({elapsed:.1f}s, {errors} errors, in order: {in_order})")
+    finally:
+        server.stop()
+
+    print(f"\n📡 Mock API calls: {server.state.requests}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch answering throughput")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--replicate", type=int, default=2, help="Copies of the eval set")
+    parser.add_argument("--processes", action="store_true")
+    parser.add_argument("--rpm", type=float, default=0, help="Shared requests/min limit (0 = off)")
+    args = parser.parse_args()
+    run_benchmark(args.concurrency, args.latency_ms, args.replicate, args.processes, args.rpm)
+
+
+if __name__ == "__main__":
+    main()
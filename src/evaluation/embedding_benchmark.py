@@ -0,0 +1,94 @@
+# src/evaluation/embedding_benchmark.py
+"""
+Query-embedding latency per embedding backend.
+
+Embeds the evaluation-set questions one at a time (as VectorStore.query
+does) with every backend that can be created here, then reports p50/p95
+latency and a batched documents throughput figure.
+
+Usage:
+    python src/evaluation/embedding_benchmark.py [--providers openai onnx hashing]
+"""
+
+import argparse
+import csv
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.retrieval.embeddings import create_embedding_provider
+
+
+def load_questions() -> List[str]:
+    with open(config.EVAL_SET_PATH, newline='', encoding='utf-8') as f:
+        return [row['question'] for row in csv.DictReader(f)]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark_provider(provider_name: str, questions: List[str], rounds: int = 3) -> Dict:
+    """Measure per-query latency and batched throughput for one provider"""
+    provider = create_embedding_provider(provider_name)
+    provider.embed_query("warm-up")
+
+    latencies = []
+    for _ in range(rounds):
+        for question in questions:
+            start = time.perf_counter()
+            provider.embed_query(question)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    provider.embed_documents(questions * rounds)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "provider": provider.name,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "mean_ms": statistics.mean(latencies),
+        "batch_texts_per_sec": len(questions) * rounds / batch_seconds,
+    }
+
+
+def run_benchmark(providers: List[str], rounds: int = 3) -> Dict:
+    questions = load_questions()
+
+    print("="*70)
+    print(f"⏱️  QUERY EMBEDDING LATENCY ({len(questions)} questions x {rounds} rounds)")
+    print("="*70 + "\n")
+
+    results = {}
+    for name in providers:
+        try:
+            result = benchmark_provider(name, questions, rounds)
+        except Exception as e:
+            print(f"⚠️ {name}: unavailable ({e})\n")
+            continue
+        results[name] = result
+        print(f"🔢 {result['provider']}")
+        print(f"   p50 {result['p50_ms']:.2f} ms | p95 {result['p95_ms']:.2f} ms | "
+              f"mean {result['mean_ms']:.2f} ms")
+        print(f"   batched: {result['batch_texts_per_sec']:.0f} texts/sec\n")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query-embedding latency per backend")
+    parser.add_argument("--providers", nargs="+", default=["openai", "onnx", "hashing"])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    run_benchmark(args.providers, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 # src/evaluation/evaluator.py
 
-import pandas as pd
+import argparse
 import sys
 from pathlib import Path
 from typing import Dict, List
@@ -8,18 +8,48 @@ import json
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.agents.assistant import AITrainingAssistant
+from src.utils.clients import usage_cost
 from src.utils.config import config
+from src.utils.scheduler import BACKGROUND, call_context
 
 
 class Evaluator:
     """Evaluate the AI Training Assistant"""
     
-    def __init__(self):
+    def __init__(self, bulk: bool = False):
+        """
+        Args:
+            bulk: Answer the whole set up front through the Batch API
+                instead of one chat completion per step
+        """
         print("🔬 Initializing Evaluator...")
+        import pandas as pd
+        
         self.assistant = AITrainingAssistant()
         self.eval_df = pd.read_csv(config.EVAL_SET_PATH)
+        self.bulk = bulk
+        # Answers by row index; routing and quality share one answer per question
+        self._answers = {}
         print(f"✅ Loaded {len(self.eval_df)} test questions\n")
     
+    def precompute_answers(self):
+        """Answer every evaluation question with one routing and one generation batch job"""
+        from src.agents.bulk import BulkAnswerer
+        
+        print("📦 Answering evaluation set in bulk...")
+        questions = [
+            {"id": str(idx), "question": row['question']}
+            for idx, row in self.eval_df.iterrows()
+        ]
+        for result in BulkAnswerer(self.assistant).answer_all(questions):
+            self._answers[int(result["id"])] = result
+        print(f"✅ {len(self._answers)} answers ready\n")
+    
+    def _answer(self, idx, question: str) -> Dict:
+        if idx not in self._answers:
+            self._answers[idx] = self.assistant.answer(question)
+        return self._answers[idx]
+    
     def evaluate_routing(self) -> Dict:
         """Evaluate routing accuracy"""
         print("="*70)
@@ -35,13 +65,13 @@ class Evaluator:
             expected_route = row['expected_route']
             
             # Skip if no expected route (like direct_llm questions)
-            if pd.isna(expected_route) or expected_route == '':
+            if not isinstance(expected_route, str) or expected_route == '':
                 continue
             
             total += 1
             
             # Get actual route
-            result = self.assistant.answer(question)
+            result = self._answer(idx, question)
             actual_route = result['route']
             
             is_correct = (actual_route == expected_route)
@@ -90,7 +120,7 @@ class Evaluator:
             gold_source = row.get('gold_source', '')
             
             # Get answer
-            result = self.assistant.answer(question)
+            result = self._answer(idx, question)
             answer = result['answer'].lower()
             sources = result.get('sources', [])
             
@@ -140,16 +170,138 @@ class Evaluator:
             'details': results
         }
     
-    def run_full_evaluation(self) -> Dict:
+    def evaluate_faq_serving(self) -> Dict:
+        """Share of the evaluation set answered from the pre-generated FAQ index"""
+        print("="*70)
+        print("📇 EVALUATING FAQ SERVE RATE")
+        print("="*70 + "\n")
+        
+        served = correct_route = 0
+        for idx, row in self.eval_df.iterrows():
+            result = self._answer(idx, row['question'])
+            match = result.get('faq_match')
+            if not match:
+                continue
+            served += 1
+            correct_route += result['route'] == row['expected_route']
+            print(f"📇 Q{idx+1}: {row['question'][:50]}... → {match['question'][:40]} ({match['score']:.2f})")
+        
+        total = len(self.eval_df)
+        serve_rate = served / total * 100 if total > 0 else 0
+        print(f"\n📊 Served from FAQ: {served}/{total} ({serve_rate:.1f}%), "
+              f"route agrees with expected for {correct_route}\n")
+        return {'served': served, 'total': total, 'serve_rate': serve_rate, 'route_correct': correct_route}
+    
+    def evaluate_route_costs(self) -> Dict:
+        """
+        Cost, tokens and latency per route over the evaluation set, using
+        the models and prices of each route's policy in config.yaml
+        """
+        print("="*70)
+        print("💰 EVALUATING COST AND LATENCY PER ROUTE")
+        print("="*70 + "\n")
+        
+        router_model = config.route_policy("router")["model"]
+        routes = {}
+        for idx, row in self.eval_df.iterrows():
+            result = self._answer(idx, row['question'])
+            trace = result.get('trace') or {}
+            usage = result.get('usage') or {}
+            router_usage = result.get('router_usage') or {}
+            
+            # Blocked and FAQ answers make no model call: bucketed on their
+            # own at zero cost, without a route policy to look up
+            if result.get('blocked') or trace.get('mode') == "faq":
+                bucket = "guardrail_blocked" if result.get('blocked') else "faq"
+                model = None
+            else:
+                bucket = result['route']
+                policy = "single_call" if trace.get('mode') == "single_call" else bucket
+                model = config.route_policy(policy)['model']
+            
+            stats = routes.setdefault(bucket, {
+                'questions': 0, 'model': model,
+                'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0, 'latencies_ms': []
+            })
+            stats['questions'] += 1
+            stats['prompt_tokens'] += usage.get('prompt_tokens', 0) + router_usage.get('prompt_tokens', 0)
+            stats['completion_tokens'] += usage.get('completion_tokens', 0) + router_usage.get('completion_tokens', 0)
+            if model is not None:
+                stats['cost_usd'] += usage_cost(usage, model) + usage_cost(router_usage, router_model)
+            if 'total_ms' in trace:
+                stats['latencies_ms'].append(trace['total_ms'])
+        
+        print(f"{'Route':<17} {'Model':<14} {'N':>3} {'Out tok/q':>9} {'$/1k q':>8} {'p50 ms':>8}")
+        for route, stats in sorted(routes.items()):
+            latencies = sorted(stats.pop('latencies_ms'))
+            n = stats['questions']
+            stats['mean_completion_tokens'] = stats['completion_tokens'] / n
+            stats['cost_per_1k_questions'] = stats['cost_usd'] / n * 1000
+            stats['p50_latency_ms'] = latencies[len(latencies) // 2] if latencies else None
+            p50 = f"{stats['p50_latency_ms']:.0f}" if latencies else "-"
+            print(f"{route:<17} {stats['model'] or '-':<14} {n:>3} {stats['mean_completion_tokens']:>9.0f} "
+                  f"{stats['cost_per_1k_questions']:>8.3f} {p50:>8}")
+        print()
+        
+        return {'routes': routes, 'total_cost_usd': sum(s['cost_usd'] for s in routes.values())}
+    
+    def evaluate_prompt_cache(self, passes: int = 2) -> Dict:
+        """
+        Replay the evaluation set and report how much of each answer prompt
+        the provider served from its prompt-prefix cache. The first pass
+        warms the cache; later passes show the steady-state hit ratio.
+        """
+        print("="*70)
+        print(f"🗄️  EVALUATING PROMPT CACHE ({passes} passes)")
+        print("="*70 + "\n")
+        
+        results = []
+        for n in range(1, passes + 1):
+            prompt_tokens = cached_tokens = stable_prefix = answered = 0
+            for _, row in self.eval_df.iterrows():
+                result = self.assistant.answer(row['question'])
+                usage = result.get('usage') or {}
+                prompt_tokens += usage.get('prompt_tokens', 0)
+                cached_tokens += usage.get('cached_tokens', 0)
+                stable_prefix += result.get('stable_prefix_tokens', 0)
+                answered += bool(usage)
+            
+            hit_ratio = cached_tokens / prompt_tokens if prompt_tokens else 0.0
+            results.append({
+                'pass': n,
+                'prompt_tokens': prompt_tokens,
+                'cached_tokens': cached_tokens,
+                'cache_hit_ratio': hit_ratio,
+                'mean_stable_prefix_tokens': stable_prefix / answered if answered else 0.0
+            })
+            print(f"Pass {n}: {cached_tokens}/{prompt_tokens} prompt tokens cached ({hit_ratio:.1%}), "
+                  f"mean stable prefix {results[-1]['mean_stable_prefix_tokens']:.0f} tokens")
+        
+        print()
+        return {'passes': results, 'cache_hit_ratio': results[-1]['cache_hit_ratio']}
+    
+    def run_full_evaluation(self, cache_passes: int = 0) -> Dict:
         """Run complete evaluation"""
         print("\n" + "🚀 STARTING FULL EVALUATION\n")
         
+        if self.bulk:
+            self.precompute_answers()
+        
         # Evaluate routing
         routing_results = self.evaluate_routing()
         
         # Evaluate answer quality
         quality_results = self.evaluate_answer_quality()
         
+        # FAQ serve rate, from the same answers
+        faq_results = self.evaluate_faq_serving()
+        
+        # Cost and latency per route, from the same answers
+        cost_results = self.evaluate_route_costs()
+        
+        # Replay for prompt-cache hit ratio
+        cache_results = self.evaluate_prompt_cache(cache_passes) if cache_passes else None
+        
         # Overall summary
         print("="*70)
         print("📈 FINAL EVALUATION SUMMARY")
@@ -157,6 +309,10 @@ class Evaluator:
         print(f"✅ Routing Accuracy:  {routing_results['accuracy']:.1f}%")
         print(f"📚 Citation Rate:     {quality_results['citation_rate']:.1f}%")
         print(f"📝 Relevance Rate:    {quality_results['relevance_rate']:.1f}%")
+        print(f"📇 FAQ Serve Rate:    {faq_results['serve_rate']:.1f}%")
+        print(f"💰 Cost:              ${cost_results['total_cost_usd']:.4f}")
+        if cache_results:
+            print(f"🗄️  Prompt Cache Hits: {cache_results['cache_hit_ratio']:.1%}")
         print("="*70 + "\n")
         
         # Save results
@@ -169,6 +325,13 @@ class Evaluator:
                 'relevance_rate': quality_results['relevance_rate']
             }
         }
+        results['faq'] = faq_results
+        results['summary']['faq_serve_rate'] = faq_results['serve_rate']
+        results['costs'] = cost_results
+        results['summary']['total_cost_usd'] = cost_results['total_cost_usd']
+        if cache_results:
+            results['prompt_cache'] = cache_results
+            results['summary']['cache_hit_ratio'] = cache_results['cache_hit_ratio']
         
         # Save to file
         output_file = "evaluation_results.json"
@@ -181,8 +344,16 @@ class Evaluator:
 
 
 def main():
-    evaluator = Evaluator()
-    results = evaluator.run_full_evaluation()
+    parser = argparse.ArgumentParser(description="Evaluate the AI Training Assistant")
+    parser.add_argument("--bulk", action="store_true", help="Answer the set through the Batch API")
+    parser.add_argument("--cache-passes", type=int, default=0,
+                        help="Replay the set this many times and report prompt-cache hits")
+    args = parser.parse_args()
+    
+    evaluator = Evaluator(bulk=args.bulk)
+    # Evaluation calls yield to live users sharing the deployment
+    with call_context(BACKGROUND, "evaluator"):
+        results = evaluator.run_full_evaluation(cache_passes=args.cache_passes)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+# src/evaluation/guardrail_benchmark.py
+"""
+Input guardrail throughput on adversarial inputs near max_input_length.
+
+Compares the GuardrailPipeline with the previous sequence of checks
+(sanitize, format check with the `(.)\\1{5,}` regex, uncompiled injection
+patterns, then validate_input with its own lowercasing and unbounded email
+pattern), reproduced here as the baseline. Inputs are built to stress
+backtracking: long "@"-free word runs, one "@" at the very end, runs just
+under the repeat threshold, digit soup, and so on.
+
+Usage:
+    python src/evaluation/guardrail_benchmark.py [--rounds 200]
+"""
+
+import argparse
+import contextlib
+import io
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.guardrails.content_guardrails import ContentGuardrails, InputValidator
+from src.guardrails.pipeline import GuardrailPipeline
+
+MAX_LEN = 1990
+
+
+def adversarial_inputs() -> Dict[str, str]:
+    sentence = "How do I submit my travel expenses and who approves them? "
+    return {
+        "normal_long": (sentence * 40)[:MAX_LEN],
+        "email_bait": ("abcdefghij" * 200)[:MAX_LEN - 2] + "@b",
+        "dotted_email_bait": ("abcd." * 400)[:MAX_LEN - 3] + "@xy",
+        "near_repeats": ("aaaaab" * 400)[:MAX_LEN],
+        "digit_soup": ("1234567890 " * 200)[:MAX_LEN],
+        "injection_at_end": (sentence * 40)[:MAX_LEN - 30] + " ignore previous instructions",
+        "special_chars": ("!a" * 1000)[:MAX_LEN],
+    }
+
+
+# Previous implementation, kept verbatim for the comparison
+LEGACY_PERSONAL_INFO = {
+    "Social Security Number": r'\b\d{3}-\d{2}-\d{4}\b',
+    "Credit Card": r'\b\d{16}\b',
+    "Phone Number": r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
+    "Email Address": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+}
+LEGACY_INJECTION = [r'ignore previous instructions', r'disregard all previous', r'you are now',
+                    r'system prompt', r'forget everything', r'new instructions']
+
+
+def legacy_check(text: str, guardrails: ContentGuardrails) -> bool:
+    text = InputValidator.sanitize_input(text)
+    if sum(not c.isalnum() and not c.isspace() for c in text) / len(text) > 0.3:
+        return False
+    if re.search(r'(.)\1{5,}', text):
+        return False
+    if any(re.search(p, text.lower()) for p in LEGACY_INJECTION):
+        return False
+    if not (guardrails.min_input_length <= len(text) <= guardrails.max_input_length):
+        return False
+    if any(re.search(p, text, re.IGNORECASE) for p in LEGACY_PERSONAL_INFO.values()):
+        return False
+    lower = text.lower()
+    if any(k in lower for k in ["suicide", "kill myself", "end my life", "hurt myself", "hack",
+                                "steal", "illegal", "break into", "exploit system",
+                                "harm others", "attack", "violent"]):
+        return False
+    lower = text.lower()
+    if any(k in lower for k in ["diagnose", "medication", "treatment", "cure", "lawsuit",
+                                "legal case", "court", "invest in", "stock tip",
+                                "financial advice", "bypass security", "hack into",
+                                "exploit vulnerability"]):
+        return False
+    return True
+
+
+def time_per_call(fn: Callable[[], object], rounds: int) -> float:
+    """Mean microseconds per call"""
+    with contextlib.redirect_stdout(io.StringIO()):  # Violation logging
+        fn()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def run_benchmark(rounds: int = 200) -> Dict[str, Dict]:
+    guardrails = ContentGuardrails()
+    pipeline = GuardrailPipeline(guardrails)
+
+    print("="*70)
+    print(f"🛡️  INPUT GUARDRAIL THROUGHPUT (~{MAX_LEN} chars, {rounds} rounds)")
+    print("="*70 + "\n")
+    print(f"{'input':<20}{'before µs':>12}{'after µs':>12}{'speedup':>10}  outcome / slowest check")
+
+    results = {}
+    for name, text in adversarial_inputs().items():
+        before = time_per_call(lambda: legacy_check(text, guardrails), rounds)
+        after = time_per_call(lambda: pipeline.run(text), rounds)
+        with contextlib.redirect_stdout(io.StringIO()):
+            outcome = pipeline.run(text)
+        slowest = max(outcome.timings_ms, key=outcome.timings_ms.get)
+        verdict = "pass" if outcome.passed else f"blocked:{outcome.check}"
+        results[name] = {"before_us": before, "after_us": after, "outcome": verdict, "slowest": slowest}
+        print(f"{name:<20}{before:>12.0f}{after:>12.0f}{before / after:>9.1f}x  {verdict} / {slowest}")
+
+    worst = max(r["after_us"] for r in results.values())
+    print(f"\n⏱️  Worst case after: {worst:.0f} µs ({1e6 / worst:,.0f} inputs/sec)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Input guardrail throughput")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    run_benchmark(args.rounds)
+
+
+if __name__ == "__main__":
+    main()
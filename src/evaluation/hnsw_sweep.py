@@ -0,0 +1,172 @@
+# src/evaluation/hnsw_sweep.py
+"""
+HNSW parameter sweep: recall@k and query latency over a grid of M,
+construction_ef and search_ef.
+
+The corpus is scaled up synthetically: every generated row is a corpus
+chunk embedding plus Gaussian noise, so the index has the chunks' cluster
+structure at --rows size. Queries are the evaluation questions plus
+held-out rows generated the same way. For each (M, construction_ef) it
+builds a Chroma collection in a scratch directory, then for each
+search_ef reports recall@k against exact brute-force search in the same
+space and p50/p99 latency of single queries. Chroma applies a changed
+search_ef only when a process first loads the index, so each search_ef
+is measured in a fresh process. The route's configured setting (config.yaml
+`hnsw`) is always part of the grid and is marked in the output.
+
+Usage:
+    python src/evaluation/hnsw_sweep.py [--rows 100000] [--route admin_policy]
+        [--M 8 16 32] [--construction-ef 64 100 200] [--search-ef 10 25 50 100 200]
+"""
+
+import argparse
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.retrieval.embeddings import create_embedding_provider
+from src.evaluation.index_benchmark import corpus_chunks
+from src.evaluation.retrieval_benchmark import load_eval_questions
+
+
+def synthetic_corpus(seeds: np.ndarray, rows: int, noise: float, rng) -> np.ndarray:
+    """`rows` unit vectors scattered around the seed vectors"""
+    picks = seeds[rng.integers(len(seeds), size=rows)]
+    vectors = picks + noise * rng.standard_normal(picks.shape, dtype=np.float32) / np.sqrt(seeds.shape[1])
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int, space: str) -> List[set]:
+    """Brute-force top k row ids per query, in Chroma's distance for `space`"""
+    similarity = queries @ vectors.T
+    if space == "l2":
+        # Squared L2; the row norms matter when vectors are not unit length
+        distances = np.einsum("ij,ij->i", vectors, vectors) - 2 * similarity
+    elif space == "cosine":
+        distances = -similarity / np.linalg.norm(vectors, axis=1)
+    else:
+        distances = -similarity
+    top = np.argpartition(distances, k, axis=1)[:, :k]
+    return [set(row.tolist()) for row in top]
+
+
+def percentile(values: List[float], q: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(q * len(values)))]
+
+
+def build_collection(client, vectors: np.ndarray, space: str, m: int, construction_ef: int):
+    collection = client.create_collection(
+        f"hnsw-sweep-{uuid.uuid4().hex[:8]}",
+        metadata={"hnsw:space": space, "hnsw:M": m, "hnsw:construction_ef": construction_ef},
+        embedding_function=None
+    )
+    batch = client.get_max_batch_size()
+    for start in range(0, len(vectors), batch):
+        collection.add(
+            ids=[str(i) for i in range(start, min(start + batch, len(vectors)))],
+            embeddings=vectors[start:start + batch]
+        )
+    return collection
+
+
+def measure(path: str, name: str, queries: np.ndarray, truth: List[set], k: int) -> Dict:
+    """Query latency and recall@k of a stored collection, loaded fresh"""
+    import chromadb
+
+    collection = chromadb.PersistentClient(path=path).get_collection(name, embedding_function=None)
+    collection.query(query_embeddings=queries[:1], n_results=k, include=[])  # loads the index
+
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=query[None, :], n_results=k, include=[])
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(expected & {int(i) for i in result["ids"][0]}) / k)
+    return {
+        "recall": statistics.mean(recalls) * 100,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+
+def run_sweep(rows: int, route: str, m_values: List[int], construction_efs: List[int], search_efs: List[int],
+              space: str = None, k: int = None, held_out: int = 200, noise: float = 0.5, seed: int = 0) -> Dict:
+    import chromadb
+
+    k = k or config.TOP_K
+    configured = config.hnsw_params(route)
+    space = space or configured["space"]
+    m_values = sorted(set(m_values) | {configured["M"]})
+    construction_efs = sorted(set(construction_efs) | {configured["construction_ef"]})
+    search_efs = sorted(set(search_efs) | {configured["search_ef"]})
+    rng = np.random.default_rng(seed)
+
+    embeddings = create_embedding_provider()
+    seeds = np.asarray(embeddings.embed_documents([c.page_content for c in corpus_chunks()]), dtype=np.float32)
+    seeds /= np.linalg.norm(seeds, axis=1, keepdims=True)
+    vectors = synthetic_corpus(seeds, rows, noise, rng)
+    questions = np.asarray(embeddings.embed_documents([r["question"] for r in load_eval_questions()]),
+                           dtype=np.float32)
+    queries = np.concatenate([questions / np.linalg.norm(questions, axis=1, keepdims=True),
+                              synthetic_corpus(seeds, held_out, noise, rng)])
+    truth = exact_neighbours(vectors, queries, k, space)
+
+    print("="*70)
+    print(f"🕸️  HNSW SWEEP ({rows:,} rows x {vectors.shape[1]} dims from {len(seeds)} chunks, "
+          f"{len(queries)} queries, k={k}, space={space})")
+    print(f"   Configured for {route}: M={configured['M']}, construction_ef={configured['construction_ef']}, "
+          f"search_ef={configured['search_ef']} (*)")
+    print("="*70 + "\n")
+    print(f"{'M':>4} {'cons_ef':>8} {'build_s':>8} {'search_ef':>10} {'recall@' + str(k):>10} {'p50_ms':>8} {'p99_ms':>8}")
+
+    scratch = tempfile.TemporaryDirectory()
+    client = chromadb.PersistentClient(path=scratch.name)
+    results = []
+    for m in m_values:
+        for construction_ef in construction_efs:
+            start = time.perf_counter()
+            collection = build_collection(client, vectors, space, m, construction_ef)
+            build_s = time.perf_counter() - start
+            for search_ef in search_efs:
+                collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+                with multiprocessing.get_context("spawn").Pool(1) as pool:
+                    measured = pool.apply(measure, (scratch.name, collection.name, queries, truth, k))
+                point = {"M": m, "construction_ef": construction_ef, "search_ef": search_ef, "build_s": build_s,
+                         **measured}
+                results.append(point)
+                is_configured = (m, construction_ef, search_ef) == (
+                    configured["M"], configured["construction_ef"], configured["search_ef"])
+                print(f"{m:>4} {construction_ef:>8} {build_s:>8.1f} {search_ef:>10} {point['recall']:>9.1f}% "
+                      f"{point['p50_ms']:>8.2f} {point['p99_ms']:>8.2f}" + (" *" if is_configured else ""))
+            client.delete_collection(collection.name)
+    scratch.cleanup()
+    return {"space": space, "rows": rows, "k": k, "configured": configured, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HNSW recall/latency sweep")
+    parser.add_argument("--rows", type=int, default=100000, help="Synthetic corpus size")
+    parser.add_argument("--route", default="admin_policy", choices=config.ROUTES[:-1],
+                        help="Route whose configured setting is marked")
+    parser.add_argument("--space", choices=config.HNSW_SPACES, default=None)
+    parser.add_argument("--M", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[64, 100, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 25, 50, 100, 200])
+    parser.add_argument("--k", type=int, default=None)
+    parser.add_argument("--noise", type=float, default=0.5, help="Spread of synthetic rows around each chunk")
+    args = parser.parse_args()
+    run_sweep(args.rows, args.route, args.M, args.construction_ef, args.search_ef,
+              space=args.space, k=args.k, noise=args.noise)
+
+
+if __name__ == "__main__":
+    main()
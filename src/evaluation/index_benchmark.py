@@ -0,0 +1,187 @@
+# src/evaluation/index_benchmark.py
+"""
+Vector index size and speed: shortened and quantized embeddings against
+full-precision vectors.
+
+Embeds the corpus chunks and the evaluation questions once per embedding
+width, pads the index with random unit vectors to a realistic size, then
+for each storage mode (full-precision scan, int8 or binary codes with
+full-precision rescoring) reports:
+
+- index size on disk, and how much of it is held in memory
+- resident memory after loading the index and running the queries
+- p50 query latency (search only; query embeddings are computed up front)
+- recall@k against the full-width, full-precision baseline, and the
+  gold_source hit rate of the real chunks
+
+Shortened widths need a provider that supports them (openai
+text-embedding-3-*, or hashing).
+
+Usage:
+    python src/evaluation/index_benchmark.py [--dimensions 0 512 256] [--distractors 50000]
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.retrieval.chunking import MarkdownSectionSplitter
+from src.retrieval.dedup import deduplicate_chunks
+from src.retrieval.embeddings import (
+    HashingEmbeddingProvider, OpenAIEmbeddingProvider, create_embedding_provider
+)
+from src.retrieval.quantized_index import QUANTIZATIONS, QuantizedIndex
+from src.retrieval.vector_store import load_manifest
+from src.evaluation.retrieval_benchmark import load_eval_questions
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process (0 where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def corpus_chunks() -> List:
+    """The chunks VectorStore.load_corpus stores, across every RAG route"""
+    from langchain_core.documents import Document
+
+    splitter = MarkdownSectionSplitter(chunk_size=config.CHUNK_SIZE)
+    chunks = []
+    for route, route_info in load_manifest()["routes"].items():
+        docs = []
+        for path_str in route_info.get("suggested_paths", []):
+            folder = config.CORPUS_DIR / path_str.replace("corpus/", "")
+            for path in sorted(folder.glob("*.md")):
+                docs.append(Document(page_content=path.read_text(encoding="utf-8"),
+                                     metadata={"route": route, "source_file": path.name}))
+        chunks.extend(deduplicate_chunks(splitter.split_documents(docs), config.DEDUP_THRESHOLD))
+    return chunks
+
+
+def provider_for(dimensions: int):
+    """The configured provider, shortened to `dimensions` (0 = full width)"""
+    provider = create_embedding_provider()
+    if not dimensions:
+        return provider
+    if isinstance(provider, OpenAIEmbeddingProvider):
+        return OpenAIEmbeddingProvider(dimensions=dimensions)
+    if isinstance(provider, HashingEmbeddingProvider):
+        return HashingEmbeddingProvider(dimension=dimensions)
+    return None
+
+
+def measure(path: Path, provider_name: str, quantization: str, queries: np.ndarray, k: int) -> Dict:
+    """
+    Load the index, run every query, and time the searches
+
+    Runs in a fresh process so the resident-memory growth is the index's own.
+    """
+    # Searching takes vectors, so only the provider name is needed for the load check
+    index = QuantizedIndex(path, SimpleNamespace(name=provider_name), quantization)
+    from langchain_core.documents import Document  # imported by load, not part of the index
+    rss_before = rss_bytes()
+    index.load()
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows, _ = index.search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(rows.tolist())
+    sizes = index.size_bytes()
+    return {
+        "rows": results,
+        "disk_mb": sum(sizes.values()) / 1e6,
+        # Quantized indexes only read candidate rows of the full-precision vectors
+        "in_memory_mb": sum(size for name, size in sizes.items()
+                            if quantization == "none" or name != "vectors.npy") / 1e6,
+        "rss_delta_mb": (rss_bytes() - rss_before) / 1e6,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+def run_benchmark(dimensions: List[int], quantizations: List[str], distractors: int, k: int = None) -> Dict:
+    k = k or config.TOP_K
+    chunks = corpus_chunks()
+    rows = load_eval_questions()
+    questions = [row["question"] for row in rows]
+    rng = np.random.default_rng(0)
+
+    print("="*70)
+    print(f"🗜️  INDEX BENCHMARK ({len(chunks)} chunks + {distractors:,} distractors, "
+          f"{len(questions)} questions, k={k})")
+    print("="*70 + "\n")
+
+    results, baseline = {}, None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for width in dimensions:
+            embeddings = provider_for(width)
+            if embeddings is None:
+                print(f"⚠️  {create_embedding_provider().name} cannot shorten to {width} dimensions, skipped\n")
+                continue
+            chunk_vectors = np.asarray(embeddings.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+            query_vectors = np.asarray(embeddings.embed_documents(questions), dtype=np.float32)
+            padding = rng.standard_normal((distractors, chunk_vectors.shape[1]), dtype=np.float32)
+            vectors = np.concatenate([chunk_vectors, padding])
+            documents = chunks + [type(chunks[0])(page_content="", metadata={"source_file": ""})] * distractors
+
+            for quantization in quantizations:
+                name = f"{embeddings.name}/{quantization}"
+                index = QuantizedIndex(Path(tmp_dir) / name.replace(":", "_").replace("/", "_"),
+                                       embeddings, quantization)
+                index.build_from_vectors(documents, vectors)
+                with multiprocessing.get_context("spawn").Pool(1) as pool:
+                    result = pool.apply(measure, (index.path, embeddings.name, quantization, query_vectors, k))
+                if baseline is None:
+                    baseline = result["rows"]  # the first width, unquantized
+
+                result["recall_at_k"] = statistics.mean(
+                    len(set(found) & set(expected)) / len(expected)
+                    for found, expected in zip(result["rows"], baseline)
+                ) * 100
+                result["gold_source_hit"] = statistics.mean(
+                    any(i < len(chunks) and chunks[i].metadata["source_file"] == Path(row["gold_source"]).name
+                        for i in found)
+                    for found, row in zip(result["rows"], rows)
+                ) * 100
+                del result["rows"], index
+                results[name] = result
+
+                print(f"📊 {name}")
+                print(f"   Disk / in memory:   {result['disk_mb']:.1f} / {result['in_memory_mb']:.1f} MB")
+                print(f"   RSS growth:         {result['rss_delta_mb']:.1f} MB")
+                print(f"   Latency p50 / p95:  {result['p50_ms']:.2f} / {result['p95_ms']:.2f} ms")
+                print(f"   recall@{k}:           {result['recall_at_k']:.1f}%")
+                print(f"   gold_source hit:    {result['gold_source_hit']:.1f}%\n")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shortened and quantized embedding index benchmark")
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[0, 512, 256],
+                        help="Embedding widths; the first is the baseline (0 = full width)")
+    parser.add_argument("--quantizations", nargs="+", default=list(QUANTIZATIONS), choices=QUANTIZATIONS,
+                        help="Storage modes; 'none' first so the baseline is full precision")
+    parser.add_argument("--distractors", type=int, default=50000,
+                        help="Random vectors added to grow the index")
+    parser.add_argument("--k", type=int, default=None)
+    args = parser.parse_args()
+    run_benchmark(args.dimensions, args.quantizations, args.distractors, args.k)
+
+
+if __name__ == "__main__":
+    main()
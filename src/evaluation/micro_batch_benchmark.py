@@ -0,0 +1,130 @@
+# src/evaluation/micro_batch_benchmark.py
+"""
+Query-embedding throughput with and without micro-batching.
+
+Simulates concurrent users who each embed distinct questions back to back
+through OpenAIEmbeddingProvider.embed_query, against the local mock
+OpenAI server. Runs once with the MicroBatcher disabled and once with it
+enabled, and reports upstream requests, queries/sec and per-query latency.
+The shared requests-per-minute limit stands in for the account's rate
+limit, which is what makes one request per query expensive.
+
+Usage:
+    python src/evaluation/micro_batch_benchmark.py [--users 64] [--latency-ms 50] [--rpm 3000]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.evaluation.mock_openai_server import MockOpenAIServer
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def embedding_requests(server: MockOpenAIServer) -> int:
+    return sum(n for path, n in server.state.requests.items() if path.endswith("/embeddings"))
+
+
+def run_load(provider, questions: List[str], users: int, queries_per_user: int) -> Dict:
+    latencies = []
+    lock = threading.Lock()
+
+    def user(u):
+        for q in range(queries_per_user):
+            # Distinct per user, so single-flight coalescing does not kick in
+            text = f"{questions[(u + q) % len(questions)]} (user {u}, query {q})"
+            start = time.perf_counter()
+            provider.embed_query(text)
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(u,)) for u in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "queries_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def run_benchmark(
+    users: int = 64,
+    queries_per_user: int = 10,
+    latency_ms: float = 50.0,
+    requests_per_minute: float = 3000,
+    batch_size: int = 32,
+    wait_ms: float = 5.0
+) -> Dict[str, Dict]:
+    server = MockOpenAIServer(latency_ms=latency_ms).start()
+    # Must be set before the config secrets and the OpenAI client are first read
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["OPENAI_API_KEY"] = "mock"
+
+    from src.utils.config import config
+    from src.utils.clients import configure_scheduler
+    from src.retrieval.embeddings import OpenAIEmbeddingProvider
+    from src.retrieval.micro_batcher import MicroBatcher
+
+    configure_scheduler(requests_per_minute)
+    with open(config.EVAL_SET_PATH, newline='', encoding='utf-8') as f:
+        questions = [row['question'] for row in csv.DictReader(f)]
+
+    print("="*70)
+    print(f"🧺 QUERY EMBEDDING MICRO-BATCHING ({users} users × {queries_per_user} queries, "
+          f"mock latency {latency_ms:.0f} ms, {requests_per_minute:.0f} rpm)")
+    print("="*70 + "\n")
+    print(f"{'mode':<12}{'requests':>10}{'queries/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+
+    results = {}
+    try:
+        for mode in ("single", "batched"):
+            provider = OpenAIEmbeddingProvider()
+            provider.query_batcher = (
+                MicroBatcher(provider._embed_batch, max_batch_size=batch_size, max_wait_ms=wait_ms)
+                if mode == "batched" else None
+            )
+            before = embedding_requests(server)
+            result = run_load(provider, questions, users, queries_per_user)
+            result["requests"] = embedding_requests(server) - before
+            results[mode] = result
+            print(f"{mode:<12}{result['requests']:>10}{result['queries_per_sec']:>12.1f}"
+                  f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+    finally:
+        server.stop()
+
+    single, batched = results["single"], results["batched"]
+    print(f"\n📉 Upstream requests: {single['requests']} → {batched['requests']}; "
+          f"throughput {batched['queries_per_sec'] / single['queries_per_sec']:.1f}x")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query embedding micro-batching")
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=10, help="Queries per user")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--rpm", type=float, default=3000, help="Shared requests/min limit (0 = off)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    run_benchmark(args.users, args.queries, args.latency_ms, args.rpm, args.batch_size, args.wait_ms)
+
+
+if __name__ == "__main__":
+    main()
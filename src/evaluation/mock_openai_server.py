@@ -0,0 +1,538 @@
+# src/evaluation/mock_openai_server.py
+"""
+Local stand-in for the OpenAI API, used by benchmarks and tests.
+
+Serves /v1/chat/completions and /v1/embeddings with a configurable latency
+so throughput can be measured without network access or cost. Router
+prompts get a keyword-based route back, structured-output (json_schema)
+requests get a route / answer / sources JSON object (FAQ pairs for
+FAQ-build prompts), and other chat requests get a canned answer.
+Embeddings are deterministic per input text.
+
+Faults can be injected for resilience testing: queue specific failures with
+`state.inject(status=500)` / `state.inject(hang_s=5)`, or set random
+`error_rate` / `hang_rate` for soak runs.
+
+Chat completions report `usage.prompt_tokens_details.cached_tokens` from a
+simulated prompt-prefix cache that follows the API's rules (prefixes of
+1024+ tokens, reused in 128-token blocks).
+
+Rate limits can be enforced like the real API: set `requests_per_minute`
+and/or `tokens_per_minute` (prompt estimate plus max_tokens) and calls over
+budget get a 429 `rate_limit_exceeded`; `state.rate_limited` counts them.
+
+/v1/files and /v1/batches mimic the Batch API: an uploaded JSONL file of
+requests is processed in the background after `batch_latency_ms` and the
+results are written to an output file that can be downloaded.
+
+Usage:
+    python src/evaluation/mock_openai_server.py --port 8765 --latency-ms 200
+
+Point the assistant at it with:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+ROUTE_KEYWORDS = {
+    "role_specific": ["analyst", "product manager", "role", "responsibilit"],
+    "admin_policy": ["expense", "leave", "pto", "timesheet", "travel", "it ", "access",
+                     "password", "laptop", "reimburse", "policy", "hr"],
+    "general_company": ["company", "values", "mission", "work hours", "culture", "tools"],
+}
+
+
+def mock_route(text: str) -> str:
+    """Keyword-based stand-in for the router model"""
+    lowered = text.lower()
+    for route, keywords in ROUTE_KEYWORDS.items():
+        if any(keyword in lowered for keyword in keywords):
+            return route
+    return "direct_llm"
+
+
+def mock_embedding(text: str, dimensions: int) -> List[float]:
+    """Deterministic unit vector derived from the text"""
+    seed = hashlib.sha256(text.encode("utf-8")).digest()
+    values = []
+    counter = 0
+    while len(values) < dimensions:
+        block = hashlib.sha256(seed + counter.to_bytes(4, "big")).digest()
+        values.extend((b - 127.5) / 127.5 for b in block)
+        counter += 1
+    values = values[:dimensions]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def mock_routed_answer(prompt: str) -> Dict:
+    """Structured route + answer + sources reply for single-call prompts"""
+    question = prompt.rsplit("Question:", 1)[-1].strip()
+    route = mock_route(question)
+    if route == "direct_llm":
+        return {"route": route, "answer": "I can only help with company-related questions.", "sources": []}
+    # Cite the files whose previews were shown for the chosen route
+    sources = re.findall(r"^\[%s\] (.+)$" % route, prompt, re.MULTILINE)
+    return {
+        "route": route,
+        "answer": ("Here is what the onboarding documents say: please follow the "
+                   "documented process and contact your manager or HR for exceptions."),
+        "sources": list(dict.fromkeys(s for line in sources for s in line.split(", "))),
+    }
+
+
+def mock_section_faq(prompt: str) -> Dict:
+    """Structured FAQ pairs for an FAQ-build prompt, one per section heading"""
+    match = re.search(r"^Section: (.+)$", prompt, re.MULTILINE)
+    title = match.group(1).split(" > ")[-1] if match else "this topic"
+    return {"pairs": [{
+        "question": f"What should I know about {title.lower()}?",
+        "answer": f"The {title} section of the onboarding documents covers this.",
+    }]}
+
+
+def mock_chat_completion(body: Dict, cached_tokens: int = 0) -> Dict:
+    messages = body.get("messages", [])
+    prompt_text = " ".join(str(m.get("content", "")) for m in messages)
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+
+    if "query classification" in system:
+        content = mock_route(messages[-1]["content"])
+    elif (body.get("response_format") or {}).get("type") == "json_schema":
+        schema_name = body["response_format"].get("json_schema", {}).get("name")
+        reply = mock_section_faq if schema_name == "section_faq" else mock_routed_answer
+        content = json.dumps(reply(messages[-1]["content"]))
+    else:
+        content = ("Here is what the onboarding documents say: please follow the "
+                   "documented process and contact your manager or HR for exceptions.")
+
+    prompt_tokens = approx_tokens(prompt_text)
+    completion_tokens = approx_tokens(content)
+    return {
+        "id": f"chatcmpl-mock-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": min(cached_tokens, prompt_tokens)},
+        },
+    }
+
+
+def mock_embeddings(body: Dict) -> Dict:
+    inputs = body.get("input", [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    dimensions = int(body.get("dimensions") or 1536)
+    return {
+        "object": "list",
+        "model": body.get("model", "mock"),
+        "data": [
+            {"object": "embedding", "index": i, "embedding": mock_embedding(text, dimensions)}
+            for i, text in enumerate(inputs)
+        ],
+        "usage": {
+            "prompt_tokens": sum(approx_tokens(t) for t in inputs),
+            "total_tokens": sum(approx_tokens(t) for t in inputs),
+        },
+    }
+
+
+BATCH_ENDPOINTS = {
+    "/v1/chat/completions": mock_chat_completion,
+    "/v1/embeddings": mock_embeddings,
+}
+
+
+class MockOpenAIState:
+    """Counters and knobs shared by all request handlers"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        batch_latency_ms: float = 500.0,
+        error_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        hang_s: float = 30.0
+    ):
+        self.latency_ms = latency_ms
+        self.batch_latency_ms = batch_latency_ms
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_s = hang_s
+        # Extra delay per prompt token, to model prefill cost
+        self.prompt_token_latency_ms = 0.0
+        # Prompt-prefix cache: like the real API, prefixes of at least
+        # cache_min_tokens are reused in cache_block_tokens increments
+        self.cache_min_tokens = 1024
+        self.cache_block_tokens = 128
+        self.cache_size = 10000
+        self._prefix_cache = OrderedDict()
+        # Enforced limits (0 = unlimited), as token buckets holding one second of budget
+        self.requests_per_minute = 0.0
+        self.tokens_per_minute = 0.0
+        self.rate_limited = 0
+        self._budget = {}
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.faults = deque()
+        self.files: Dict[str, Dict] = {}
+        self.batches: Dict[str, Dict] = {}
+        self._ids = itertools.count(1)
+
+    def count(self, path: str):
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def cached_tokens(self, messages: List[Dict]) -> int:
+        """Prompt tokens served from the prefix cache, and remember this prompt's prefixes"""
+        text = "".join(f"<{m.get('role')}>{m.get('content', '')}" for m in messages)
+        block_chars = self.cache_block_tokens * 4  # approx_tokens: four characters per token
+        blocks = len(text) // block_chars
+        cached = 0
+        with self.lock:
+            for n in range(1, blocks + 1):
+                key = hashlib.blake2b(text[:n * block_chars].encode("utf-8"), digest_size=16).digest()
+                if key in self._prefix_cache:
+                    self._prefix_cache.move_to_end(key)
+                    if cached == (n - 1) * self.cache_block_tokens:
+                        cached = n * self.cache_block_tokens
+                else:
+                    self._prefix_cache[key] = True
+                    if len(self._prefix_cache) > self.cache_size:
+                        self._prefix_cache.popitem(last=False)
+        return cached if cached >= self.cache_min_tokens else 0
+
+    def admit(self, body: Dict) -> bool:
+        """Charge a call against the rate limits; False if it is over budget"""
+        tokens = approx_tokens(json.dumps(body.get("messages") or body.get("input") or ""))
+        tokens += int(body.get("max_tokens") or body.get("max_completion_tokens") or 0)
+        charges = [(name, per_minute, amount) for name, per_minute, amount in (
+            ("requests", self.requests_per_minute, 1), ("tokens", self.tokens_per_minute, tokens)
+        ) if per_minute]
+        now = time.monotonic()
+        with self.lock:
+            levels = {}
+            for name, per_minute, amount in charges:
+                rate = per_minute / 60.0
+                capacity = max(1.0, rate)
+                level, updated = self._budget.get(name, (capacity, now))
+                levels[name] = min(capacity, level + (now - updated) * rate)
+                if levels[name] < min(amount, capacity):
+                    self._budget[name] = (levels[name], now)
+                    self.rate_limited += 1
+                    return False
+            for name, _, amount in charges:
+                self._budget[name] = (levels[name] - amount, now)
+        return True
+
+    def inject(self, status: int = None, hang_s: float = None, count: int = 1):
+        """Make the next `count` API calls fail with `status` or hang for `hang_s`"""
+        with self.lock:
+            for _ in range(count):
+                self.faults.append({"status": status, "hang_s": hang_s})
+
+    def next_fault(self) -> Optional[Dict]:
+        with self.lock:
+            if self.faults:
+                return self.faults.popleft()
+        if self.hang_rate and random.random() < self.hang_rate:
+            return {"status": None, "hang_s": self.hang_s}
+        if self.error_rate and random.random() < self.error_rate:
+            return {"status": random.choice([429, 500, 503]), "hang_s": None}
+        return None
+
+    def add_file(self, filename: str, purpose: str, content: bytes) -> Dict:
+        with self.lock:
+            file_id = f"file-mock-{next(self._ids)}"
+            self.files[file_id] = {
+                "id": file_id,
+                "object": "file",
+                "bytes": len(content),
+                "created_at": int(time.time()),
+                "filename": filename,
+                "purpose": purpose,
+                "content": content,
+            }
+        return self.files[file_id]
+
+    def create_batch(self, input_file_id: str, endpoint: str, completion_window: str) -> Dict:
+        with self.lock:
+            batch_id = f"batch_mock_{next(self._ids)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": endpoint,
+                "errors": None,
+                "input_file_id": input_file_id,
+                "completion_window": completion_window,
+                "status": "in_progress",
+                "output_file_id": None,
+                "error_file_id": None,
+                "created_at": int(time.time()),
+                "completed_at": None,
+                "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            }
+        threading.Thread(target=self._run_batch, args=(batch_id,), daemon=True).start()
+        return self.batches[batch_id]
+
+    def _run_batch(self, batch_id: str):
+        """Execute every request line of a batch and store output/error files"""
+        time.sleep(self.batch_latency_ms / 1000)
+        batch = self.batches[batch_id]
+        lines = self.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+
+        outputs, errors = [], []
+        for n, line in enumerate(lines):
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            handler = BATCH_ENDPOINTS.get(request.get("url"))
+            record = {"id": f"batch_req_{n}", "custom_id": request.get("custom_id")}
+            if handler is None or request.get("url") != batch["endpoint"]:
+                record.update(response=None, error={
+                    "code": "invalid_url", "message": f"Unsupported url {request.get('url')}"
+                })
+                errors.append(record)
+            else:
+                record.update(error=None, response={
+                    "status_code": 200,
+                    "request_id": f"req_mock_{n}",
+                    "body": handler(request.get("body", {})),
+                })
+                outputs.append(record)
+
+        def to_bytes(records):
+            return "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+
+        output_file = self.add_file(f"{batch_id}_output.jsonl", "batch_output", to_bytes(outputs))
+        error_file = self.add_file(f"{batch_id}_error.jsonl", "batch_output", to_bytes(errors)) if errors else None
+        with self.lock:
+            batch.update(
+                status="completed",
+                output_file_id=output_file["id"],
+                error_file_id=error_file["id"] if error_file else None,
+                completed_at=int(time.time()),
+                request_counts={
+                    "total": len(outputs) + len(errors),
+                    "completed": len(outputs),
+                    "failed": len(errors),
+                },
+            )
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    server_version = "MockOpenAI/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> MockOpenAIState:
+        return self.server.state
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _read_multipart(self) -> Dict:
+        """Parse a multipart/form-data upload into {field: (filename, bytes)}"""
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + raw
+        )
+        return {
+            part.get_param("name", header="content-disposition"):
+                (part.get_filename(), part.get_payload(decode=True))
+            for part in message.iter_parts()
+        }
+
+    def _public_file(self, record: Dict) -> Dict:
+        return {k: v for k, v in record.items() if k != "content"}
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        self.state.count(path)
+
+        if path.endswith("/files"):
+            fields = self._read_multipart()
+            filename, content = fields.get("file", ("upload.jsonl", b""))
+            purpose = (fields.get("purpose") or (None, b"batch"))[1].decode("utf-8")
+            self._send_json(200, self._public_file(self.state.add_file(filename, purpose, content)))
+            return
+
+        body = self._read_json()
+        if path.endswith("/batches"):
+            if body.get("input_file_id") not in self.state.files:
+                self._send_json(404, {"error": {"message": "Unknown input_file_id"}})
+                return
+            self._send_json(200, self.state.create_batch(
+                body["input_file_id"], body.get("endpoint", "/v1/chat/completions"),
+                body.get("completion_window", "24h")
+            ))
+            return
+
+        fault = self.state.next_fault()
+        if fault and fault["hang_s"]:
+            time.sleep(fault["hang_s"])
+        if fault and fault["status"]:
+            self._send_json(fault["status"], {"error": {
+                "message": "Injected fault", "type": "server_error", "code": fault["status"]
+            }})
+            return
+
+        if not self.state.admit(body):
+            self._send_json(429, {"error": {
+                "message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"
+            }})
+            return
+
+        is_chat = path.endswith("/chat/completions")
+        cached = self.state.cached_tokens(body.get("messages", [])) if is_chat else 0
+        delay_ms = self.state.latency_ms
+        if self.state.prompt_token_latency_ms:
+            prompt_text = json.dumps(body.get("messages") or body.get("input") or "")
+            # Cached prefix tokens skip prefill
+            delay_ms += self.state.prompt_token_latency_ms * max(0, approx_tokens(prompt_text) - cached)
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+
+        if is_chat:
+            self._send_json(200, mock_chat_completion(body, cached))
+        elif path.endswith("/embeddings"):
+            self._send_json(200, mock_embeddings(body))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        self.state.count(path)
+        parts = path.rstrip("/").split("/")
+
+        if len(parts) >= 2 and parts[-2] == "batches" and parts[-1] in self.state.batches:
+            self._send_json(200, self.state.batches[parts[-1]])
+        elif len(parts) >= 3 and parts[-1] == "content" and parts[-2] in self.state.files:
+            content = self.state.files[parts[-2]]["content"]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        elif len(parts) >= 2 and parts[-2] == "files" and parts[-1] in self.state.files:
+            self._send_json(200, self._public_file(self.state.files[parts[-1]]))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    # Benchmarks open dozens of connections at once; the default listen
+    # backlog of 5 refuses some of them
+    request_queue_size = 256
+
+
+class MockOpenAIServer:
+    """Runs the mock API on a background thread"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        batch_latency_ms: float = 500.0,
+        error_rate: float = 0.0,
+        hang_rate: float = 0.0
+    ):
+        self.httpd = _MockHTTPServer((host, port), MockOpenAIHandler)
+        self.httpd.daemon_threads = True
+        # Clients that time out on a hung call close the socket; that is expected
+        self.httpd.handle_error = lambda request, client_address: None
+        self.httpd.state = MockOpenAIState(latency_ms, batch_latency_ms, error_rate, hang_rate)
+        self._thread = None
+
+    @property
+    def state(self) -> MockOpenAIState:
+        return self.httpd.state
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--batch-latency-ms", type=float, default=500.0,
+                        help="Delay before a submitted batch completes")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls that return 429/5xx")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of calls that hang for 30s")
+    parser.add_argument("--rpm", type=float, default=0.0, help="Enforced requests per minute (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=0.0, help="Enforced tokens per minute (0 = unlimited)")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(
+        args.host, args.port, args.latency_ms, args.batch_latency_ms,
+        args.error_rate, args.hang_rate
+    )
+    server.state.requests_per_minute = args.rpm
+    server.state.tokens_per_minute = args.tpm
+    print(f"🧪 Mock OpenAI API listening on {server.base_url} (latency {args.latency_ms} ms)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
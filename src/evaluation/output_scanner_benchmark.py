@@ -0,0 +1,118 @@
+# src/evaluation/output_scanner_benchmark.py
+"""
+Streaming output guardrail latency.
+
+Generates long answers with phone numbers, SSNs, card numbers and long
+digit runs sprinkled in, splits them into token-sized chunks and feeds
+them through StreamingOutputScanner. Reports the per-chunk cost (what a
+streamed answer pays before each chunk can be shown), the time to
+sanitize the whole answer at the end for comparison, how many characters
+were held back at most, and checks both produce identical text.
+
+Usage:
+    python src/evaluation/output_scanner_benchmark.py [--answers 50] [--words 800]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.guardrails.content_guardrails import ContentGuardrails
+from src.guardrails.streaming import StreamingOutputScanner
+
+WORDS = ("the policy requires employees to submit receipts within thirty days and "
+         "managers approve requests through the portal before finance reimburses").split()
+
+
+def fake_pii(rng: random.Random) -> str:
+    return rng.choice([
+        f"{rng.randint(100, 999)}-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        f"{rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(1000, 9999)}",
+        "".join(rng.choice("0123456789") for _ in range(16)),
+        "".join(rng.choice("0123456789-.") for _ in range(rng.randint(20, 80))),
+        f"v{rng.randint(1, 9)}.{rng.randint(0, 9)}",
+    ])
+
+
+def make_answer(rng: random.Random, words: int) -> str:
+    parts = [fake_pii(rng) if rng.random() < 0.03 else rng.choice(WORDS) for _ in range(words)]
+    return " ".join(parts) + "."
+
+
+def token_chunks(text: str, rng: random.Random) -> List[str]:
+    """Roughly token-sized pieces (2-6 characters)"""
+    chunks, pos = [], 0
+    while pos < len(text):
+        size = rng.randint(2, 6)
+        chunks.append(text[pos:pos + size])
+        pos += size
+    return chunks
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_benchmark(answers: int = 50, words: int = 800, seed: int = 0) -> Dict:
+    rng = random.Random(seed)
+    guardrails = ContentGuardrails()
+    chunk_us, full_us, held = [], [], 0
+    mismatches = 0
+
+    for _ in range(answers):
+        answer = make_answer(rng, words)
+        chunks = token_chunks(answer, rng)
+
+        scanner = StreamingOutputScanner()
+        pieces = []
+        for chunk in chunks:
+            start = time.perf_counter()
+            pieces.append(scanner.feed(chunk))
+            chunk_us.append((time.perf_counter() - start) * 1e6)
+            held = max(held, len(scanner._buffer))
+        pieces.append(scanner.finish())
+
+        start = time.perf_counter()
+        expected = guardrails.sanitize_output(answer)
+        full_us.append((time.perf_counter() - start) * 1e6)
+        mismatches += "".join(pieces) != expected
+
+    results = {
+        "chunks": len(chunk_us),
+        "chunk_p50_us": percentile(chunk_us, 50),
+        "chunk_p99_us": percentile(chunk_us, 99),
+        "chunk_max_us": max(chunk_us),
+        "full_mean_us": statistics.mean(full_us),
+        "max_held_chars": held,
+        "mismatches": mismatches,
+    }
+
+    print("="*70)
+    print(f"🛡️  STREAMING OUTPUT GUARDRAILS ({answers} answers × {words} words)")
+    print("="*70 + "\n")
+    print(f"Chunks scanned:          {results['chunks']:,}")
+    print(f"Per chunk p50 / p99:     {results['chunk_p50_us']:.1f} / {results['chunk_p99_us']:.1f} µs")
+    print(f"Per chunk max:           {results['chunk_max_us']:.1f} µs")
+    print(f"Whole-answer sanitize:   {results['full_mean_us']:.1f} µs (only possible after the last token)")
+    print(f"Max characters held:     {results['max_held_chars']}")
+    print(f"Output mismatches:       {results['mismatches']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming output guardrail latency")
+    parser.add_argument("--answers", type=int, default=50)
+    parser.add_argument("--words", type=int, default=800)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run_benchmark(args.answers, args.words, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# src/evaluation/retrieval_benchmark.py
+"""
+Retrieval benchmark over data/evaluation_set.csv.
+
+For every question with a gold source it retrieves from the expected route
+and reports context tokens per answer, gold_source recall and section-level
+gold_citation recall, comparing the plain top-k similarity search with the
+deduplicated/MMR query path. It also compares the fixed-size and Markdown
+chunkers on chunk count and embedding tokens at ingestion, and, with
+--rerankers, the rerank stage: query latency (retrieval + rerank), context
+tokens and recall per reranker, with a second pass for the score cache.
+
+Usage:
+    python src/evaluation/retrieval_benchmark.py [--rerankers lexical onnx]
+"""
+
+import argparse
+import csv
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.retrieval.vector_store import VectorStore
+from src.retrieval.reranker import create_reranker
+from src.retrieval.dedup import document_sources
+from src.retrieval.chunking import document_citations
+from src.prompts.builder import count_tokens
+
+
+def load_eval_questions() -> List[Dict]:
+    """Evaluation rows that have a retrieval route and a gold source"""
+    with open(config.EVAL_SET_PATH, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    return [
+        row for row in rows
+        if row.get('expected_route') not in (None, '', 'direct_llm') and row.get('gold_source')
+    ]
+
+
+def parse_gold_citations(gold_citation: str) -> List[str]:
+    """
+    Normalize gold citations to `file.md#Section`
+
+    Handles shorthand such as `file.md#A; #B`, where later entries reuse the
+    previous file, and plain paths without a section.
+    """
+    citations = []
+    current_file = ""
+    for part in (gold_citation or "").split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        file_part, _, section = part.partition("#")
+        if file_part:
+            current_file = Path(file_part).name
+        citations.append(f"{current_file}#{section}" if section else current_file)
+    return citations
+
+
+def citation_hit(retrieved: List[str], gold: List[str]) -> bool:
+    """True if any retrieved citation matches a gold citation"""
+    for gold_citation in gold:
+        gold_file, _, gold_section = gold_citation.partition("#")
+        for citation in retrieved:
+            file_name, _, section = citation.partition("#")
+            # Headings may carry a suffix, e.g. "Common Tools (References)"
+            if file_name == gold_file and section.startswith(gold_section):
+                return True
+    return False
+
+
+def score_results(docs: List, gold_source: str, gold_citation: str = "") -> Dict:
+    """Context size, gold-source hit and gold-citation hit for one retrieval result"""
+    gold_file = Path(gold_source).name
+    sources = {source for doc in docs for source in document_sources(doc)}
+    citations = [citation for doc in docs for citation in document_citations(doc)]
+    return {
+        "context_tokens": count_tokens("\n---\n".join(doc.page_content for doc in docs)),
+        "hit": gold_file in sources,
+        "citation_hit": citation_hit(citations, parse_gold_citations(gold_citation)),
+        "chunks": len(docs),
+    }
+
+
+def summarize(name: str, scores: List[Dict]) -> Dict:
+    """Aggregate per-question scores"""
+    summary = {
+        "mean_context_tokens": statistics.mean(s["context_tokens"] for s in scores),
+        "gold_source_recall": sum(s["hit"] for s in scores) / len(scores) * 100,
+        "gold_citation_recall": sum(s["citation_hit"] for s in scores) / len(scores) * 100,
+        "mean_chunks": statistics.mean(s["chunks"] for s in scores),
+    }
+    print(f"📊 {name}")
+    print(f"   Context tokens / answer: {summary['mean_context_tokens']:.0f}")
+    print(f"   gold_source recall:      {summary['gold_source_recall']:.1f}%")
+    print(f"   gold_citation recall:    {summary['gold_citation_recall']:.1f}%")
+    print(f"   Chunks / answer:         {summary['mean_chunks']:.2f}\n")
+    return summary
+
+
+def compare_chunkers(vs: VectorStore) -> Dict:
+    """Chunk count, size and embedding tokens per chunker over the whole corpus"""
+    docs = []
+    for route_name, route_info in vs.manifest['routes'].items():
+        if route_name != "direct_llm":
+            docs.extend(vs.load_route_documents(route_name, route_info))
+
+    print("\n✂️  CHUNKER COMPARISON")
+    results = {}
+    for chunker in ("recursive", "markdown"):
+        chunks = vs.split_documents(docs, chunker=chunker)
+        results[chunker] = {
+            "chunks": len(chunks),
+            "mean_chars": statistics.mean(len(c.page_content) for c in chunks),
+            "embedding_tokens": sum(count_tokens(c.page_content) for c in chunks),
+        }
+        print(f"   {chunker:<10} {results[chunker]['chunks']:4d} chunks, "
+              f"{results[chunker]['mean_chars']:.0f} chars avg, "
+              f"{results[chunker]['embedding_tokens']} embedding tokens")
+    print()
+    return results
+
+
+def compare_rerankers(vs: VectorStore, rows: List[Dict], rerankers: List[str]) -> Dict:
+    """
+    Query latency, context tokens and recall without and with each reranker
+
+    Every question is asked twice per reranker; the second pass is served
+    from the score cache.
+    """
+    print("\n🏅 RERANKER COMPARISON")
+    print(f"   fetch_k={config.RERANK_FETCH_K}, top_n={config.RERANK_TOP_N} (no reranker: k={config.TOP_K})\n")
+    results = {}
+    for provider in ["none"] + list(rerankers):
+        vs._reranker, vs._reranker_loaded = create_reranker(provider), True
+        scores, latencies, cached_latencies = [], [], []
+        for row in rows:
+            start = time.perf_counter()
+            docs = vs.query(row['question'], row['expected_route'])
+            latencies.append((time.perf_counter() - start) * 1000)
+            scores.append(score_results(docs, row['gold_source'], row.get('gold_citation')))
+        for row in rows:
+            start = time.perf_counter()
+            vs.query(row['question'], row['expected_route'])
+            cached_latencies.append((time.perf_counter() - start) * 1000)
+
+        summary = summarize(f"Reranker: {provider}", scores)
+        summary["p50_latency_ms"] = statistics.median(latencies)
+        summary["p50_cached_latency_ms"] = statistics.median(cached_latencies)
+        if vs.reranker is not None:
+            summary["cache"] = vs.reranker.cache.stats()
+        print(f"   p50 latency:             {summary['p50_latency_ms']:.1f} ms "
+              f"({summary['p50_cached_latency_ms']:.1f} ms cached)\n")
+        results[provider] = summary
+    vs._reranker, vs._reranker_loaded = None, False
+
+    base = results["none"]
+    for provider in rerankers:
+        summary = results[provider]
+        print(f"💡 {provider}: {base['mean_context_tokens'] - summary['mean_context_tokens']:.0f} context tokens "
+              f"saved per answer for +{summary['p50_latency_ms'] - base['p50_latency_ms']:.1f} ms, "
+              f"gold_source recall {summary['gold_source_recall'] - base['gold_source_recall']:+.1f} pts")
+    return results
+
+
+def run_benchmark(k: int = None, rerankers: List[str] = ()) -> Dict:
+    """Compare plain top-k retrieval with the deduplicated query path"""
+    k = k or config.TOP_K
+    vs = VectorStore()
+    # The first two comparisons are of the un-reranked path
+    vs._reranker, vs._reranker_loaded = None, True
+    rows = load_eval_questions()
+
+    print("="*70)
+    print(f"🔎 RETRIEVAL BENCHMARK ({len(rows)} questions, k={k})")
+    print("="*70 + "\n")
+
+    baseline, current = [], []
+    for row in rows:
+        route = row['expected_route']
+        raw_docs = vs._get_collection(route).similarity_search(row['question'], k=k)
+        baseline.append(score_results(raw_docs, row['gold_source'], row.get('gold_citation')))
+        current.append(score_results(
+            vs.query(row['question'], route, k=k), row['gold_source'], row.get('gold_citation')
+        ))
+
+    results = {
+        "chunkers": compare_chunkers(vs),
+        "baseline_top_k": summarize("Plain top-k", baseline),
+        "query": summarize("VectorStore.query (dedup + MMR)", current),
+    }
+    saved = results["baseline_top_k"]["mean_context_tokens"] - results["query"]["mean_context_tokens"]
+    print(f"💡 Context tokens saved per answer: {saved:.0f}")
+    if rerankers:
+        results["rerankers"] = compare_rerankers(vs, rows, rerankers)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieval benchmark")
+    parser.add_argument("--rerankers", nargs="*", default=[], choices=["lexical", "onnx", "local"],
+                        help="Rerankers to compare against plain retrieval")
+    args = parser.parse_args()
+    run_benchmark(rerankers=args.rerankers)
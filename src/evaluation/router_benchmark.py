@@ -0,0 +1,151 @@
+# src/evaluation/router_benchmark.py
+"""
+Router prompt size and latency on multi-turn transcripts.
+
+Builds conversations from the evaluation questions, mixing standalone
+questions with follow-ups, and routes every user turn twice: with the
+previous prompt layout (last four full messages, assistant answers
+included) and with the current one (earlier user-turn snippets, only for
+context-dependent questions). Reports router prompt tokens and call
+latency for both. By default calls go to the local mock server, whose
+delay grows with prompt size; pass --live to use the configured API.
+
+Usage:
+    python src/evaluation/router_benchmark.py [--live]
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.evaluation.mock_openai_server import MockOpenAIServer
+from src.prompts.builder import count_message_tokens
+from src.prompts.templates import ROUTER_SYSTEM_PROMPT, ROUTER_USER_TEMPLATE
+
+FOLLOW_UPS = [
+    "What about contractors?",
+    "Does that apply to interns too?",
+    "Who do I ask about it?",
+    "And how long does that take?",
+    "Can you tell me more about those?",
+]
+
+# Typical length of an assistant answer (max_tokens=500 for RAG answers)
+SAMPLE_ANSWER = (
+    "According to the onboarding documents, the process has several steps. "
+    "First, review the relevant policy page in the project wiki and confirm the "
+    "requirements that apply to your role. Next, submit the request through the "
+    "appropriate internal tool, attaching any supporting documents. Your manager "
+    "reviews the request and either approves it or asks for changes. Once approved, "
+    "the relevant team processes it, usually within a few business days. If you "
+    "have questions or need an exception, contact your manager or the HR team. "
+) * 3
+
+
+def legacy_messages(question: str, history: List[Dict]) -> List[Dict]:
+    """The previous router prompt: up to four full prior messages"""
+    messages = [{"role": "system", "content": ROUTER_SYSTEM_PROMPT}]
+    messages.extend({"role": m["role"], "content": m["content"]} for m in history[-4:])
+    messages.append({"role": "user", "content": ROUTER_USER_TEMPLATE.format(question=question)})
+    return messages
+
+
+def build_transcripts(eval_set_path: str, turns: int = 6) -> List[List[str]]:
+    """User turns per conversation: a standalone question, then alternating follow-ups"""
+    with open(eval_set_path, newline='', encoding='utf-8') as f:
+        questions = [row['question'] for row in csv.DictReader(f)]
+
+    transcripts = []
+    for start in range(0, len(questions), turns // 2):
+        standalone = questions[start:start + turns // 2]
+        conversation = []
+        for n, question in enumerate(standalone):
+            conversation.append(question)
+            conversation.append(FOLLOW_UPS[(start + n) % len(FOLLOW_UPS)])
+        transcripts.append(conversation)
+    return transcripts
+
+
+def run_benchmark(live: bool = False, prompt_token_latency_ms: float = 0.5) -> Dict:
+    server = None
+    if not live:
+        server = MockOpenAIServer(latency_ms=20).start()
+        server.state.prompt_token_latency_ms = prompt_token_latency_ms
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "mock"
+
+    from src.utils.config import config
+    from src.agents.router import QueryRouter
+
+    router = QueryRouter()
+    transcripts = build_transcripts(config.EVAL_SET_PATH)
+    stats = {name: {"tokens": [], "latency_ms": []} for name in ("before", "after")}
+    with_history = 0
+    turns = 0
+
+    try:
+        for conversation in transcripts:
+            history = []
+            for question in conversation:
+                layouts = {
+                    "before": legacy_messages(question, history),
+                    "after": router.build_messages(question, history),
+                }
+                for name, messages in layouts.items():
+                    stats[name]["tokens"].append(count_message_tokens(messages))
+                    start = time.perf_counter()
+                    router.client.chat_completion(**router.request_params(messages))
+                    stats[name]["latency_ms"].append((time.perf_counter() - start) * 1000)
+
+                turns += 1
+                with_history += bool(history) and router.needs_history(question)
+                history += [
+                    {"role": "user", "content": question},
+                    {"role": "assistant", "content": SAMPLE_ANSWER},
+                ]
+    finally:
+        if server:
+            server.stop()
+
+    print("="*70)
+    print(f"🎯 ROUTER PROMPT COST ({len(transcripts)} conversations, {turns} turns, "
+          f"{'live API' if live else 'mock API'})")
+    print("="*70 + "\n")
+    summary = {}
+    for name, values in stats.items():
+        summary[name] = {
+            "mean_tokens": statistics.mean(values["tokens"]),
+            "max_tokens": max(values["tokens"]),
+            "p50_latency_ms": statistics.median(values["latency_ms"]),
+            "mean_latency_ms": statistics.mean(values["latency_ms"]),
+        }
+        print(f"{name:>7}: {summary[name]['mean_tokens']:6.0f} tokens/call "
+              f"(max {summary[name]['max_tokens']}) | "
+              f"p50 {summary[name]['p50_latency_ms']:.0f} ms | "
+              f"mean {summary[name]['mean_latency_ms']:.0f} ms")
+
+    saved = 1 - summary["after"]["mean_tokens"] / summary["before"]["mean_tokens"]
+    print(f"\n📉 Router prompt tokens reduced by {saved:.0%}; "
+          f"history included on {with_history}/{turns} turns")
+    summary["history_turns"] = with_history
+    summary["turns"] = turns
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Router prompt tokens and latency")
+    parser.add_argument("--live", action="store_true", help="Use the configured OpenAI API")
+    parser.add_argument("--prompt-token-latency-ms", type=float, default=0.5,
+                        help="Mock delay per prompt token")
+    args = parser.parse_args()
+    run_benchmark(args.live, args.prompt_token_latency_ms)
+
+
+if __name__ == "__main__":
+    main()
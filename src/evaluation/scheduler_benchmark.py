@@ -0,0 +1,167 @@
+# src/evaluation/scheduler_benchmark.py
+"""
+Interactive latency while a background job saturates the OpenAI budget.
+
+A background job (evaluation or bulk pre-generation) sends chat requests
+as fast as the shared budget allows while interactive users ask a
+question every so often, all against the local mock OpenAI server with
+enforced request and token limits. The run is done twice through the
+same LLMScheduler: once with every call at the same priority (first come,
+first served) and once with the background job marked as background.
+It reports the interactive queue wait, background throughput, 429s from
+the mock and the scheduler's wait-time histograms.
+
+Usage:
+    python src/evaluation/scheduler_benchmark.py [--rpm 600] [--tpm 60000] [--seconds 10]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.evaluation.mock_openai_server import MockOpenAIServer
+from src.utils.scheduler import BACKGROUND, INTERACTIVE, LLMScheduler, call_context, estimate_tokens
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def chat_body(question: str) -> Dict:
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [{"role": "user", "content": question}],
+        "max_tokens": 100,
+    }
+
+
+def send(scheduler: LLMScheduler, base_url: str, body: Dict) -> float:
+    """Wait for the scheduler, then POST a chat completion; returns the queue wait in ms"""
+    waited = scheduler.acquire(estimate_tokens(body))
+    request = urllib.request.Request(
+        f"{base_url}/chat/completions",
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    try:
+        urllib.request.urlopen(request).read()
+    except urllib.error.HTTPError as e:
+        e.read()
+    return waited * 1000
+
+
+def run_mix(
+    server: MockOpenAIServer,
+    scheduler: LLMScheduler,
+    background_priority: str,
+    users: int,
+    background_workers: int,
+    seconds: float,
+    think_s: float
+) -> Dict:
+    stop = threading.Event()
+    interactive_waits = []
+    background_done = [0]
+    lock = threading.Lock()
+
+    def background(worker):
+        with call_context(background_priority, "batch"):
+            n = 0
+            while not stop.is_set():
+                send(scheduler, server.base_url, chat_body(f"Bulk question {worker}-{n}: how do I submit expenses?"))
+                n += 1
+                with lock:
+                    background_done[0] += 1
+
+    def user(u):
+        with call_context(INTERACTIVE, f"user-{u}"):
+            n = 0
+            while not stop.wait(think_s):
+                waited = send(scheduler, server.base_url, chat_body(f"User {u} question {n}: what are our values?"))
+                n += 1
+                with lock:
+                    interactive_waits.append(waited)
+
+    threads = [threading.Thread(target=background, args=(w,)) for w in range(background_workers)]
+    threads += [threading.Thread(target=user, args=(u,)) for u in range(users)]
+    limited_before = server.state.rate_limited
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "interactive_requests": len(interactive_waits),
+        "interactive_p50_wait_ms": percentile(interactive_waits, 50),
+        "interactive_p95_wait_ms": percentile(interactive_waits, 95),
+        "background_per_sec": background_done[0] / seconds,
+        "rate_limited": server.state.rate_limited - limited_before,
+        "scheduler": scheduler.stats(),
+    }
+
+
+def run_benchmark(
+    rpm: float = 600,
+    tpm: float = 60000,
+    users: int = 8,
+    background_workers: int = 16,
+    seconds: float = 10.0,
+    think_s: float = 1.0,
+    latency_ms: float = 100.0
+) -> Dict[str, Dict]:
+    server = MockOpenAIServer(latency_ms=latency_ms).start()
+    server.state.requests_per_minute = rpm
+    server.state.tokens_per_minute = tpm
+
+    print("="*70)
+    print(f"🚦 LLM CALL SCHEDULER ({users} users + {background_workers} background workers, "
+          f"{rpm:.0f} rpm / {tpm:.0f} tpm, {seconds:.0f}s)")
+    print("="*70 + "\n")
+    print(f"{'mode':<10}{'user p50 ms':>13}{'user p95 ms':>13}{'bg req/s':>10}{'429s':>7}")
+
+    results = {}
+    try:
+        for mode, priority in (("fifo", INTERACTIVE), ("priority", BACKGROUND)):
+            # Slightly under the enforced limits, as a deployment would configure it
+            scheduler = LLMScheduler(rpm * 0.95, tpm * 0.95)
+            result = run_mix(server, scheduler, priority, users, background_workers, seconds, think_s)
+            results[mode] = result
+            print(f"{mode:<10}{result['interactive_p50_wait_ms']:>13.0f}{result['interactive_p95_wait_ms']:>13.0f}"
+                  f"{result['background_per_sec']:>10.1f}{result['rate_limited']:>7}")
+            time.sleep(1.0)  # let the mock's buckets refill between runs
+    finally:
+        server.stop()
+
+    for mode, result in results.items():
+        print(f"\n{mode} wait-time histograms (ms):")
+        for priority, stats in result["scheduler"].items():
+            print(f"   {priority:<12} max depth {stats['max_depth']:>3}  {stats['wait_histogram_ms']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interactive latency under a background flood")
+    parser.add_argument("--rpm", type=float, default=600)
+    parser.add_argument("--tpm", type=float, default=60000)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--background-workers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--think-s", type=float, default=1.0, help="Pause between a user's questions")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    args = parser.parse_args()
+    run_benchmark(args.rpm, args.tpm, args.users, args.background_workers,
+                  args.seconds, args.think_s, args.latency_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# src/evaluation/startup_benchmark.py
+"""
+Cold import-time benchmark based on `python -X importtime`.
+
+Each run imports the target module in a fresh interpreter so that nothing is
+cached in sys.modules, then reads the cumulative time the interpreter reports
+for that module.
+
+Usage:
+    python src/evaluation/startup_benchmark.py [--runs 5]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BASE_DIR = Path(__file__).parent.parent.parent
+
+TARGET_MODULES = [
+    "src.agents.assistant",
+    "src.database.db_handler",
+]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse `-X importtime` output
+
+    Returns:
+        List of (module, self_us, cumulative_us)
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            _, data = line.split(":", 1)
+            self_us, cumulative_us, module = data.split("|", 2)
+            rows.append((module.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def measure_import(module: str) -> Dict:
+    """Import a module in a fresh interpreter and return its timing breakdown"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    rows = parse_importtime(proc.stderr)
+    cumulative = next((cum for name, _, cum in reversed(rows) if name == module), None)
+    heaviest = sorted(rows, key=lambda row: row[1], reverse=True)[:10]
+    return {
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else "",
+        "cumulative_ms": cumulative / 1000 if cumulative is not None else None,
+        "heaviest": [(name, self_us / 1000) for name, self_us, _ in heaviest],
+    }
+
+
+def run_benchmark(runs: int = 5) -> Dict:
+    """Measure the cold import time of each target module"""
+    print("="*70)
+    print("⏱️  COLD IMPORT BENCHMARK (python -X importtime)")
+    print("="*70 + "\n")
+
+    results = {}
+    for module in TARGET_MODULES:
+        samples = []
+        last = None
+        for _ in range(runs):
+            last = measure_import(module)
+            if not last["ok"]:
+                break
+            samples.append(last["cumulative_ms"])
+
+        if not samples:
+            print(f"❌ {module}: import failed ({last['error']})\n")
+            results[module] = {"error": last["error"]}
+            continue
+
+        results[module] = {
+            "median_ms": statistics.median(samples),
+            "min_ms": min(samples),
+            "max_ms": max(samples),
+            "runs": len(samples),
+        }
+        print(f"📦 {module}")
+        print(f"   median {results[module]['median_ms']:.1f} ms "
+              f"(min {results[module]['min_ms']:.1f}, max {results[module]['max_ms']:.1f}, runs {len(samples)})")
+        print("   heaviest self times:")
+        for name, ms in last["heaviest"][:5]:
+            print(f"      {ms:8.1f} ms  {name}")
+        print()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import-time benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    args = parser.parse_args()
+    run_benchmark(args.runs)
+
+
+if __name__ == "__main__":
+    main()
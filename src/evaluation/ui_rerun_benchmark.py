@@ -0,0 +1,133 @@
+# src/evaluation/ui_rerun_benchmark.py
+"""
+Server-side rerun cost of the chat page at 10, 100 and 1000 messages.
+
+Runs ui/app.py headlessly with streamlit's AppTest, logged in with a
+pre-filled conversation, and times full script reruns and answered
+follow-up questions (submitting the chat input through to the saved
+answer). The assistant is replaced by a stub that answers instantly, so
+only the UI's own cost is measured; the database is a throwaway SQLite
+file.
+
+Usage:
+    python src/evaluation/ui_rerun_benchmark.py [--reruns 5]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).parent.parent.parent
+sys.path.append(str(BASE_DIR))
+from src.database.db_handler import DatabaseHandler
+
+MESSAGE_COUNTS = [10, 100, 1000]
+
+
+class InstantAssistant:
+    """Stands in for the assistant with a fixed, already-generated answer"""
+
+    def answer(self, question, **kwargs):
+        return {
+            "question": question,
+            "answer": "Submit receipts through the expense portal within 30 days.",
+            "route": "admin_policy",
+            "sources": ["expense_policy.md"],
+            "trace": {"total_ms": 0.0},
+        }
+
+
+def make_messages(count: int) -> List[Dict]:
+    """Alternating user/assistant messages with assistant metadata"""
+    messages = []
+    for i in range(count):
+        if i % 2 == 0:
+            messages.append({"role": "user", "content": f"Question {i}: how do I submit expenses?"})
+        else:
+            messages.append({
+                "role": "assistant",
+                "content": f"Answer {i}: submit receipts through the expense portal within 30 days.",
+                "metadata": {
+                    "route": "admin_policy",
+                    "sources": ["expense_policy.md", "onboarding_faq.md"],
+                    "blocked": False,
+                    "reason": ""
+                }
+            })
+    return messages
+
+
+def time_reruns(message_count: int, db: DatabaseHandler, user_id: int, reruns: int) -> Dict:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(BASE_DIR / "ui" / "app.py"), default_timeout=60)
+    at.session_state["db"] = db
+    at.session_state["assistant"] = InstantAssistant()
+    at.session_state["authenticated"] = True
+    at.session_state["user_id"] = user_id
+    at.session_state["username"] = "bench"
+    at.session_state["current_session_id"] = "bench-session"
+    at.session_state["messages"] = make_messages(message_count)
+    at.session_state["question_count"] = message_count // 2
+
+    # First run builds caches (session list, pre-rendered badges)
+    at.run()
+
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    answer_samples = []
+    for i in range(reruns):
+        start = time.perf_counter()
+        at.chat_input[0].set_value(f"Follow-up {i}: where is the expense portal?").run()
+        answer_samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "median_ms": statistics.median(samples),
+        "max_ms": max(samples),
+        "answer_median_ms": statistics.median(answer_samples),
+        "answer_max_ms": max(answer_samples),
+        "exceptions": [str(e.value) for e in at.exception],
+    }
+
+
+def run_benchmark(reruns: int = 5) -> Dict:
+    print("="*70)
+    print("⏱️  STREAMLIT RERUN COST")
+    print("="*70 + "\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseHandler(db_path=str(Path(tmp) / "bench.db"))
+        db.register_user("bench", "bench-password", "bench@example.com")
+        user_id = db.authenticate_user("bench", "bench-password")
+        db.create_session(user_id, "bench-session", "Benchmark")
+
+        results = {}
+        for count in MESSAGE_COUNTS:
+            results[count] = time_reruns(count, db, user_id, reruns)
+            status = "⚠️" if results[count]["exceptions"] else "✅"
+            print(f"{status} {count:5d} messages: rerun median {results[count]['median_ms']:.1f} ms "
+                  f"(max {results[count]['max_ms']:.1f}), answer median "
+                  f"{results[count]['answer_median_ms']:.1f} ms (max {results[count]['answer_max_ms']:.1f})")
+            for error in results[count]["exceptions"]:
+                print(f"   {error}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit rerun cost benchmark")
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+    run_benchmark(args.reruns)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,105 @@ Provides content safety, validation, and moderation
 
 from typing import Dict, List, Tuple
 import re
+import threading
 from datetime import datetime, timedelta
 
 
+# Patterns are compiled once at import; the checks run on every request
+
+PERSONAL_INFO_PATTERNS = {
+    "Social Security Number": re.compile(r'\b\d{3}-\d{2}-\d{4}\b', re.IGNORECASE),
+    "Credit Card": re.compile(r'\b\d{16}\b', re.IGNORECASE),
+    "Phone Number": re.compile(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', re.IGNORECASE),
+    # Bounded parts (RFC 5321 lengths) keep this linear on adversarial input
+    "Email Address": re.compile(r'\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]{1,255}\.[A-Z|a-z]{2,}\b', re.IGNORECASE),
+}
+
+HARMFUL_KEYWORDS = {
+    "self-harm": ["suicide", "kill myself", "end my life", "hurt myself"],
+    "illegal activity": ["hack", "steal", "illegal", "break into", "exploit system"],
+    "violence": ["harm others", "attack", "violent"],
+}
+
+BLOCKED_KEYWORDS = {
+    "medical advice": ["diagnose", "medication", "treatment", "cure"],
+    "legal advice": ["lawsuit", "legal case", "court"],
+    "financial advice": ["invest in", "stock tip", "financial advice"],
+    "hacking": ["bypass security", "hack into", "exploit vulnerability"],
+}
+
+INJECTION_PATTERNS = [
+    r'ignore previous instructions',
+    r'disregard all previous',
+    r'you are now',
+    r'system prompt',
+    r'forget everything',
+    r'new instructions',
+]
+
+
+MAX_SPECIAL_CHAR_RATIO = 0.3
+MAX_REPEATED_CHARS = 6  # same character six times in a row
+SPECIAL_CHARS_MESSAGE = "⚠️ Your message contains too many special characters. Please rephrase."
+REPEATED_CHARS_MESSAGE = "⚠️ Please remove repeated characters and try again."
+
+
+PLAIN_RUN_RE = re.compile(r'[\w\s]+')
+REPEATED_CHAR_RE = re.compile(r'(.)\1{%d}' % (MAX_REPEATED_CHARS - 1))
+DIGIT_RE = re.compile(r'\d')
+CONTROL_CHAR_RE = re.compile(r'[\x00-\x09\x0b-\x1f]')
+
+
+def count_special_chars(text: str) -> int:
+    """Characters that are neither alphanumeric nor whitespace ("_" counts)"""
+    # Summing runs of plain characters is far cheaper than matching each
+    # special character on ordinary text
+    return len(text) - sum(map(len, PLAIN_RUN_RE.findall(text))) + text.count('_')
+
+
+def text_stats(text: str) -> Dict[str, int]:
+    """
+    Character statistics from a few linear C-level scans: special
+    (non-alphanumeric, non-space) characters, whether some character
+    repeats MAX_REPEATED_CHARS times in a row, and whether any digit occurs
+    """
+    return {
+        "special_chars": count_special_chars(text),
+        "has_repeats": REPEATED_CHAR_RE.search(text) is not None,
+        "has_digit": DIGIT_RE.search(text) is not None,
+    }
+
+
+def _keyword_regex(keywords: List[str]) -> "re.Pattern":
+    """One alternation per keyword group; plain substring semantics like `in`"""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+
+HARMFUL_RES = {kind: _keyword_regex(words) for kind, words in HARMFUL_KEYWORDS.items()}
+BLOCKED_RES = {topic: _keyword_regex(words) for topic, words in BLOCKED_KEYWORDS.items()}
+# One scan to rule out every keyword at once; per-group scans only run on a hit
+HARMFUL_ANY_RE = _keyword_regex([w for words in HARMFUL_KEYWORDS.values() for w in words])
+BLOCKED_ANY_RE = _keyword_regex([w for words in BLOCKED_KEYWORDS.values() for w in words])
+INJECTION_RE = re.compile("|".join(INJECTION_PATTERNS))
+
+SSN_RE = PERSONAL_INFO_PATTERNS["Social Security Number"]
+CREDIT_CARD_RE = PERSONAL_INFO_PATTERNS["Credit Card"]
+PHONE_RE = PERSONAL_INFO_PATTERNS["Phone Number"]
+
+# Applied in order by sanitize_output (an SSN is masked before the phone
+# pattern can see it); the longest possible match is a 16-digit card
+OUTPUT_MASKS = [
+    (SSN_RE, 'XXX-XX-XXXX'),
+    (CREDIT_CARD_RE, 'XXXX-XXXX-XXXX-XXXX'),
+    (PHONE_RE, 'XXX-XXX-XXXX'),
+]
+MAX_MASKED_LENGTH = 16
+
+UNPROFESSIONAL_WORDS = ["dude", "bro", "yo", "lol", "lmao", "wtf", "omg", "bruh"]
+# Whole words only, so "yo" does not match "your"
+TONE_RE = re.compile(r'\b(?:%s)\b' % "|".join(UNPROFESSIONAL_WORDS), re.IGNORECASE)
+
+
 class ContentGuardrails:
     """Content safety and moderation guardrails"""
     
@@ -43,9 +139,10 @@ class ContentGuardrails:
             "dangerous activities"
         ]
         
-        # Rate limiting tracking
+        # Rate limiting tracking (shared by all sessions using this instance)
         self.user_request_history = {}
         self.max_requests_per_minute = 10
+        self._rate_limit_lock = threading.Lock()
         
         # Input validation limits
         self.max_input_length = 2000
@@ -120,74 +217,65 @@ class ContentGuardrails:
         """Check if user is within rate limits"""
         current_time = datetime.now()
         
-        # Initialize user history if not exists
-        if user_id not in self.user_request_history:
-            self.user_request_history[user_id] = []
-        
-        # Remove old requests (older than 1 minute)
-        self.user_request_history[user_id] = [
-            timestamp for timestamp in self.user_request_history[user_id]
-            if current_time - timestamp < timedelta(minutes=1)
-        ]
-        
-        # Check if under limit
-        if len(self.user_request_history[user_id]) >= self.max_requests_per_minute:
-            return False
-        
-        # Add current request
-        self.user_request_history[user_id].append(current_time)
-        return True
+        with self._rate_limit_lock:
+            # Initialize user history if not exists
+            if user_id not in self.user_request_history:
+                self.user_request_history[user_id] = []
+            
+            # Remove old requests (older than 1 minute)
+            self.user_request_history[user_id] = [
+                timestamp for timestamp in self.user_request_history[user_id]
+                if current_time - timestamp < timedelta(minutes=1)
+            ]
+            
+            # Check if under limit
+            if len(self.user_request_history[user_id]) >= self.max_requests_per_minute:
+                return False
+            
+            # Add current request
+            self.user_request_history[user_id].append(current_time)
+            return True
     
     def _detect_personal_info(self, text: str) -> Tuple[bool, str]:
         """Detect personal information in text"""
         
-        patterns = {
-            "Social Security Number": r'\b\d{3}-\d{2}-\d{4}\b',
-            "Credit Card": r'\b\d{16}\b',
-            "Phone Number": r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
-            "Email Address": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-        }
-        
-        for info_type, pattern in patterns.items():
-            if re.search(pattern, text, re.IGNORECASE):
+        has_digit = DIGIT_RE.search(text) is not None
+        for info_type, pattern in PERSONAL_INFO_PATTERNS.items():
+            # Cheap gates: number patterns need a digit, emails need an "@";
+            # the email pattern is quadratic on long "@"-free text
+            if info_type == "Email Address":
+                if "@" not in text:
+                    continue
+            elif not has_digit:
+                continue
+            if pattern.search(text):
                 return True, info_type
         
         return False, ""
     
-    def _detect_harmful_content(self, text: str) -> Tuple[bool, str]:
+    def _detect_harmful_content(self, text: str, text_lower: str = None) -> Tuple[bool, str]:
         """Detect potentially harmful content"""
         
-        harmful_keywords = {
-            "self-harm": ["suicide", "kill myself", "end my life", "hurt myself"],
-            "illegal activity": ["hack", "steal", "illegal", "break into", "exploit system"],
-            "violence": ["harm others", "attack", "violent"],
-        }
-        
-        text_lower = text.lower()
+        text_lower = text_lower if text_lower is not None else text.lower()
+        if not HARMFUL_ANY_RE.search(text_lower):
+            return False, ""
         
-        for harm_type, keywords in harmful_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return True, harm_type
+        for harm_type, pattern in HARMFUL_RES.items():
+            if pattern.search(text_lower):
+                return True, harm_type
         
         return False, ""
     
-    def _check_blocked_topics(self, text: str) -> Tuple[bool, str]:
+    def _check_blocked_topics(self, text: str, text_lower: str = None) -> Tuple[bool, str]:
         """Check if query is about blocked topics"""
         
-        text_lower = text.lower()
-        
-        blocked_keywords = {
-            "medical advice": ["diagnose", "medication", "treatment", "cure"],
-            "legal advice": ["lawsuit", "legal case", "court"],
-            "financial advice": ["invest in", "stock tip", "financial advice"],
-            "hacking": ["bypass security", "hack into", "exploit vulnerability"],
-        }
+        text_lower = text_lower if text_lower is not None else text.lower()
+        if not BLOCKED_ANY_RE.search(text_lower):
+            return False, ""
         
-        for topic, keywords in blocked_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return True, topic
+        for topic, pattern in BLOCKED_RES.items():
+            if pattern.search(text_lower):
+                return True, topic
         
         return False, ""
     
@@ -212,14 +300,12 @@ I'm here to help with work-related questions about our company.
     def sanitize_output(self, text: str) -> str:
         """Sanitize output by removing/masking sensitive information"""
         
-        # Mask SSN
-        text = re.sub(r'\b\d{3}-\d{2}-\d{4}\b', 'XXX-XX-XXXX', text)
+        if not DIGIT_RE.search(text):
+            return text
         
-        # Mask credit card
-        text = re.sub(r'\b\d{16}\b', 'XXXX-XXXX-XXXX-XXXX', text)
-        
-        # Mask phone numbers
-        text = re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', 'XXX-XXX-XXXX', text)
+        # Mask SSN, then credit card, then phone numbers
+        for pattern, mask in OUTPUT_MASKS:
+            text = pattern.sub(mask, text)
         
         return text
     
@@ -244,7 +330,7 @@ class InputValidator:
         text = ' '.join(text.split())
         
         # Remove control characters
-        text = ''.join(char for char in text if ord(char) >= 32 or char == '\n')
+        text = CONTROL_CHAR_RE.sub('', text)
         
         return text.strip()
     
@@ -252,37 +338,25 @@ class InputValidator:
     def validate_question_format(text: str) -> Tuple[bool, str]:
         """Validate that input is a proper question or statement"""
         
+        stats = text_stats(text)
+        
         # Check for gibberish (too many special characters)
-        special_char_ratio = sum(not c.isalnum() and not c.isspace() for c in text) / len(text)
-        if special_char_ratio > 0.3:
-            return False, "⚠️ Your message contains too many special characters. Please rephrase."
+        special_char_ratio = stats["special_chars"] / max(len(text), 1)
+        if special_char_ratio > MAX_SPECIAL_CHAR_RATIO:
+            return False, SPECIAL_CHARS_MESSAGE
         
         # Check for repeated characters (spam detection)
-        if re.search(r'(.)\1{5,}', text):
-            return False, "⚠️ Please remove repeated characters and try again."
+        if stats["has_repeats"]:
+            return False, REPEATED_CHARS_MESSAGE
         
         return True, ""
     
     @staticmethod
-    def detect_prompt_injection(text: str) -> bool:
+    def detect_prompt_injection(text: str, text_lower: str = None) -> bool:
         """Detect potential prompt injection attempts"""
         
-        injection_patterns = [
-            r'ignore previous instructions',
-            r'disregard all previous',
-            r'you are now',
-            r'system prompt',
-            r'forget everything',
-            r'new instructions',
-        ]
-        
-        text_lower = text.lower()
-        
-        for pattern in injection_patterns:
-            if re.search(pattern, text_lower):
-                return True
-        
-        return False
+        text_lower = text_lower if text_lower is not None else text.lower()
+        return INJECTION_RE.search(text_lower) is not None
 
 
 class ResponseGuardrails:
@@ -316,19 +390,8 @@ class ResponseGuardrails:
     def ensure_professional_tone(response: str) -> bool:
         """Ensure response maintains professional tone"""
         
-        # Check for unprofessional language
-        unprofessional = [
-            "dude", "bro", "yo", "lol", "lmao",
-            "wtf", "omg", "bruh"
-        ]
-        
-        response_lower = response.lower()
-        
-        for word in unprofessional:
-            if word in response_lower:
-                return False
-        
-        return True
+        # Check for unprofessional language (whole words only)
+        return TONE_RE.search(response) is None
 
 
 # Convenience function for easy integration
@@ -0,0 +1,179 @@
+# src/guardrails/pipeline.py
+"""
+Input guardrail pipeline.
+
+Normalizes a question once (sanitized text, lowercase form, character
+statistics), then runs every input check cheapest-first against that
+shared state, stopping at the first failure. Each check's duration is
+recorded so it can be attached to the request trace.
+"""
+
+import sys
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.guardrails.content_guardrails import (
+    ContentGuardrails,
+    DIGIT_RE,
+    count_special_chars,
+    InputValidator,
+    MAX_SPECIAL_CHAR_RATIO,
+    PERSONAL_INFO_PATTERNS,
+    REPEATED_CHAR_RE,
+    REPEATED_CHARS_MESSAGE,
+    SPECIAL_CHARS_MESSAGE,
+)
+
+
+class NormalizedInput:
+    """
+    A sanitized question plus derived forms shared by all checks. Each
+    statistic is computed on first use, so an early rejection does not
+    pay for scans only later checks need.
+    """
+
+    def __init__(self, raw: str):
+        self.text = InputValidator.sanitize_input(raw)
+        self.length = len(self.text)
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def special_chars(self) -> int:
+        return count_special_chars(self.text)
+
+    @cached_property
+    def has_repeats(self) -> bool:
+        return REPEATED_CHAR_RE.search(self.text) is not None
+
+    @cached_property
+    def has_digit(self) -> bool:
+        return DIGIT_RE.search(self.text) is not None
+
+    @cached_property
+    def has_at(self) -> bool:
+        return "@" in self.text
+
+
+@dataclass
+class GuardrailResult:
+    question: str
+    passed: bool = True
+    check: str = ""
+    reason: str = ""
+    message: str = ""
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    def blocked_response(self) -> Optional[Dict]:
+        """The answer() result for a blocked question, or None if it passed"""
+        if self.passed:
+            return None
+        return {
+            "question": self.question,
+            "answer": self.message,
+            "route": "guardrail_blocked",
+            "sources": [],
+            "blocked": True,
+            "reason": self.reason
+        }
+
+
+# Reasons reported to the UI
+FORMAT = "Invalid format"
+INJECTION = "Prompt injection attempt"
+CONTENT = "Content policy violation"
+
+
+class GuardrailPipeline:
+    """Input checks over one normalized question, cheapest first"""
+
+    def __init__(self, guardrails: ContentGuardrails):
+        self.guardrails = guardrails
+        # Ordered cheapest-first: O(1) stat checks, then single compiled
+        # scans of the lowercase text, then regexes over the original
+        # text, then the rate limiter (which records the request)
+        self.checks: List[Tuple[str, str, Callable]] = [
+            ("length", CONTENT, self._check_length),
+            ("special_chars", FORMAT, self._check_special_chars),
+            ("repeated_chars", FORMAT, self._check_repeated_chars),
+            ("prompt_injection", INJECTION, self._check_injection),
+            ("harmful_content", CONTENT, self._check_harmful),
+            ("blocked_topics", CONTENT, self._check_blocked),
+            ("personal_info", CONTENT, self._check_personal_info),
+            ("rate_limit", CONTENT, self._check_rate_limit),
+        ]
+
+    def run(self, question: str, user_id: int = None) -> GuardrailResult:
+        """Normalize once and run the checks until one fails"""
+        start = time.perf_counter()
+        normalized = NormalizedInput(question)
+        result = GuardrailResult(question=normalized.text)
+        result.timings_ms["normalize"] = (time.perf_counter() - start) * 1000
+
+        for name, reason, check in self.checks:
+            check_start = time.perf_counter()
+            message = check(normalized, user_id)
+            result.timings_ms[name] = (time.perf_counter() - check_start) * 1000
+            if message:
+                result.passed = False
+                result.check = name
+                result.reason = reason
+                result.message = message
+                if reason == INJECTION:
+                    print("⚠️ Prompt injection detected!")
+                elif reason == CONTENT and user_id:
+                    self.guardrails.log_violation(user_id, "input_validation", normalized.text)
+                break
+
+        return result
+
+    def _check_length(self, q: NormalizedInput, user_id) -> str:
+        if q.length < self.guardrails.min_input_length:
+            return "⚠️ Your message is too short. Please provide more details."
+        if q.length > self.guardrails.max_input_length:
+            return (f"⚠️ Your message is too long (max {self.guardrails.max_input_length} characters). "
+                    "Please shorten it.")
+        return ""
+
+    def _check_special_chars(self, q: NormalizedInput, user_id) -> str:
+        if q.special_chars / max(q.length, 1) > MAX_SPECIAL_CHAR_RATIO:
+            return SPECIAL_CHARS_MESSAGE
+        return ""
+
+    def _check_repeated_chars(self, q: NormalizedInput, user_id) -> str:
+        return REPEATED_CHARS_MESSAGE if q.has_repeats else ""
+
+    def _check_injection(self, q: NormalizedInput, user_id) -> str:
+        if InputValidator.detect_prompt_injection(q.text, q.lower):
+            return ("⚠️ Your message appears to contain invalid instructions. "
+                    "Please ask a normal question about the company.")
+        return ""
+
+    def _check_harmful(self, q: NormalizedInput, user_id) -> str:
+        has_harmful, harm_type = self.guardrails._detect_harmful_content(q.text, q.lower)
+        return self.guardrails._get_safety_message(harm_type) if has_harmful else ""
+
+    def _check_blocked(self, q: NormalizedInput, user_id) -> str:
+        has_blocked, topic = self.guardrails._check_blocked_topics(q.text, q.lower)
+        if has_blocked:
+            return (f"⚠️ I cannot provide information about {topic}. "
+                    "Please ask about company policies, roles, or general information.")
+        return ""
+
+    def _check_personal_info(self, q: NormalizedInput, user_id) -> str:
+        for info_type, pattern in PERSONAL_INFO_PATTERNS.items():
+            needed = q.has_at if info_type == "Email Address" else q.has_digit
+            if needed and pattern.search(q.text):
+                return f"⚠️ Please don't share {info_type} in your messages. This is for your safety."
+        return ""
+
+    def _check_rate_limit(self, q: NormalizedInput, user_id) -> str:
+        if user_id and not self.guardrails._check_rate_limit(user_id):
+            return "⚠️ Too many requests. Please wait a moment before trying again."
+        return ""
@@ -0,0 +1,144 @@
+# src/guardrails/streaming.py
+"""
+Output guardrails for streamed answers.
+
+StreamingOutputScanner takes model output chunk by chunk and returns the
+text that is safe to show right away. It applies the same SSN / card /
+phone masking as ContentGuardrails.sanitize_output, and the concatenated
+output equals sanitize_output(full answer). Only a trailing run of digits
+and separators that could still turn into a match is held back, so a
+span is masked as soon as the character after it arrives. Tone is checked
+on whole words as they complete. Work per chunk is bounded by the chunk
+size plus the lookbehind.
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.guardrails.content_guardrails import (
+    MAX_MASKED_LENGTH,
+    OUTPUT_MASKS,
+    TONE_RE,
+    UNPROFESSIONAL_WORDS,
+)
+
+# Characters a masked pattern can consist of; a trailing run of them may
+# still grow into a match (or break one, since every pattern ends in \b)
+TRAILING_RUN_RE = re.compile(r'[\d.\-]*\Z')
+PARTIAL_WORD_RE = re.compile(r'\w*\Z')
+# Held partial words longer than any tone word are replaced by a word
+# character that cannot start one, keeping "\b" context correct
+MID_WORD = "_"
+MAX_TONE_WORD = max(len(word) for word in UNPROFESSIONAL_WORDS)
+
+
+def mask_text(text: str, start: int = 0, end: int = None) -> Tuple[str, int]:
+    """
+    sanitize_output's masking applied to text[start:end], returning the
+    masked slice and the number of masked spans. The text around the slice
+    is only context for "\\b"; no match may straddle either edge.
+    """
+    end = len(text) if end is None else end
+    total = 0
+    for pattern, mask in OUTPUT_MASKS:
+        parts, last = [], 0
+        for match in pattern.finditer(text, start):
+            if match.end() > end:
+                break
+            parts.append(text[last:match.start()])
+            parts.append(mask)
+            last = match.end()
+        if parts:
+            parts.append(text[last:])
+            masked = "".join(parts)
+            end += len(masked) - len(text)
+            text = masked
+            total += len(parts) // 2
+    return text[start:end], total
+
+
+class StreamingOutputScanner:
+    """Incremental PII masking and tone checking over streamed chunks"""
+
+    def __init__(self, lookbehind: int = 2 * MAX_MASKED_LENGTH):
+        if lookbehind < 2 * MAX_MASKED_LENGTH:
+            raise ValueError(f"lookbehind must be at least {2 * MAX_MASKED_LENGTH}")
+        self.lookbehind = lookbehind
+        self.masked_count = 0
+        self.tone_violations: List[str] = []
+        self._buffer = ""
+        self._context = ""  # Last released original character, for "\b"
+        self._tone_carry = ""  # Incomplete word at the end of released text
+
+    @property
+    def professional(self) -> bool:
+        return not self.tone_violations
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk; returns the masked text that can be shown now"""
+        self._buffer += chunk
+        safe = self._safe_point()
+        if safe == 0:
+            return ""
+        ready, self._buffer = self._buffer[:safe], self._buffer[safe:]
+        return self._release(ready, self._buffer, final=False)
+
+    def finish(self) -> str:
+        """End of stream: release everything still held back"""
+        ready, self._buffer = self._buffer, ""
+        return self._release(ready, "", final=True)
+
+    def stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Wrap a chunk iterator (e.g. for st.write_stream), yielding safe text"""
+        for chunk in chunks:
+            text = self.feed(chunk)
+            if text:
+                yield text
+        text = self.finish()
+        if text:
+            yield text
+
+    def _safe_point(self) -> int:
+        """Length of the buffer prefix whose masking can no longer change"""
+        buffer = self._buffer
+        run_start = TRAILING_RUN_RE.search(buffer).start()
+        if len(buffer) - run_start <= self.lookbehind:
+            return run_start
+
+        # A long digit/separator run: release all but the lookbehind, moving
+        # the cut past any match that straddles it (matches are at most
+        # MAX_MASKED_LENGTH long, so they end well inside the buffer)
+        safe = len(buffer) - self.lookbehind
+        text = self._context + buffer
+        offset = len(self._context)
+        moved = True
+        while moved:
+            moved = False
+            for pattern, _ in OUTPUT_MASKS:
+                for match in pattern.finditer(text, offset):
+                    start, end = match.start() - offset, match.end() - offset
+                    if start < safe < end:
+                        safe, moved = end, True
+        return safe
+
+    def _release(self, ready: str, held: str, final: bool) -> str:
+        if not ready:
+            return ""
+        # Mask with the neighbouring text as context so \b sees the same
+        # characters as in the full answer; the cut never splits a match
+        start = len(self._context)
+        masked, count = mask_text(self._context + ready + held, start, start + len(ready))
+        self.masked_count += count
+        self._context = ready[-1]
+        self._check_tone(ready, final)
+        return masked
+
+    def _check_tone(self, ready: str, final: bool):
+        text = self._tone_carry + ready
+        cut = len(text) if final else PARTIAL_WORD_RE.search(text).start()
+        self.tone_violations.extend(match.group(0).lower() for match in TONE_RE.finditer(text, 0, cut))
+        carry = text[cut:]
+        self._tone_carry = MID_WORD if len(carry) > MAX_TONE_WORD else carry
@@ -0,0 +1,270 @@
+# src/prompts/builder.py
+"""
+Token-budgeted prompt assembly.
+
+Counts tokens with a local tokenizer (tiktoken, with a character-based
+estimate when it is not installed) and fits the system prompt, conversation
+history and retrieved context into a fixed budget.
+"""
+
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+
+
+# Per-message framing overhead used by the chat completions format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    """Load the tiktoken encoding for the configured model once"""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                try:
+                    import tiktoken
+                    try:
+                        _encoder = tiktoken.encoding_for_model(config.OPENAI_MODEL)
+                    except KeyError:
+                        _encoder = tiktoken.get_encoding("o200k_base")
+                except ImportError:
+                    _encoder = False
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in a string"""
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text))
+    # Roughly four characters per token for English text
+    return (len(text) + 3) // 4
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Count tokens for a list of chat messages including framing overhead"""
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens"""
+    if max_tokens <= 0:
+        return ""
+    encoder = _get_encoder()
+    if encoder:
+        tokens = encoder.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return encoder.decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+def trim_history_to_budget(
+    history: List[Dict],
+    max_tokens: int,
+    max_messages: int = None
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Keep the most recent messages that fit into a token budget
+
+    Returns:
+        Tuple of (older messages that did not fit, recent messages that fit)
+    """
+    max_messages = max_messages or len(history)
+    used = 0
+    start = len(history)
+    for i in range(len(history) - 1, -1, -1):
+        if len(history) - i > max_messages:
+            break
+        cost = count_tokens(history[i]["content"]) + MESSAGE_OVERHEAD_TOKENS
+        if used + cost > max_tokens:
+            break
+        used += cost
+        start = i
+    return history[:start], history[start:]
+
+
+class PromptBuilder:
+    """Assembles chat messages that stay within a token budget"""
+
+    def __init__(
+        self,
+        budget: int = None,
+        history_budget: int = None,
+        summarize: Optional[Callable[[str, List[Dict]], str]] = None
+    ):
+        """
+        Args:
+            budget: Total prompt token budget
+            history_budget: Share of the budget reserved for conversation history
+            summarize: Optional callable (session_key, older_messages) -> summary
+        """
+        self.budget = budget or config.PROMPT_TOKEN_BUDGET
+        self.history_budget = history_budget or config.HISTORY_TOKEN_BUDGET
+        self.summarize = summarize
+
+    def build_history(self, history: List[Dict], session_key: str = None) -> List[Dict]:
+        """Recent turns verbatim, older turns replaced by a rolling summary"""
+        if not history:
+            return []
+
+        summary_messages = []
+        older, recent = trim_history_to_budget(
+            history, self.history_budget, config.HISTORY_MAX_MESSAGES
+        )
+        if older and self.summarize:
+            # Reserve room for the summary before choosing the verbatim turns,
+            # so every older turn ends up either verbatim or summarized
+            summary_reserve = config.HISTORY_SUMMARY_MAX_TOKENS + 2 * MESSAGE_OVERHEAD_TOKENS + 8
+            older, recent = trim_history_to_budget(
+                history, self.history_budget - summary_reserve, config.HISTORY_MAX_MESSAGES
+            )
+            summary = self.summarize(session_key, older)
+            if summary:
+                summary_messages = [{
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation: {summary}"
+                }]
+
+        return summary_messages + [
+            {"role": m["role"], "content": m["content"]} for m in recent
+        ]
+
+    def fit_context(self, chunks: List[str], max_tokens: int, separator: str = "") -> List[str]:
+        """
+        Fit ranked chunks (best first) into max_tokens
+
+        Lowest-ranked chunks are dropped first; the last chunk that only
+        partly fits is truncated when enough room is left to be useful.
+        """
+        fitted = []
+        used = 0
+        separator_cost = count_tokens(separator) if separator else 0
+        for chunk in chunks:
+            if fitted:
+                used += separator_cost
+            cost = count_tokens(chunk)
+            if used + cost <= max_tokens:
+                fitted.append(chunk)
+                used += cost
+                continue
+            remaining = max_tokens - used
+            if remaining >= config.MIN_CHUNK_TOKENS:
+                fitted.append(truncate_to_tokens(chunk, remaining))
+            break
+        return fitted
+
+    def build(
+        self,
+        system_prompt: Optional[str],
+        user_template: str,
+        question: str,
+        history: List[Dict],
+        chunks: List[str] = None,
+        session_key: str = None,
+        separator: str = "\n---\n"
+    ) -> Dict:
+        """
+        Build the message list for a completion
+
+        Args:
+            system_prompt: System message, or None to omit it
+            user_template: Template with {question} and, for RAG, {context}
+            question: Current user question
+            history: Prior conversation messages
+            chunks: Retrieved chunk texts ordered best first
+            session_key: Key under which the rolling summary is cached
+
+        Returns:
+            Dict with messages, prompt_tokens and chunks_used
+        """
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        messages.extend(self.build_history(history, session_key))
+
+        chunks_used = 0
+        if chunks is None:
+            user_content = user_template.format(question=question)
+        else:
+            skeleton = user_template.format(context="", question=question)
+            fixed = count_message_tokens(messages + [{"role": "user", "content": skeleton}])
+            fitted = self.fit_context(chunks, self.budget - fixed, separator)
+            chunks_used = len(fitted)
+            user_content = user_template.format(
+                context=separator.join(fitted),
+                question=question
+            )
+
+        messages.append({"role": "user", "content": user_content})
+
+        return {
+            "messages": messages,
+            "prompt_tokens": count_message_tokens(messages),
+            "chunks_used": chunks_used
+        }
+
+    def build_cacheable(
+        self,
+        static_prompt: str,
+        context_template: str,
+        question_template: str,
+        question: str,
+        history: List[Dict],
+        chunks: List[str],
+        chunk_keys: List = None,
+        session_key: str = None,
+        separator: str = "\n---\n"
+    ) -> Dict:
+        """
+        Build a RAG prompt whose longest stable part comes first, so the
+        provider's prompt-prefix cache can reuse it across requests
+
+        Layout: static system prompt, retrieved context (as a second system
+        message), conversation history, then the question. Chunks are fitted
+        best first, then the kept ones are put in chunk_keys order so the
+        same retrieved set always renders the same context.
+
+        Args:
+            static_prompt: System prompt plus any per-route guidance
+            context_template: Template with {context}
+            question_template: Template with {question}
+            chunks: Retrieved chunk texts ordered best first
+            chunk_keys: Sort key per chunk for a deterministic order (optional)
+
+        Returns:
+            Dict with messages, prompt_tokens, chunks_used and
+            stable_prefix_tokens (the system prompt and context)
+        """
+        history_messages = self.build_history(history, session_key)
+        question_message = {"role": "user", "content": question_template.format(question=question)}
+        static_message = {"role": "system", "content": static_prompt}
+
+        skeleton = {"role": "system", "content": context_template.format(context="")}
+        fixed = count_message_tokens([static_message, skeleton, *history_messages, question_message])
+        fitted = self.fit_context(chunks, self.budget - fixed, separator)
+
+        order = list(range(len(fitted)))
+        if chunk_keys is not None:
+            order.sort(key=lambda i: chunk_keys[i])
+        context_message = {
+            "role": "system",
+            "content": context_template.format(context=separator.join(fitted[i] for i in order))
+        }
+
+        messages = [static_message, context_message, *history_messages, question_message]
+        return {
+            "messages": messages,
+            "prompt_tokens": count_message_tokens(messages),
+            "chunks_used": len(fitted),
+            "stable_prefix_tokens": count_message_tokens([static_message, context_message])
+        }
@@ -34,6 +34,38 @@ ROUTER_USER_TEMPLATE = """Classify this question: {question}
 
 Category:"""
 
+ROUTER_CONTEXT_TEMPLATE = """Earlier questions in this conversation (for resolving references only):
+{snippets}
+
+Classify this question: {question}
+
+Category:"""
+
+
+SINGLE_CALL_SYSTEM_PROMPT = """You are a helpful AI assistant for employee onboarding and training.
+
+For each question, pick ONE route and answer in the same reply:
+- general_company: mission, values, culture, work hours, norms, organization
+- role_specific: job roles, responsibilities, role-specific tools and expectations
+- admin_policy: HR policies, expenses, leave, IT access, timesheets, travel, onboarding, compliance
+- direct_llm: out of scope, real-time actions, personal or private details, greetings
+
+Excerpts from each route's best-matching documents are provided. For the first
+three routes, answer ONLY from the excerpts of the route you chose and list the
+source files you used; if they do not contain the answer, say "I don't have that
+information in the knowledge base." For direct_llm, reply briefly and politely,
+explain what you can help with, and leave sources empty.
+
+Be concise, friendly and professional. Do not put citations in the answer text."""
+
+SINGLE_CALL_USER_TEMPLATE = """Document excerpts by route:
+
+{context}
+
+---
+
+Question: {question}"""
+
 
 RAG_SYSTEM_PROMPT = """You are a helpful AI assistant for employee onboarding and training.
 
@@ -50,13 +82,23 @@ Guidelines:
 
 Format your answer clearly without any source notations."""
 
-RAG_USER_TEMPLATE = """Context from company documents:
+# The RAG prompt is laid out for upstream prompt-prefix caching: the static
+# system prompt and route guidance come first, then the retrieved context in
+# a fixed order, and only then the volatile history and question
+ROUTE_GUIDANCE = {
+    "general_company": """Topic: general company information (mission, values, culture, work hours, norms).
+Quote concrete times, names and norms exactly as the documents state them.""",
+    "role_specific": """Topic: job roles (responsibilities, tools, expectations, career paths).
+Say which role the information applies to; do not generalize one role's duties to others.""",
+    "admin_policy": """Topic: HR and administrative policies and processes (leave, expenses, IT access, travel, timesheets, onboarding, compliance).
+Give the steps, limits and deadlines as written; mention who approves or whom to contact when the documents say so.""",
+}
 
-{context}
+RAG_CONTEXT_TEMPLATE = """Context from company documents:
 
----
+{context}"""
 
-Question: {question}
+RAG_QUESTION_TEMPLATE = """Question: {question}
 
 Important: Provide a direct answer WITHOUT including any [source: ...] citations or references. Sources will be displayed separately.
 
@@ -77,4 +119,26 @@ Be brief, friendly, and helpful.
 
 Question: {question}
 
-Response:"""
\ No newline at end of file
+Response:"""
+
+FAQ_GENERATION_PROMPT = """You write the FAQ for one section of an internal onboarding document.
+
+Document: {source_file}
+Section: {heading_path}
+
+{text}
+
+---
+
+List up to {count} questions a new employee is likely to ask that this section fully answers, phrased the way an employee would ask them. For each, write a concise answer that uses ONLY facts stated in the section, with exact figures, times and names. Skip questions the section only partly answers. Do not include citations in the answers."""
+
+
+HISTORY_SUMMARY_PROMPT = """Update the running summary of an employee onboarding conversation.
+
+Current summary:
+{summary}
+
+New turns to fold in:
+{new_turns}
+
+Write a short summary (at most 5 sentences) that keeps the topics asked about, facts already given and any open follow-ups. Return only the summary."""
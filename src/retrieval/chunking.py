@@ -0,0 +1,174 @@
+# src/retrieval/chunking.py
+"""
+Structure-aware Markdown chunking.
+
+Documents are split on their heading hierarchy instead of at fixed character
+offsets. Small neighbouring sections are packed together up to the chunk
+size, oversized sections are split on paragraph/line boundaries, and every
+chunk carries its heading path so answers can cite `file.md#Section`.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+
+
+@dataclass
+class Section:
+    """A heading and the text that belongs to it"""
+    path: List[str]
+    text: str
+
+    @property
+    def title(self) -> str:
+        return self.path[-1] if self.path else ""
+
+
+@dataclass
+class MarkdownChunk:
+    """Packed text for one or more consecutive sections"""
+    text: str
+    sections: List[Section] = field(default_factory=list)
+
+    @property
+    def heading_path(self) -> str:
+        return " > ".join(self.sections[0].path) if self.sections else ""
+
+
+def parse_sections(text: str) -> List[Section]:
+    """Split Markdown into sections by heading, tracking the heading path"""
+    sections = []
+    path: List[str] = []
+    levels: List[int] = []
+    lines: List[str] = []
+    in_code = False
+
+    def flush():
+        body = "\n".join(lines).strip()
+        # Heading-only sections (e.g. a document title) live on in the path
+        if body and not ("\n" not in body and HEADING_RE.match(body)):
+            sections.append(Section(path=list(path), text=body))
+
+    for line in text.splitlines():
+        if line.strip().startswith("```"):
+            in_code = not in_code
+        match = None if in_code else HEADING_RE.match(line)
+        if match:
+            flush()
+            lines = []
+            level = len(match.group(1))
+            while levels and levels[-1] >= level:
+                levels.pop()
+                path.pop()
+            levels.append(level)
+            path.append(match.group(2).strip())
+        lines.append(line)
+    flush()
+    return sections
+
+
+def _split_oversized(section: Section, chunk_size: int) -> List[str]:
+    """Split a section that exceeds chunk_size on paragraph, then line, boundaries"""
+    heading_line = section.text.splitlines()[0] if HEADING_RE.match(section.text.splitlines()[0]) else ""
+    pieces: List[str] = []
+    current = ""
+    for separator in ("\n\n", "\n"):
+        units = section.text.split(separator)
+        if max(len(u) for u in units) <= chunk_size:
+            break
+    for unit in units:
+        # Last resort for a single over-long line, after the text before it
+        if len(unit) > chunk_size:
+            if current:
+                pieces.append(current)
+                current = ""
+            while len(unit) > chunk_size:
+                pieces.append(unit[:chunk_size])
+                unit = unit[chunk_size:]
+        candidate = f"{current}{separator}{unit}" if current else unit
+        if len(candidate) <= chunk_size:
+            current = candidate
+        else:
+            pieces.append(current)
+            # Continuation pieces repeat the heading so they stay self-describing
+            current = f"{heading_line}\n{unit}" if heading_line and len(heading_line) + len(unit) < chunk_size else unit
+    if current:
+        pieces.append(current)
+    return [p for p in pieces if p.strip()]
+
+
+class MarkdownSectionSplitter:
+    """Chunk Markdown by heading hierarchy, packing small sections up to chunk_size"""
+
+    def __init__(self, chunk_size: int = 500):
+        self.chunk_size = chunk_size
+
+    def split_text(self, text: str) -> List[MarkdownChunk]:
+        """Split one Markdown document into packed chunks"""
+        chunks: List[MarkdownChunk] = []
+        current: MarkdownChunk = None
+
+        for section in parse_sections(text):
+            if len(section.text) > self.chunk_size:
+                if current:
+                    chunks.append(current)
+                    current = None
+                chunks.extend(
+                    MarkdownChunk(text=piece, sections=[section])
+                    for piece in _split_oversized(section, self.chunk_size)
+                )
+                continue
+
+            if current and len(current.text) + 2 + len(section.text) <= self.chunk_size:
+                current.text = f"{current.text}\n\n{section.text}"
+                current.sections.append(section)
+            else:
+                if current:
+                    chunks.append(current)
+                current = MarkdownChunk(text=section.text, sections=[section])
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def split_documents(self, documents: List) -> List:
+        """
+        Split langchain Documents, adding heading metadata to each chunk
+
+        Metadata added: heading_path, section, sections and citations
+        (`file.md#Section` entries separated by "; ").
+        """
+        chunks = []
+        for doc in documents:
+            source_file = doc.metadata.get("source_file", "unknown")
+            for index, chunk in enumerate(self.split_text(doc.page_content)):
+                titles = [s.title for s in chunk.sections]
+                metadata = dict(doc.metadata)
+                metadata.update({
+                    "heading_path": chunk.heading_path,
+                    "section": titles[0],
+                    "sections": "; ".join(titles),
+                    "citations": "; ".join(f"{source_file}#{title}" for title in titles),
+                    "chunk_index": index,
+                })
+                chunks.append(type(doc)(page_content=chunk.text, metadata=metadata))
+        return chunks
+
+
+def document_citations(doc) -> List[str]:
+    """Section-precise citations for a retrieved chunk"""
+    citations = doc.metadata.get("citations")
+    if citations:
+        return citations.split("; ")
+    return [doc.metadata.get("source_file", "unknown")]
+
+
+def chunk_sort_key(doc) -> tuple:
+    """Document order for a chunk (file, then position), independent of its rank"""
+    return (
+        doc.metadata.get("source_files") or doc.metadata.get("source_file", ""),
+        doc.metadata.get("chunk_index", 0),
+        doc.page_content,
+    )
@@ -0,0 +1,191 @@
+# src/retrieval/dedup.py
+"""
+Chunk-level deduplication for retrieval.
+
+Ingestion: near-duplicate chunks within a route are found with MinHash over
+word shingles (LSH banding for candidates, exact Jaccard to confirm) and
+stored once, with every contributing file recorded in the metadata.
+
+Query time: maximal marginal relevance (MMR) selection over the over-fetched
+candidates, so near-identical passages do not all end up in the prompt.
+"""
+
+import hashlib
+import re
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+# Mersenne prime used for the universal hash family
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations(num_perm: int) -> List[Tuple[int, int]]:
+    """Deterministic (a, b) coefficients for the MinHash permutations"""
+    coefficients = []
+    for i in range(num_perm):
+        digest = hashlib.sha1(f"minhash-{i}".encode()).digest()
+        a = int.from_bytes(digest[:8], "big") % _PRIME or 1
+        b = int.from_bytes(digest[8:16], "big") % _PRIME
+        coefficients.append((a, b))
+    return coefficients
+
+
+_PERMUTATIONS = _permutations(NUM_PERMUTATIONS)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> FrozenSet[str]:
+    """Word shingles of normalized text"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return frozenset([" ".join(words)]) if words else frozenset()
+    return frozenset(" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash_signature(shingle_set: FrozenSet[str]) -> Tuple[int, ...]:
+    """MinHash signature of a shingle set"""
+    if not shingle_set:
+        return tuple([_MAX_HASH] * NUM_PERMUTATIONS)
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+        for s in shingle_set
+    ]
+    return tuple(
+        min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def find_duplicate_groups(texts: Sequence[str], threshold: float = 0.8) -> List[List[int]]:
+    """
+    Group indices of texts whose shingle Jaccard similarity is >= threshold
+
+    Returns:
+        Groups of indices; the first index in each group is the representative
+    """
+    shingle_sets = [shingles(t) for t in texts]
+    signatures = [minhash_signature(s) for s in shingle_sets]
+
+    # LSH banding: texts that agree on any full band become candidates
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    buckets: Dict[Tuple, List[int]] = {}
+    for idx, signature in enumerate(signatures):
+        for band in range(LSH_BANDS):
+            key = (band,) + signature[band * rows:(band + 1) * rows]
+            buckets.setdefault(key, []).append(idx)
+
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    for members in buckets.values():
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                pair = (members[i], members[j])
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if jaccard(shingle_sets[pair[0]], shingle_sets[pair[1]]) >= threshold:
+                    root_i, root_j = find(pair[0]), find(pair[1])
+                    if root_i != root_j:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups: Dict[int, List[int]] = {}
+    for idx in range(len(texts)):
+        groups.setdefault(find(idx), []).append(idx)
+    return list(groups.values())
+
+
+def deduplicate_chunks(chunks: List, threshold: float = 0.8) -> List:
+    """
+    Collapse exact and near-duplicate chunks into one chunk each
+
+    The first chunk of every group is kept; `source_files` on it lists all
+    files the group came from (comma-separated, since Chroma metadata values
+    must be scalars) and `citations` all of the group's section citations.
+    """
+    groups = find_duplicate_groups([c.page_content for c in chunks], threshold)
+    kept = []
+    for group in sorted(groups, key=lambda g: g[0]):
+        representative = chunks[group[0]]
+        source_files = []
+        citations = []
+        for idx in group:
+            metadata = chunks[idx].metadata
+            source = metadata.get("source_file", "unknown")
+            if source not in source_files:
+                source_files.append(source)
+            for citation in metadata.get("citations", "").split("; "):
+                if citation and citation not in citations:
+                    citations.append(citation)
+        representative.metadata["source_files"] = ",".join(source_files)
+        if citations:
+            representative.metadata["citations"] = "; ".join(citations)
+        representative.metadata["duplicate_count"] = len(group)
+        kept.append(representative)
+    return kept
+
+
+def document_sources(doc) -> List[str]:
+    """All source files a (possibly deduplicated) chunk stands for"""
+    source_files = doc.metadata.get("source_files")
+    if source_files:
+        return source_files.split(",")
+    return [doc.metadata.get("source_file", "unknown")]
+
+
+def mmr_select(
+    candidates: List[Tuple[object, float]],
+    k: int,
+    lambda_mult: float = 0.7,
+    duplicate_threshold: float = 0.8
+) -> List:
+    """
+    Maximal marginal relevance selection over (doc, relevance) pairs
+
+    Candidates at or above duplicate_threshold similarity to an already
+    selected chunk are skipped outright.
+
+    Returns:
+        Up to k documents, in selection order
+    """
+    if not candidates:
+        return []
+
+    shingle_sets = [shingles(doc.page_content) for doc, _ in candidates]
+    remaining = list(range(len(candidates)))
+    selected: List[int] = []
+
+    while remaining and len(selected) < k:
+        best_idx, best_score = None, None
+        for idx in remaining:
+            redundancy = max(
+                (jaccard(shingle_sets[idx], shingle_sets[s]) for s in selected),
+                default=0.0
+            )
+            if redundancy >= duplicate_threshold:
+                continue
+            score = lambda_mult * candidates[idx][1] - (1 - lambda_mult) * redundancy
+            if best_score is None or score > best_score:
+                best_idx, best_score = idx, score
+        if best_idx is None:
+            break
+        selected.append(best_idx)
+        remaining.remove(best_idx)
+
+    return [candidates[idx][0] for idx in selected]
@@ -0,0 +1,197 @@
+# src/retrieval/embeddings.py
+"""
+Pluggable embedding providers behind VectorStore.embeddings.
+
+Every provider exposes the `embed_documents` / `embed_query` interface that
+the langchain Chroma wrapper expects, plus a `name` that is stored in the
+collection metadata so vectors from different providers are never mixed.
+
+Providers:
+    openai   - remote text-embedding-3-* models (batched requests), optionally
+               shortened to EMBEDDING_DIMENSIONS
+    onnx     - local all-MiniLM-L6-v2 via the ONNX runtime bundled with chromadb
+    hashing  - local signed feature-hashing vectorizer, no model download
+    local    - onnx when it can be loaded, otherwise hashing
+"""
+
+import hashlib
+import math
+import re
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.utils.clients import get_resilient_client
+from src.utils.scheduler import BACKGROUND, call_context
+from src.utils.singleflight import flight_group, request_key
+from src.retrieval.micro_batcher import MicroBatcher
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU of query text -> vector, stored as packed doubles"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._vectors: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text: str):
+        with self._lock:
+            vector = self._vectors.get(text)
+            if vector is None:
+                return None
+            self._vectors.move_to_end(text)
+        return vector.tolist()
+
+    def put(self, text: str, vector: List[float]):
+        if self.max_size <= 0:
+            return
+        packed = array("d", vector)
+        with self._lock:
+            self._vectors[text] = packed
+            self._vectors.move_to_end(text)
+            while len(self._vectors) > self.max_size:
+                self._vectors.popitem(last=False)
+
+
+class EmbeddingProvider:
+    """Base class for embedding backends"""
+
+    name = "base"
+    # Set by providers whose per-request overhead makes batching queries pay
+    query_batcher = None
+
+    def __init__(self, batch_size: int = None, num_threads: int = None):
+        self.batch_size = batch_size or config.EMBEDDING_BATCH_SIZE
+        self.num_threads = num_threads or config.EMBEDDING_THREADS
+        self.query_cache = QueryEmbeddingCache(config.QUERY_EMBEDDING_CACHE_SIZE)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts in batches, running up to num_threads batches at once.
+        Indexing is background work, so live questions go first.
+        """
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+        def embed(batch):
+            with call_context(BACKGROUND, "indexing"):
+                return self._embed_batch(batch)
+
+        if len(batches) <= 1 or self.num_threads <= 1:
+            return [vector for batch in batches for vector in embed(batch)]
+        with ThreadPoolExecutor(max_workers=self.num_threads) as pool:
+            results = pool.map(embed, batches)
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text: str) -> List[float]:
+        # A question is embedded once whether the FAQ lookup or retrieval asks first
+        vector = self.query_cache.get(text)
+        if vector is None:
+            # Identical queries in flight at the same time share one embedding call
+            vector = flight_group("embedding").do(request_key(self.name, text), lambda: self._embed_one_query(text))
+            self.query_cache.put(text, vector)
+        return vector
+
+    def _embed_one_query(self, text: str) -> List[float]:
+        if self.query_batcher is not None:
+            return self.query_batcher.submit(text)
+        return self._embed_batch([text])[0]
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Remote OpenAI embedding model"""
+
+    def __init__(self, model: str = None, dimensions: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self.model = model or config.EMBEDDING_MODEL
+        self.dimensions = config.EMBEDDING_DIMENSIONS if dimensions is None else dimensions
+        self.name = f"openai:{self.model}" + (f":{self.dimensions}" if self.dimensions else "")
+        self.client = get_resilient_client()
+        if config.EMBEDDING_MICRO_BATCH_WAIT_MS > 0:
+            self.query_batcher = MicroBatcher(
+                self._embed_batch,
+                max_batch_size=config.EMBEDDING_MICRO_BATCH_SIZE,
+                max_wait_ms=config.EMBEDDING_MICRO_BATCH_WAIT_MS
+            )
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        params = {"dimensions": self.dimensions} if self.dimensions else {}
+        response = self.client.embeddings(
+            timeout=config.EMBEDDING_TIMEOUT_SECONDS, model=self.model, input=texts, **params
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+class OnnxEmbeddingProvider(EmbeddingProvider):
+    """Local all-MiniLM-L6-v2 on CPU through chromadb's ONNX runtime wrapper"""
+
+    name = "onnx:all-MiniLM-L6-v2"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+        self.model = ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [[float(x) for x in vector] for vector in self.model(texts)]
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Signed feature hashing over word unigrams and bigrams
+
+    Needs no model download and runs anywhere; retrieval quality is lexical
+    rather than semantic, so it suits offline and test deployments.
+    """
+
+    def __init__(self, dimension: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self.dimension = dimension or config.HASHING_EMBEDDING_DIM
+        self.name = f"hashing:{self.dimension}"
+
+    def _embed_one(self, text: str) -> List[float]:
+        words = re.findall(r"\w+", text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vector = [0.0] * self.dimension
+        for feature in features:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+            sign = 1.0 if digest & 1 else -1.0
+            vector[(digest >> 1) % self.dimension] += sign
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed_one(text) for text in texts]
+
+
+def create_embedding_provider(provider: str = None) -> EmbeddingProvider:
+    """Create the configured embedding provider"""
+    provider = (provider or config.EMBEDDING_PROVIDER).lower()
+
+    if provider == "openai":
+        return OpenAIEmbeddingProvider()
+    if provider == "onnx":
+        return OnnxEmbeddingProvider()
+    if provider == "hashing":
+        return HashingEmbeddingProvider()
+    if provider == "local":
+        try:
+            provider = OnnxEmbeddingProvider()
+            # The model is downloaded on first use, so load it here
+            provider.embed_query("warm-up")
+            return provider
+        except Exception as e:
+            print(f"⚠️ ONNX embeddings unavailable ({e}), using hashing embeddings")
+            return HashingEmbeddingProvider()
+
+    raise ValueError(f"❌ Unknown embedding provider: {provider}")
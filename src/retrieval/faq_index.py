@@ -0,0 +1,287 @@
+# src/retrieval/faq_index.py
+"""
+Pre-generated FAQ answers for predictable onboarding questions.
+
+An offline build step asks the model, once per corpus section, for the
+questions that section fully answers and an answer grounded in it. Each
+entry cites its section (`file.md#Section`) and records a hash of the
+section text and generation prompt:
+
+- a rebuild regenerates only sections whose hash changed and drops
+  sections that no longer exist;
+- at load time, entries whose section changed since the build are
+  ignored, so a stale answer is never served.
+
+FAQIndex.lookup tries an exact match on the normalized question, then
+the nearest stored question by embedding. The assistant serves a match
+at or above FAQ_MATCH_THRESHOLD without any LLM generation.
+
+Usage:
+    python src/retrieval/faq_index.py build [--force]
+    python src/retrieval/faq_index.py lookup "How do I submit expenses?"
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.utils.singleflight import normalize_text
+from src.retrieval.chunking import parse_sections
+from src.prompts.templates import FAQ_GENERATION_PROMPT
+
+FAQ_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "pairs": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"question": {"type": "string"}, "answer": {"type": "string"}},
+                "required": ["question", "answer"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["pairs"],
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {"type": "json_schema", "json_schema": {"name": "section_faq", "strict": True, "schema": FAQ_SCHEMA}}
+
+
+def section_hash(text: str) -> str:
+    """Changes when the section text or the generation prompt changes"""
+    payload = f"{FAQ_GENERATION_PROMPT}\n{text}".encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def corpus_sections(manifest: Dict, corpus_dir: Path = None) -> Dict[str, Dict]:
+    """
+    Every Markdown section of the RAG routes' documents
+
+    Returns:
+        Citation (`file.md#Section`) -> route, source_file, heading_path,
+        text and hash, in corpus order
+    """
+    corpus_dir = corpus_dir or config.CORPUS_DIR
+    sections = {}
+    for route, route_info in manifest["routes"].items():
+        for path_str in route_info.get("suggested_paths", []):
+            folder = Path(path_str) if Path(path_str).is_absolute() else corpus_dir / path_str.replace("corpus/", "")
+            for path in sorted(folder.glob("*.md")):
+                for section in parse_sections(path.read_text(encoding="utf-8")):
+                    citation = f"{path.name}#{section.title}"
+                    # Repeated headings in one file get a numbered citation
+                    key, n = citation, 2
+                    while key in sections:
+                        key, n = f"{citation} ({n})", n + 1
+                    sections[key] = {
+                        "route": route,
+                        "source_file": path.name,
+                        "citation": citation,
+                        "heading_path": " > ".join(section.path),
+                        "text": section.text,
+                        "hash": section_hash(section.text),
+                    }
+    return sections
+
+
+def _normalized(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class FAQIndex:
+    """Exact and nearest-neighbour lookup over pre-generated FAQ answers"""
+
+    def __init__(self, embeddings, path: Path = None, threshold: float = None):
+        """
+        Args:
+            embeddings: Embedding provider for questions (its name is stored
+                with the index; vectors from another provider are not used)
+            path: JSON file holding the index (defaults to config)
+            threshold: Minimum cosine similarity for a nearest-neighbour match
+        """
+        self.embeddings = embeddings
+        self.path = Path(path or config.FAQ_INDEX_PATH)
+        self.threshold = config.FAQ_MATCH_THRESHOLD if threshold is None else threshold
+        self.sections: Dict[str, Dict] = {}
+        self.stale_sections = 0
+        self._exact: Dict[str, Dict] = {}
+        self._entries: List[Dict] = []
+        self._vectors: List[List[float]] = []
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def _read(self) -> Dict:
+        if not self.path.exists():
+            return {"embedding_provider": None, "sections": {}}
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def load(self, current: Dict[str, Dict]) -> "FAQIndex":
+        """
+        Load entries whose section is unchanged in `current` (corpus_sections output)
+        """
+        stored = self._read()
+        same_provider = stored.get("embedding_provider") == self.embeddings.name
+        self.sections = {
+            key: section for key, section in stored["sections"].items()
+            if key in current and current[key]["hash"] == section["hash"]
+        }
+        self.stale_sections = len(stored["sections"]) - len(self.sections)
+
+        self._exact, self._entries, self._vectors = {}, [], []
+        for key, section in self.sections.items():
+            for pair in section["pairs"]:
+                entry = {
+                    "question": pair["question"],
+                    "answer": pair["answer"],
+                    "route": section["route"],
+                    "source_file": section["source_file"],
+                    "citation": section["citation"],
+                }
+                self._exact.setdefault(normalize_text(pair["question"]), entry)
+                if same_provider and pair.get("embedding"):
+                    self._entries.append(entry)
+                    self._vectors.append(_normalized(pair["embedding"]))
+        return self
+
+    def build(self, client, current: Dict[str, Dict], force: bool = False) -> Dict:
+        """
+        Generate FAQ entries for new or changed sections and write the index
+
+        Args:
+            client: ResilientClient used for generation
+            current: corpus_sections output
+            force: Regenerate every section
+        Returns:
+            Counts of sections reused, generated, failed and removed
+        """
+        stored = self._read()
+        reuse_vectors = stored.get("embedding_provider") == self.embeddings.name
+        sections, stats = {}, {"reused": 0, "generated": 0, "failed": 0}
+        for key, section in current.items():
+            previous = stored["sections"].get(key)
+            if not force and previous and previous["hash"] == section["hash"]:
+                stats["reused"] += 1
+                if reuse_vectors:
+                    sections[key] = previous
+                    continue
+                # Same answers, embedded with the active provider
+                pairs = [{"question": p["question"], "answer": p["answer"]} for p in previous["pairs"]]
+            else:
+                try:
+                    pairs = self.generate(client, section)
+                except Exception as e:
+                    print(f"   ❌ {key}: {type(e).__name__}: {e}")
+                    stats["failed"] += 1
+                    continue
+                stats["generated"] += 1
+                print(f"   ✅ {key}: {len(pairs)} questions")
+            vectors = self.embeddings.embed_documents([pair["question"] for pair in pairs]) if pairs else []
+            for pair, vector in zip(pairs, vectors):
+                pair["embedding"] = [round(x, 6) for x in vector]
+            sections[key] = {**{k: v for k, v in section.items() if k != "text"}, "pairs": pairs}
+        stats["removed"] = len(set(stored["sections"]) - set(current))
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"embedding_provider": self.embeddings.name, "sections": sections}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+        self.load(current)
+        stats["entries"] = len(self)
+        return stats
+
+    @staticmethod
+    def generate(client, section: Dict) -> List[Dict]:
+        """Questions and grounded answers for one section"""
+        prompt = FAQ_GENERATION_PROMPT.format(
+            source_file=section["source_file"],
+            heading_path=section["heading_path"],
+            text=section["text"],
+            count=config.FAQ_QUESTIONS_PER_SECTION
+        )
+        response = client.chat_completion(
+            timeout=config.route_timeout("faq"),
+            messages=[{"role": "user", "content": prompt}],
+            response_format=RESPONSE_FORMAT,
+            **config.completion_params("faq")
+        )
+        pairs = json.loads(response.choices[0].message.content)["pairs"]
+        return [
+            {"question": pair["question"].strip(), "answer": pair["answer"].strip()}
+            for pair in pairs[:config.FAQ_QUESTIONS_PER_SECTION]
+            if pair["question"].strip() and pair["answer"].strip()
+        ]
+
+    def lookup(self, question: str) -> Optional[Dict]:
+        """
+        Best stored answer for a question, or None below the threshold
+
+        Returns:
+            The entry plus `score` (1.0 for an exact match) and `match`
+            ("exact" or "nearest")
+        """
+        entry = self._exact.get(normalize_text(question))
+        if entry is not None:
+            return {**entry, "score": 1.0, "match": "exact"}
+        if not self._vectors:
+            return None
+
+        query = _normalized(self.embeddings.embed_query(question))
+        best, best_score = None, -1.0
+        for entry, vector in zip(self._entries, self._vectors):
+            score = sum(a * b for a, b in zip(query, vector))
+            if score > best_score:
+                best, best_score = entry, score
+        if best_score < self.threshold:
+            return None
+        return {**best, "score": best_score, "match": "nearest"}
+
+
+def load_faq_index(embeddings) -> FAQIndex:
+    """The FAQ index for the current corpus (empty if it was never built)"""
+    from src.retrieval.vector_store import load_manifest
+    return FAQIndex(embeddings).load(corpus_sections(load_manifest()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generated FAQ answer index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Generate entries for new or changed sections")
+    build.add_argument("--force", action="store_true", help="Regenerate every section")
+    lookup = subparsers.add_parser("lookup", help="Show the match for a question")
+    lookup.add_argument("question")
+    args = parser.parse_args()
+
+    from src.retrieval.embeddings import create_embedding_provider
+    from src.retrieval.vector_store import load_manifest
+    from src.utils.clients import get_resilient_client
+    from src.utils.scheduler import BACKGROUND, call_context
+
+    index = FAQIndex(create_embedding_provider())
+    sections = corpus_sections(load_manifest())
+    if args.command == "build":
+        print(f"📚 Building FAQ index for {len(sections)} sections...")
+        with call_context(BACKGROUND, "faq-build"):
+            stats = index.build(get_resilient_client(), sections, force=args.force)
+        print(f"✅ {stats['entries']} questions: {stats['generated']} sections generated, "
+              f"{stats['reused']} reused, {stats['failed']} failed, {stats['removed']} removed")
+    else:
+        match = index.load(sections).lookup(args.question)
+        print(json.dumps(match, indent=2, ensure_ascii=False) if match else "No match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# src/retrieval/micro_batcher.py
+"""
+Dynamic micro-batching of query embeddings.
+
+Each VectorStore.query embeds one string, and under load every user pays
+for a separate embeddings request even though the endpoint accepts
+arrays. MicroBatcher collects concurrent submissions for up to
+`max_wait_ms` or `max_batch_size` items, sends them as one call and hands
+each caller its own result.
+
+There is no background thread. The first caller to open a batch leads
+it: it waits for the window to close (or the batch to fill), sends the
+request and wakes the others. A batch that is being sent no longer
+accepts items, so later callers open the next batch and several batches
+can be in flight at once.
+"""
+
+import threading
+from typing import Callable, Dict, List, Sequence
+
+
+class _Batch:
+    __slots__ = ("items", "results", "error", "full", "done")
+
+    def __init__(self):
+        self.items: List = []
+        self.results = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item calls into batched calls"""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List], Sequence],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Args:
+            batch_fn: Takes a list of items, returns one result per item in order
+            max_batch_size: Send as soon as this many items are waiting
+            max_wait_ms: Longest the first item of a batch waits for company
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._lock = threading.Lock()
+        self._open = None
+        self._counts = {"items": 0, "batches": 0, "full_batches": 0, "failures": 0, "max_batch": 0}
+
+    def submit(self, item):
+        """Add an item to the open batch and block until its result is ready"""
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch_size:
+                self._open = None
+                batch.full.set()
+
+        if leader:
+            self._send(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index]
+
+    def _send(self, batch: _Batch):
+        batch.full.wait(self.max_wait)
+        with self._lock:
+            if self._open is batch:
+                self._open = None
+            size = len(batch.items)
+            self._counts["items"] += size
+            self._counts["batches"] += 1
+            self._counts["full_batches"] += size >= self.max_batch_size
+            self._counts["max_batch"] = max(self._counts["max_batch"], size)
+
+        try:
+            results = list(self.batch_fn(batch.items))
+            if len(results) != size:
+                raise ValueError(f"Batch function returned {len(results)} results for {size} items")
+            batch.results = results
+        except Exception as e:
+            batch.error = e
+            with self._lock:
+                self._counts["failures"] += 1
+        finally:
+            batch.done.set()
+
+    def stats(self) -> Dict:
+        """Items, upstream batches and the mean batch size so far"""
+        with self._lock:
+            counts = dict(self._counts)
+        counts["mean_batch"] = counts["items"] / counts["batches"] if counts["batches"] else 0.0
+        return counts
@@ -0,0 +1,208 @@
+# src/retrieval/quantized_index.py
+"""
+Compact vector index for one route, used instead of a Chroma collection
+when VECTOR_QUANTIZATION is set.
+
+Chroma keeps every vector as float32 in memory (HNSW). Here only a
+quantized code per chunk stays in memory:
+
+    int8    - one byte per dimension, scaled per dimension (4x smaller)
+    binary  - one bit per dimension, the sign (32x smaller)
+
+A query scans the codes, then rescores the best
+k * QUANTIZED_RESCORE_MULTIPLIER candidates against the full-precision
+vectors, which stay on disk; only the candidate rows are read (directly,
+not through the memory map, whose read-around would page in far more).
+"none" scans the memory-mapped full-precision vectors exactly; the
+benchmark uses it as the baseline.
+
+Distances are squared L2 between unit vectors (2 - 2 cos), the same as
+Chroma's default space, so results drop into the existing MMR path.
+"""
+
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+
+QUANTIZATIONS = ("none", "int8", "binary")
+
+# Code rows scored per step, bounding the float32 temporaries of an int8 scan
+SCAN_BLOCK_ROWS = 1024
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-dimension int8 codes and the scale that maps them back"""
+    scale = np.abs(vectors).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+    return codes, scale.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Sign bits, packed eight dimensions per byte"""
+    return np.packbits(vectors > 0, axis=-1)
+
+
+class QuantizedIndex:
+    """Quantized codes in memory, full-precision vectors memory-mapped from disk"""
+
+    def __init__(self, path: Path, embeddings, quantization: str = None):
+        """
+        Args:
+            path: Directory holding the index files
+            embeddings: Embedding provider for queries (must match the build)
+            quantization: "int8", "binary" or "none" (defaults to config)
+        """
+        self.path = Path(path)
+        self.embeddings = embeddings
+        self.quantization = quantization or config.VECTOR_QUANTIZATION
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"❌ Unknown vector quantization: {self.quantization}")
+        self.documents: List = []
+        self.codes = None
+        self.scale = None
+        self.vectors = None
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def build(self, documents: List) -> "QuantizedIndex":
+        """Embed documents and write the index, replacing any previous one"""
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in documents])
+        return self.build_from_vectors(documents, vectors)
+
+    def build_from_vectors(self, documents: List, vectors) -> "QuantizedIndex":
+        """Write the index for documents already embedded with self.embeddings"""
+        vectors = normalize_rows(vectors)
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        np.save(tmp_path / "vectors.npy", vectors)
+        if self.quantization == "int8":
+            codes, scale = quantize_int8(vectors)
+            np.save(tmp_path / "codes.npy", codes)
+            np.save(tmp_path / "scale.npy", scale)
+        elif self.quantization == "binary":
+            np.save(tmp_path / "codes.npy", quantize_binary(vectors))
+        with open(tmp_path / "documents.json", "w", encoding="utf-8") as f:
+            json.dump([{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+                      f, ensure_ascii=False)
+        with open(tmp_path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "embedding_provider": self.embeddings.name,
+                "quantization": self.quantization,
+                "dimension": int(vectors.shape[1]) if len(vectors) else 0,
+                "count": len(documents),
+            }, f)
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(tmp_path, self.path)
+        return self.load()
+
+    def load(self) -> "QuantizedIndex":
+        """
+        Open an index written by build
+
+        Raises:
+            ValueError: If it was built with another embedding provider or quantization
+        """
+        from langchain_core.documents import Document
+
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["embedding_provider"] != self.embeddings.name or meta["quantization"] != self.quantization:
+            raise ValueError(
+                f"Index '{self.path.name}' was built with '{meta['embedding_provider']}' "
+                f"({meta['quantization']}) but the active settings are '{self.embeddings.name}' "
+                f"({self.quantization}). Reload the corpus."
+            )
+
+        with open(self.path / "documents.json", encoding="utf-8") as f:
+            self.documents = [Document(**item) for item in json.load(f)]
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode="r")
+        if self.quantization != "none":
+            self.codes = np.load(self.path / "codes.npy")
+        if self.quantization == "int8":
+            self.scale = np.load(self.path / "scale.npy")
+        return self
+
+    def size_bytes(self) -> Dict[str, int]:
+        """On-disk size per file"""
+        return {path.name: path.stat().st_size for path in sorted(self.path.iterdir())}
+
+    def _candidate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate similarity of every row to the query, higher is better"""
+        if self.quantization == "binary":
+            # Hamming distance, eight bytes at a time where the width allows
+            codes, packed = self.codes, quantize_binary(query)
+            if codes.shape[1] % 8 == 0:
+                codes, packed = codes.view(np.uint64), packed.view(np.uint64)
+            differing = np.bitwise_count(np.bitwise_xor(codes, packed))
+            return -differing.sum(axis=1, dtype=np.int32).astype(np.float32)
+        if self.quantization == "int8":
+            scaled = query * self.scale
+            return np.concatenate([
+                self.codes[start:start + SCAN_BLOCK_ROWS].astype(np.float32) @ scaled
+                for start in range(0, len(self.codes), SCAN_BLOCK_ROWS)
+            ])
+        return np.asarray(self.vectors @ query)
+
+    def _read_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Full-precision vectors for the given rows, read from disk"""
+        dimension = self.vectors.shape[1]
+        row_bytes = dimension * self.vectors.itemsize
+        with open(self.path / "vectors.npy", "rb") as f:
+            data = bytearray()
+            for row in rows:
+                f.seek(self.vectors.offset + int(row) * row_bytes)
+                data += f.read(row_bytes)
+        return np.frombuffer(bytes(data), dtype=self.vectors.dtype).reshape(len(rows), dimension)
+
+    def search(self, vector: List[float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest rows to a query vector
+
+        Returns:
+            (row indices, squared L2 distances), nearest first
+        """
+        k = min(k, len(self.documents))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = normalize_rows(vector)
+
+        scores = self._candidate_scores(query)
+        n = k if self.quantization == "none" else min(len(scores), k * config.QUANTIZED_RESCORE_MULTIPLIER)
+        candidates = np.argpartition(-scores, n - 1)[:n] if n < len(scores) else np.arange(len(scores))
+        if self.quantization != "none":
+            candidates = np.sort(candidates)
+            scores = self._read_rows(candidates) @ query
+        else:
+            scores = scores[candidates]
+
+        order = np.argsort(-scores, kind="stable")[:k]
+        return candidates[order], 2.0 - 2.0 * scores[order]
+
+    def similarity_search_by_vector_with_relevance_scores(self, vector: List[float], k: int = 4) -> List:
+        indices, distances = self.search(vector, k)
+        return [(self.documents[i], float(d)) for i, d in zip(indices, distances)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List:
+        return self.similarity_search_by_vector_with_relevance_scores(self.embeddings.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4) -> List:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
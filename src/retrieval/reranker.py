@@ -0,0 +1,211 @@
+# src/retrieval/reranker.py
+"""
+Optional reranking of retrieved chunks.
+
+VectorStore.query over-fetches RERANK_FETCH_K candidates by embedding
+similarity; a reranker rescores each (question, chunk) pair and only the
+best RERANK_TOP_N go to the generator, instead of all TOP_K.
+
+Rerankers:
+    onnx     - ms-marco-MiniLM-L-6-v2 cross-encoder on CPU (onnxruntime,
+               weights from the Hugging Face hub on first use)
+    lexical  - pure-Python BM25-style term overlap, no model download
+    local    - onnx when it can be loaded, otherwise lexical
+
+Scores are relevances in [0, 1] and are cached by (question hash, chunk
+id), so repeated and coalesced questions skip the model entirely.
+"""
+
+import hashlib
+import math
+import re
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.utils.singleflight import normalize_text
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it my of on or "
+    "our should the to was we what when where which who why will with you your".split()
+)
+
+
+def chunk_id(doc) -> str:
+    """Stable id of a chunk: its source, position and text"""
+    payload = "\n".join([
+        doc.metadata.get("source_files") or doc.metadata.get("source_file", ""),
+        str(doc.metadata.get("chunk_index", "")),
+        doc.page_content,
+    ])
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class RerankCache:
+    """Thread-safe LRU of reranker scores keyed by (question hash, chunk id)"""
+
+    def __init__(self, max_size: int = 20000):
+        self.max_size = max_size
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[float]:
+        with self._lock:
+            score = self._scores.get(key)
+            if score is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._scores.move_to_end(key)
+            return score
+
+    def put(self, key: Tuple[str, str], score: float):
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_size:
+                self._scores.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._scores), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+class Reranker:
+    """Base class: scores (query, text) pairs, with caching"""
+
+    name = "base"
+
+    def __init__(self, cache: RerankCache = None):
+        self.cache = cache or RerankCache(config.RERANK_CACHE_SIZE)
+
+    def _score_batch(self, query: str, texts: Sequence[str]) -> List[float]:
+        raise NotImplementedError
+
+    def rerank(self, query: str, docs: List, top_n: int = None) -> List[Tuple[object, float]]:
+        """
+        Score documents for a query
+
+        Returns:
+            (doc, relevance in [0, 1]) pairs, best first, at most top_n
+        """
+        query_hash = hashlib.blake2b(f"{self.name}\n{normalize_text(query)}".encode("utf-8"),
+                                     digest_size=12).hexdigest()
+        keys = [(query_hash, chunk_id(doc)) for doc in docs]
+        scores = [self.cache.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            fresh = self._score_batch(query, [docs[i].page_content for i in missing])
+            for i, score in zip(missing, fresh):
+                scores[i] = score
+                self.cache.put(keys[i], score)
+
+        ranked = sorted(zip(docs, scores), key=lambda pair: pair[1], reverse=True)
+        return ranked[:top_n] if top_n else ranked
+
+
+class LexicalReranker(Reranker):
+    """
+    BM25-style overlap of question terms with the chunk, plus a bonus for
+    question bigrams that appear verbatim. A chunk's score depends only on
+    the question and the chunk, so it can be cached.
+    """
+
+    name = "lexical"
+    K1 = 1.2
+    B = 0.75
+    AVERAGE_WORDS = 80
+
+    @staticmethod
+    def _terms(text: str) -> List[str]:
+        return [word for word in re.findall(r"\w+", text.lower()) if word not in STOPWORDS]
+
+    def _score_one(self, query_terms: List[str], text: str) -> float:
+        words = self._terms(text)
+        if not query_terms or not words:
+            return 0.0
+        counts: Dict[str, int] = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        length_norm = 1 - self.B + self.B * len(words) / self.AVERAGE_WORDS
+
+        unique_terms = list(dict.fromkeys(query_terms))
+        term_score = sum(
+            counts.get(term, 0) * (self.K1 + 1) / (counts.get(term, 0) + self.K1 * length_norm)
+            for term in unique_terms
+        ) / (len(unique_terms) * (self.K1 + 1))
+
+        query_bigrams = set(zip(query_terms, query_terms[1:]))
+        bigram_score = (
+            len(query_bigrams & set(zip(words, words[1:]))) / len(query_bigrams) if query_bigrams else 0.0
+        )
+        return 0.8 * term_score + 0.2 * bigram_score
+
+    def _score_batch(self, query: str, texts: Sequence[str]) -> List[float]:
+        query_terms = self._terms(query)
+        return [self._score_one(query_terms, text) for text in texts]
+
+
+class OnnxCrossEncoderReranker(Reranker):
+    """ms-marco-MiniLM-L-6-v2 cross-encoder on CPU through onnxruntime"""
+
+    name = "onnx:ms-marco-MiniLM-L-6-v2"
+    REPO_ID = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    MAX_LENGTH = 512
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        import onnxruntime
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(self.REPO_ID, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.MAX_LENGTH)
+        self.tokenizer.enable_padding()
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = config.EMBEDDING_THREADS
+        self.session = onnxruntime.InferenceSession(
+            hf_hub_download(self.REPO_ID, "onnx/model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {item.name for item in self.session.get_inputs()}
+
+    def _score_batch(self, query: str, texts: Sequence[str]) -> List[float]:
+        import numpy as np
+
+        encodings = self.tokenizer.encode_batch([(query, text) for text in texts])
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+        # Relevance logits -> [0, 1]
+        return [1.0 / (1.0 + math.exp(-float(row[0]))) for row in logits]
+
+
+def create_reranker(provider: str = None) -> Optional[Reranker]:
+    """Create the configured reranker, or None when reranking is off"""
+    provider = (provider or config.RERANKER).lower()
+
+    if provider == "none":
+        return None
+    if provider == "onnx":
+        return OnnxCrossEncoderReranker()
+    if provider == "lexical":
+        return LexicalReranker()
+    if provider == "local":
+        try:
+            return OnnxCrossEncoderReranker()
+        except Exception as e:
+            print(f"⚠️ ONNX reranker unavailable ({e}), using lexical reranking")
+            return LexicalReranker()
+
+    raise ValueError(f"❌ Unknown reranker: {provider}")
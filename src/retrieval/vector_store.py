@@ -1,18 +1,34 @@
 # src/retrieval/vector_store.py
-import chromadb
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+# chromadb and the langchain integrations are imported where they are first
+# used so that importing this module (and the assistant) stays cheap.
 from pathlib import Path
+from functools import lru_cache
+import hashlib
 import json
-from typing import List
+from typing import Dict, List
 import os
 import sys
+import threading
+import time
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.utils.config import config
+from src.retrieval.dedup import deduplicate_chunks, mmr_select
+from src.retrieval.chunking import MarkdownSectionSplitter
+from src.retrieval.embeddings import create_embedding_provider
+from src.retrieval.reranker import create_reranker
+
+
+# Collections built before providers were recorded used the OpenAI default
+LEGACY_EMBEDDING_PROVIDER = "openai:text-embedding-3-small"
+
+
+@lru_cache(maxsize=1)
+def load_manifest() -> Dict:
+    """Read the dataset manifest once per process"""
+    with open(config.MANIFEST_PATH, 'r') as f:
+        return json.load(f)
 
 
 class VectorStore:
@@ -22,11 +38,11 @@ class VectorStore:
         # Validate config
         config.validate()
         
+        import chromadb
+        
         # Initialize embeddings
-        self.embeddings = OpenAIEmbeddings(
-            model=config.EMBEDDING_MODEL,
-            openai_api_key=config.OPENAI_API_KEY
-        )
+        self.embeddings = create_embedding_provider()
+        print(f"   Embedding provider: {self.embeddings.name}")
         
         # Create persist directory
         os.makedirs(config.CHROMA_DIR, exist_ok=True)
@@ -35,23 +51,98 @@ class VectorStore:
         self.client = chromadb.PersistentClient(path=str(config.CHROMA_DIR))
         
         # Load manifest
-        with open(config.MANIFEST_PATH, 'r') as f:
-            self.manifest = json.load(f)
+        self.manifest = load_manifest()
         
         self.collections = {}
+        self._collections_lock = threading.Lock()
+        # Resolved once, by warm-up or the first query; the ONNX model is only
+        # loaded if reranking is on
+        self._reranker = None
+        self._reranker_loaded = False
+        self._reranker_lock = threading.Lock()
+        self.corpus_version = self._corpus_version()
         print(f"✅ Vector Store initialized\n")
     
-    def load_corpus(self):
-        """Load all documents from corpus"""
-        print("="*70)
-        print("📚 LOADING CORPUS INTO CHROMADB")
-        print("="*70 + "\n")
+    def _corpus_version(self, *extra) -> str:
+        """Identifies what retrieval can return: manifest, chunker and embedding provider"""
+        hnsw = {route: config.hnsw_params(route) for route in self.rag_routes()}
+        payload = json.dumps(
+            [self.manifest, config.CHUNKER, self.embeddings.name, config.VECTOR_QUANTIZATION, hnsw, *extra],
+            sort_keys=True
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+    
+    def load_route_documents(self, route_name: str, route_info: Dict) -> List:
+        """Load the Markdown documents for one route, tagged with route metadata"""
+        from langchain_community.document_loaders import DirectoryLoader, TextLoader
+        
+        all_docs = []
+        for path_str in route_info['suggested_paths']:
+            # FIX: Convert relative path to absolute using DATA_DIR
+            if not path_str.startswith(('/', 'C:', 'D:')):  # Relative path
+                # Remove 'corpus/' prefix if exists and reconstruct
+                clean_path = path_str.replace('corpus/', '')
+                path = config.CORPUS_DIR / clean_path
+            else:
+                path = Path(path_str)
+            
+            if not path.exists():
+                print(f"   ⚠️  Path not found: {path}")
+                continue
+            
+            print(f"   📖 Loading: {path}")
+            
+            try:
+                loader = DirectoryLoader(
+                    str(path),
+                    glob="*.md",
+                    loader_cls=TextLoader,
+                    loader_kwargs={'autodetect_encoding': True}
+                )
+                docs = loader.load()
+                
+                # Add metadata
+                for doc in docs:
+                    doc.metadata['route'] = route_name
+                    doc.metadata['source_file'] = Path(doc.metadata.get('source', '')).name
+                
+                all_docs.extend(docs)
+                print(f"      ✅ {len(docs)} documents")
+                
+            except Exception as e:
+                print(f"      ❌ Error: {e}")
+        
+        return all_docs
+    
+    @staticmethod
+    def split_documents(docs: List, chunker: str = None) -> List:
+        """
+        Split documents into chunks
+        
+        Args:
+            docs: Documents to split
+            chunker: "markdown" (heading-aware, default) or "recursive" (fixed-size)
+        """
+        chunker = chunker or config.CHUNKER
+        if chunker == "markdown":
+            return MarkdownSectionSplitter(chunk_size=config.CHUNK_SIZE).split_documents(docs)
+        
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
         
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=config.CHUNK_SIZE,
             chunk_overlap=config.CHUNK_OVERLAP,
             separators=["\n\n", "\n", ". ", " ", ""]
         )
+        return text_splitter.split_documents(docs)
+    
+    def load_corpus(self):
+        """Load all documents from corpus"""
+        print("="*70)
+        print("📚 LOADING CORPUS INTO CHROMADB")
+        print("="*70 + "\n")
+        
+        from langchain_community.vectorstores import Chroma
         
         routes = self.manifest['routes']
         total_chunks = 0
@@ -61,50 +152,21 @@ class VectorStore:
                 continue
             
             print(f"📂 Route: {route_name}")
-            all_docs = []
-            
-            for path_str in route_info['suggested_paths']:
-                # FIX: Convert relative path to absolute using DATA_DIR
-                if not path_str.startswith(('/', 'C:', 'D:')):  # Relative path
-                    # Remove 'corpus/' prefix if exists and reconstruct
-                    clean_path = path_str.replace('corpus/', '')
-                    path = config.CORPUS_DIR / clean_path
-                else:
-                    path = Path(path_str)
-                
-                if not path.exists():
-                    print(f"   ⚠️  Path not found: {path}")
-                    continue
-                
-                print(f"   📖 Loading: {path}")
-                
-                try:
-                    loader = DirectoryLoader(
-                        str(path),
-                        glob="*.md",
-                        loader_cls=TextLoader,
-                        loader_kwargs={'autodetect_encoding': True}
-                    )
-                    docs = loader.load()
-                    
-                    # Add metadata
-                    for doc in docs:
-                        doc.metadata['route'] = route_name
-                        doc.metadata['source_file'] = Path(doc.metadata.get('source', '')).name
-                    
-                    all_docs.extend(docs)
-                    print(f"      ✅ {len(docs)} documents")
-                    
-                except Exception as e:
-                    print(f"      ❌ Error: {e}")
+            all_docs = self.load_route_documents(route_name, route_info)
             
             if not all_docs:
                 print(f"   ⚠️  No documents for {route_name}\n")
                 continue
             
             # Split into chunks
-            chunks = text_splitter.split_documents(all_docs)
-            print(f"   ✂️  Created {len(chunks)} chunks")
+            chunks = self.split_documents(all_docs)
+            print(f"   ✂️  Created {len(chunks)} chunks ({config.CHUNKER} chunker)")
+            
+            # Store exact/near-duplicate chunks (across files in the route) once
+            split_count = len(chunks)
+            chunks = deduplicate_chunks(chunks, config.DEDUP_THRESHOLD)
+            if len(chunks) < split_count:
+                print(f"   🧹 Merged {split_count - len(chunks)} duplicate chunks")
             total_chunks += len(chunks)
             
             # Create collection
@@ -115,43 +177,216 @@ class VectorStore:
             except:
                 pass
             
+            if config.VECTOR_QUANTIZATION != "none":
+                from src.retrieval.quantized_index import QuantizedIndex
+                
+                self.collections[route_name] = QuantizedIndex(
+                    self._quantized_path(route_name), self.embeddings
+                ).build(chunks)
+                print(f"   ✅ {config.VECTOR_QUANTIZATION} index created\n")
+                continue
+            
             vectorstore = Chroma.from_documents(
                 documents=chunks,
                 embedding=self.embeddings,
                 collection_name=collection_name,
-                persist_directory=str(config.CHROMA_DIR)
+                persist_directory=str(config.CHROMA_DIR),
+                collection_metadata={
+                    "embedding_provider": self.embeddings.name,
+                    **config.hnsw_metadata(route_name)
+                }
             )
             
             self.collections[route_name] = vectorstore
-            print(f"   ✅ Collection created\n")
+            print(f"   ✅ Collection created ({self._describe_hnsw(route_name)})\n")
+        
+        # Answers generated against the previous collections are not shared
+        self.corpus_version = self._corpus_version(time.time())
         
         print("="*70)
         print(f"✅ LOADED {total_chunks} TOTAL CHUNKS ACROSS {len(self.collections)} COLLECTIONS")
         print("="*70 + "\n")
     
-    def query(self, query_text: str, route: str, k: int = None) -> List:
-        """Query a specific route"""
-        k = k or config.TOP_K
+    def rag_routes(self) -> List[str]:
+        """Routes that are backed by a collection"""
+        return [route for route in self.manifest['routes'] if route != "direct_llm"]
+    
+    @staticmethod
+    def _describe_hnsw(route: str) -> str:
+        return ", ".join(f"{name}={value}" for name, value in config.hnsw_params(route).items())
+    
+    def _open_collection(self, route: str):
+        """
+        Check a stored collection before it is queried
         
-        if route not in self.collections:
-            collection_name = f"{route}_docs"
-            try:
+        Refuses a collection embedded with a different provider, and applies
+        the configured search_ef, the one HNSW setting that can change
+        without rebuilding. A different space, M or construction_ef only
+        takes effect on reload, so it is reported.
+        """
+        try:
+            collection = self.client.get_collection(f"{route}_docs")
+        except Exception:
+            return  # Collection does not exist yet
+        metadata = collection.metadata or {}
+        
+        stored = metadata.get("embedding_provider", LEGACY_EMBEDDING_PROVIDER)
+        if stored != self.embeddings.name:
+            raise ValueError(
+                f"Collection '{route}_docs' was embedded with '{stored}' but the "
+                f"active provider is '{self.embeddings.name}'. Reload the corpus or "
+                f"switch EMBEDDING_PROVIDER back."
+            )
+        
+        wanted = config.hnsw_params(route)
+        try:
+            hnsw = collection.configuration.get("hnsw") or {}
+        except Exception:
+            return  # Chroma versions without collection configuration
+        if hnsw.get("ef_search") != wanted["search_ef"]:
+            collection.modify(configuration={"hnsw": {"ef_search": wanted["search_ef"]}})
+        built = (hnsw.get("space"), hnsw.get("max_neighbors"), hnsw.get("ef_construction"))
+        if built != (wanted["space"], wanted["M"], wanted["construction_ef"]):
+            print(f"⚠️ {route}_docs was built with space/M/construction_ef={built}; "
+                  f"reload the corpus to apply {self._describe_hnsw(route)}")
+    
+    @staticmethod
+    def _quantized_path(route: str) -> Path:
+        return config.CHROMA_DIR / "quantized" / f"{route}_docs"
+    
+    def _get_collection(self, route: str):
+        """Open the collection for a route on first use and cache the handle"""
+        collection = self.collections.get(route)
+        if collection is not None:
+            return collection
+        
+        if config.VECTOR_QUANTIZATION != "none":
+            from src.retrieval.quantized_index import QuantizedIndex
+            
+            with self._collections_lock:
+                if route not in self.collections:
+                    self.collections[route] = QuantizedIndex(self._quantized_path(route), self.embeddings).load()
+                return self.collections[route]
+        
+        from langchain_community.vectorstores import Chroma
+        
+        with self._collections_lock:
+            if route not in self.collections:
+                self._open_collection(route)
                 self.collections[route] = Chroma(
-                    collection_name=collection_name,
+                    collection_name=f"{route}_docs",
                     embedding_function=self.embeddings,
                     persist_directory=str(config.CHROMA_DIR)
                 )
-            except Exception as e:
-                print(f"❌ Error loading collection: {e}")
-                return []
+            return self.collections[route]
+    
+    def warm_up_route(self, route: str) -> float:
+        """
+        Open a route's collection and run a dummy query to page in its index
+        
+        Returns:
+            Seconds spent warming the route
+        """
+        start = time.perf_counter()
+        self._get_collection(route).similarity_search("warm-up", k=1)
+        return time.perf_counter() - start
+    
+    def load_reranker(self):
+        """
+        Create the configured reranker once
+        
+        If it cannot be created (e.g. the ONNX model cannot be downloaded)
+        retrieval goes on without reranking; the failure is not retried.
+        """
+        if self._reranker_loaded:
+            return self._reranker
+        with self._reranker_lock:
+            if not self._reranker_loaded:
+                try:
+                    self._reranker = create_reranker()
+                except Exception as e:
+                    print(f"⚠️ Reranker unavailable ({type(e).__name__}: {e}), retrieving without reranking")
+                    self._reranker = None
+                self._reranker_loaded = True
+        return self._reranker
+    
+    @property
+    def reranker(self):
+        """The configured reranker, or None when reranking is off or unavailable"""
+        return self.load_reranker()
+    
+    def _default_k(self) -> int:
+        return config.RERANK_TOP_N if self.reranker is not None else config.TOP_K
+    
+    def _fetch_k(self, k: int) -> int:
+        if self.reranker is not None:
+            return max(config.RERANK_FETCH_K, k)
+        return k * config.MMR_FETCH_MULTIPLIER
+    
+    def query(self, query_text: str, route: str, k: int = None) -> List:
+        """
+        Query a specific route
+        
+        Over-fetches candidates and applies MMR so near-identical passages
+        are not returned together; with a reranker the candidates are
+        rescored first and k defaults to RERANK_TOP_N. Results are ordered
+        best first.
+        """
+        try:
+            collection = self._get_collection(route)
+        except Exception as e:
+            print(f"❌ Error loading collection: {e}")
+            return []
         
         try:
-            results = self.collections[route].similarity_search(query_text, k=k)
-            return results
+            k = k or self._default_k()
+            results = collection.similarity_search_with_score(query_text, k=self._fetch_k(k))
+            return self._select(query_text, results, k)
         except Exception as e:
             print(f"❌ Query error: {e}")
             return []
     
+    def query_routes(self, query_text: str, routes: List[str] = None, k: int = None) -> Dict[str, List]:
+        """
+        Query several routes with one query embedding
+        
+        Returns:
+            Route -> documents ordered best first (empty for routes that failed)
+        """
+        routes = routes or self.rag_routes()
+        try:
+            k = k or self._default_k()
+            vector = self.embeddings.embed_query(query_text)
+        except Exception as e:
+            print(f"❌ Query embedding error: {e}")
+            return {route: [] for route in routes}
+        
+        hits = {}
+        for route in routes:
+            try:
+                collection = self._get_collection(route)
+                results = collection.similarity_search_by_vector_with_relevance_scores(
+                    vector, k=self._fetch_k(k)
+                )
+                hits[route] = self._select(query_text, results, k)
+            except Exception as e:
+                print(f"❌ Query error for {route}: {e}")
+                hits[route] = []
+        return hits
+    
+    def _select(self, query_text: str, results: List, k: int) -> List:
+        """MMR over (doc, distance) candidates, by reranker score when reranking is on"""
+        if self.reranker is not None:
+            candidates = self.reranker.rerank(query_text, [doc for doc, _ in results])
+        else:
+            # Chroma returns distances; turn them into a relevance where higher is better
+            candidates = [(doc, 1.0 / (1.0 + distance)) for doc, distance in results]
+        return mmr_select(
+            candidates, k,
+            lambda_mult=config.MMR_LAMBDA,
+            duplicate_threshold=config.DEDUP_THRESHOLD
+        )
+    
     def test_retrieval(self):
         """Test retrieval with sample queries"""
         print("="*70)
@@ -173,7 +408,7 @@ class VectorStore:
             if results:
                 print(f"✅ Found {len(results)} results")
                 for i, doc in enumerate(results, 1):
-                    source = doc.metadata.get('source_file', 'unknown')
+                    source = doc.metadata.get('citations', doc.metadata.get('source_file', 'unknown'))
                     preview = doc.page_content[:120].replace('\n', ' ')
                     print(f"   [{i}] {source}: {preview}...")
             else:
@@ -0,0 +1,146 @@
+# src/utils/clients.py
+import json
+import threading
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.utils.config import config
+from src.utils.scheduler import LLMScheduler, estimate_tokens
+
+
+_client_lock = threading.Lock()
+_openai_client = None
+_resilient_client = None
+_scheduler = None
+_scheduler_configured = False
+
+# Endpoints whose requests count against the token budget
+_TOKEN_METERED_PATHS = ("/chat/completions", "/embeddings")
+
+
+def configure_scheduler(requests_per_minute: float = None, tokens_per_minute: float = None):
+    """
+    Set the process-wide budgets for outbound OpenAI requests
+
+    Args:
+        requests_per_minute: Request budget; defaults to config, 0 disables it
+        tokens_per_minute: Token budget; defaults to config, 0 disables it
+    """
+    global _scheduler, _scheduler_configured
+    if requests_per_minute is None:
+        requests_per_minute = float(config.OPENAI_REQUESTS_PER_MINUTE or 0)
+    if tokens_per_minute is None:
+        tokens_per_minute = float(config.OPENAI_TOKENS_PER_MINUTE or 0)
+    if requests_per_minute > 0 or tokens_per_minute > 0:
+        _scheduler = LLMScheduler(requests_per_minute, tokens_per_minute)
+    else:
+        _scheduler = None
+    _scheduler_configured = True
+
+
+def get_scheduler():
+    """Process-wide LLM call scheduler, or None when unlimited"""
+    return _scheduler
+
+
+def request_tokens(request) -> int:
+    """Estimated tokens of an outgoing API request (0 for files and batches)"""
+    if not request.url.path.endswith(_TOKEN_METERED_PATHS):
+        return 0
+    try:
+        return estimate_tokens(json.loads(request.content or b"{}"))
+    except ValueError:
+        return 1
+
+
+def request_timeout(request):
+    """
+    Longest time an outgoing request may take, or None if unbounded.
+    ResilientClient sends each attempt with the call's remaining deadline.
+    """
+    limits = [t for t in (request.extensions.get("timeout") or {}).values() if t is not None]
+    return max(limits) if limits else None
+
+
+def _schedule_request(request):
+    """
+    httpx request hook: every HTTP call to the API (including retries) waits
+    for its turn, but no longer than the request's own deadline
+
+    Raises:
+        SchedulerTimeout: The deadline passed while waiting
+    """
+    scheduler = _scheduler
+    if scheduler is not None:
+        scheduler.acquire(request_tokens(request), timeout=request_timeout(request))
+
+
+def get_openai_client():
+    """Return the process-wide OpenAI client, creating it on first use"""
+    global _openai_client
+    if _openai_client is None:
+        with _client_lock:
+            if _openai_client is None:
+                from openai import OpenAI, DefaultHttpxClient
+                if not _scheduler_configured:
+                    configure_scheduler()
+                _openai_client = OpenAI(
+                    api_key=config.OPENAI_API_KEY,
+                    base_url=config.OPENAI_BASE_URL,
+                    http_client=DefaultHttpxClient(event_hooks={"request": [_schedule_request]})
+                )
+    return _openai_client
+
+
+def get_resilient_client():
+    """Return the process-wide ResilientClient wrapping the OpenAI client"""
+    global _resilient_client
+    if _resilient_client is None:
+        client = get_openai_client()
+        with _client_lock:
+            if _resilient_client is None:
+                from src.utils.resilience import CircuitBreaker, ResilientClient
+                _resilient_client = ResilientClient(
+                    client,
+                    timeout=config.OPENAI_TIMEOUT_SECONDS,
+                    max_retries=config.OPENAI_MAX_RETRIES,
+                    base_delay=config.RETRY_BASE_DELAY,
+                    max_delay=config.RETRY_MAX_DELAY,
+                    breaker=CircuitBreaker(
+                        config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_RESET_SECONDS
+                    )
+                )
+    return _resilient_client
+
+
+def completion_usage(response) -> dict:
+    """
+    Token usage of a chat completion (an SDK object or a Batch API body),
+    including the prompt tokens served from the provider's prefix cache
+    """
+    usage = response.get("usage") if isinstance(response, dict) else getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    if isinstance(usage, dict):
+        details = usage.get("prompt_tokens_details") or {}
+        cached = details.get("cached_tokens") or 0
+        prompt, completion = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    else:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        prompt, completion = usage.prompt_tokens, usage.completion_tokens
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "cached_tokens": cached}
+
+
+def usage_cost(usage: dict, model: str) -> float:
+    """USD cost of a completion_usage() dict at the model's config.yaml prices"""
+    if not usage:
+        return 0.0
+    price = config.model_price(model)
+    cached = usage.get("cached_tokens", 0)
+    return (
+        (usage.get("prompt_tokens", 0) - cached) * price["input"]
+        + cached * price["cached_input"]
+        + usage.get("completion_tokens", 0) * price["output"]
+    ) / 1_000_000
@@ -1,40 +1,90 @@
 # src/utils/config.py
 import os
-from dotenv import load_dotenv
+import sys
+import threading
 from pathlib import Path
+from typing import Dict
+
+
+_dotenv_loaded = False
+
+
+def _load_dotenv_once():
+    """Load .env (for local development) the first time a secret is needed"""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
+
+
+class _Secret:
+    """Class attribute resolved lazily through Config.get_secret"""
+    
+    def __init__(self, name: str, default: str = None):
+        self.name = name
+        self.default = default
+    
+    def __get__(self, obj, owner):
+        return owner.get_secret(self.name, self.default)
 
-# Try to load from .env (for local development)
-load_dotenv()
 
 class Config:
-    # API Keys - Check Streamlit secrets first, then environment variables
+    # Resolved secrets, filled on first access and reused for the process lifetime
+    _secrets = {}
+    _secrets_lock = threading.Lock()
+    
+    @classmethod
+    def get_secret(cls, name: str, default: str = None):
+        """Resolve a setting from Streamlit secrets or the environment once and cache it"""
+        if name not in cls._secrets:
+            with cls._secrets_lock:
+                if name not in cls._secrets:
+                    cls._secrets[name] = cls._resolve_secret(name, default)
+        return cls._secrets[name]
+    
     @staticmethod
-    def get_api_key():
+    def _resolve_secret(name: str, default: str = None):
+        _load_dotenv_once()
+        env_value = os.getenv(name, default)
+        # Only consult Streamlit secrets when running inside Streamlit, so CLI
+        # tools and workers never pay for importing it
+        if "streamlit" not in sys.modules:
+            return env_value
         try:
             import streamlit as st
-            return st.secrets.get("OPENAI_API_KEY")
+            return st.secrets.get(name, env_value)
         except:
-            return os.getenv("OPENAI_API_KEY")
+            return env_value
+    
+    # API Keys - Check Streamlit secrets first, then environment variables
+    @staticmethod
+    def get_api_key():
+        return Config.get_secret("OPENAI_API_KEY")
     
     @staticmethod
     def get_model():
-        try:
-            import streamlit as st
-            return st.secrets.get("OPENAI_MODEL", "gpt-4o-mini")
-        except:
-            return os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        return Config.get_secret("OPENAI_MODEL", "gpt-4o-mini")
     
     @staticmethod
     def get_embedding_model():
-        try:
-            import streamlit as st
-            return st.secrets.get("EMBEDDING_MODEL", "text-embedding-3-small")
-        except:
-            return os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+        return Config.get_secret("EMBEDDING_MODEL", "text-embedding-3-small")
     
-    OPENAI_API_KEY = get_api_key.__func__()
-    OPENAI_MODEL = get_model.__func__()
-    EMBEDDING_MODEL = get_embedding_model.__func__()
+    OPENAI_API_KEY = _Secret("OPENAI_API_KEY")
+    OPENAI_MODEL = _Secret("OPENAI_MODEL", "gpt-4o-mini")
+    EMBEDDING_MODEL = _Secret("EMBEDDING_MODEL", "text-embedding-3-small")
+    # two_call (route, then answer) or single_call (one structured-output completion)
+    ANSWER_MODE = _Secret("ANSWER_MODE", "two_call")
+    # Point at a compatible server (e.g. the local mock) instead of api.openai.com
+    OPENAI_BASE_URL = _Secret("OPENAI_BASE_URL")
+    # Process-wide cap on outbound OpenAI requests; 0 means unlimited
+    OPENAI_REQUESTS_PER_MINUTE = _Secret("OPENAI_REQUESTS_PER_MINUTE", "0")
+    # Process-wide cap on estimated prompt + completion tokens; 0 means unlimited
+    OPENAI_TOKENS_PER_MINUTE = _Secret("OPENAI_TOKENS_PER_MINUTE", "0")
+    # openai, onnx, hashing or local (onnx with hashing fallback)
+    EMBEDDING_PROVIDER = _Secret("EMBEDDING_PROVIDER", "openai")
+    # none, lexical, onnx or local (onnx with lexical fallback)
+    RERANKER = _Secret("RERANKER", "none")
     
     # Paths - FIXED
     BASE_DIR = Path(__file__).parent.parent.parent
@@ -46,17 +96,178 @@ class Config:
     EVAL_SET_PATH = DATA_DIR / "evaluation_set.csv"
     MANIFEST_PATH = DATA_DIR / "dataset_manifest.json"
     
+    # Embedding backends
+    EMBEDDING_BATCH_SIZE = 64
+    EMBEDDING_THREADS = 2
+    HASHING_EMBEDDING_DIM = 512
+    # Shortened text-embedding-3-* vectors (0 = the model's full width)
+    EMBEDDING_DIMENSIONS = 0
+    # Concurrent query embeddings (remote provider) are sent together
+    EMBEDDING_MICRO_BATCH_SIZE = 32
+    EMBEDDING_MICRO_BATCH_WAIT_MS = 5.0  # 0 disables micro-batching
+    # Recent query embeddings kept per provider, so the FAQ lookup and
+    # retrieval of one question embed it once (0 disables)
+    QUERY_EMBEDDING_CACHE_SIZE = 256
+    
     # Retrieval settings
+    CHUNKER = "markdown"  # "markdown" (heading-aware) or "recursive" (fixed-size)
     CHUNK_SIZE = 500
     CHUNK_OVERLAP = 50
     TOP_K = 3
     
+    # Vector storage: "none" (Chroma, float32), or "int8" / "binary" codes with
+    # the top k * QUANTIZED_RESCORE_MULTIPLIER candidates rescored in full precision
+    VECTOR_QUANTIZATION = "none"
+    QUANTIZED_RESCORE_MULTIPLIER = 4
+    
+    # Reranking (when RERANKER is set): over-fetch, rescore, keep the best few
+    RERANK_FETCH_K = 12
+    RERANK_TOP_N = 2
+    RERANK_CACHE_SIZE = 20000
+    
+    # Deduplication / diversity
+    DEDUP_THRESHOLD = 0.8
+    MMR_LAMBDA = 0.7
+    MMR_FETCH_MULTIPLIER = 2
+    
+    # Prompt token budgets
+    PROMPT_TOKEN_BUDGET = 3000
+    HISTORY_TOKEN_BUDGET = 800
+    HISTORY_MAX_MESSAGES = 10
+    HISTORY_SUMMARY_MAX_TOKENS = 150
+    # Router context: only for follow-ups, as short snippets of earlier user turns
+    ROUTER_HISTORY_TURNS = 2
+    ROUTER_SNIPPET_TOKENS = 30
+    ROUTER_SHORT_QUESTION_WORDS = 3
+    MIN_CHUNK_TOKENS = 50
+    # Single-call mode: top hits per route shown to the model, as short previews
+    SINGLE_CALL_HITS_PER_ROUTE = 2
+    SINGLE_CALL_PREVIEW_TOKENS = 120
+    
+    # Pre-generated FAQ answers (built offline with src/retrieval/faq_index.py)
+    FAQ_ENABLED = True
+    FAQ_INDEX_PATH = DATA_DIR / "faq_index.json"
+    FAQ_QUESTIONS_PER_SECTION = 4
+    FAQ_MATCH_THRESHOLD = 0.9  # cosine similarity to a stored question
+    
+    # OpenAI call resilience (deadlines include retries)
+    OPENAI_TIMEOUT_SECONDS = 30.0
+    ROUTER_TIMEOUT_SECONDS = 8.0
+    EMBEDDING_TIMEOUT_SECONDS = 10.0
+    ROUTER_HEDGE_AFTER_SECONDS = 1.5  # send a backup routing request after this long
+    OPENAI_MAX_RETRIES = 2
+    RETRY_BASE_DELAY = 0.5
+    RETRY_MAX_DELAY = 4.0
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RESET_SECONDS = 30.0
+    
+    # Bulk (Batch API) mode
+    BULK_COMPLETION_WINDOW = "24h"
+    BULK_POLL_INTERVAL = 10.0  # seconds between batch status checks
+    BULK_MAX_REQUESTS_PER_JOB = 50000  # Batch API limit per input file
+    
     # Routes
     ROUTES = ["general_company", "role_specific", "admin_policy", "direct_llm"]
     
+    # Per-route generation policy; config.yaml route_policies overrides these
+    # field by field. A null model means OPENAI_MODEL.
+    SETTINGS_PATH = BASE_DIR / "config.yaml"
+    ROUTE_POLICY_DEFAULTS = {
+        "router": {"model": None, "max_tokens": 5, "temperature": 0.0, "timeout": ROUTER_TIMEOUT_SECONDS},
+        "general_company": {"model": None, "max_tokens": 500, "temperature": 0.3, "timeout": OPENAI_TIMEOUT_SECONDS},
+        "role_specific": {"model": None, "max_tokens": 500, "temperature": 0.3, "timeout": OPENAI_TIMEOUT_SECONDS},
+        "admin_policy": {"model": None, "max_tokens": 500, "temperature": 0.3, "timeout": OPENAI_TIMEOUT_SECONDS},
+        "direct_llm": {"model": None, "max_tokens": 300, "temperature": 0.7, "timeout": OPENAI_TIMEOUT_SECONDS},
+        "single_call": {"model": None, "max_tokens": 500, "temperature": 0.3, "timeout": OPENAI_TIMEOUT_SECONDS},
+        "faq": {"model": None, "max_tokens": 800, "temperature": 0.2, "timeout": 60.0},
+    }
+    # Chroma's HNSW defaults; config.yaml `hnsw` overrides them for every
+    # route (`default`) or one route, field by field
+    HNSW_DEFAULTS = {"space": "l2", "M": 16, "construction_ef": 100, "search_ef": 100}
+    HNSW_SPACES = ("l2", "cosine", "ip")
+    _settings = None
+    _settings_lock = threading.Lock()
+    
+    @classmethod
+    def settings(cls) -> Dict:
+        """config.yaml, parsed on first use; empty if the file is missing"""
+        if cls._settings is None:
+            with cls._settings_lock:
+                if cls._settings is None:
+                    settings = {}
+                    if cls.SETTINGS_PATH.exists():
+                        import yaml
+                        with open(cls.SETTINGS_PATH, encoding="utf-8") as f:
+                            settings = yaml.safe_load(f) or {}
+                    cls._settings = settings
+        return cls._settings
+    
+    @classmethod
+    def route_policy(cls, route: str) -> Dict:
+        """
+        Model, max_tokens, temperature and timeout for a route's completions
+        
+        Args:
+            route: A route name, "router", "single_call" or "faq"
+        """
+        policy = cls._route_settings(route)
+        policy["model"] = policy["model"] or cls.OPENAI_MODEL
+        return policy
+    
+    @classmethod
+    def route_timeout(cls, route: str) -> float:
+        """Deadline in seconds, retries included, for a route's completions"""
+        return float(cls._route_settings(route)["timeout"])
+    
+    @classmethod
+    def _route_settings(cls, route: str) -> Dict:
+        if route not in cls.ROUTE_POLICY_DEFAULTS:
+            raise ValueError(f"Unknown route policy: {route}")
+        overrides = (cls.settings().get("route_policies") or {}).get(route) or {}
+        return {**cls.ROUTE_POLICY_DEFAULTS[route], **overrides}
+    
+    @classmethod
+    def completion_params(cls, route: str) -> Dict:
+        """The API parameters of a route's policy (everything but the timeout)"""
+        policy = cls.route_policy(route)
+        return {"model": policy["model"], "temperature": policy["temperature"], "max_tokens": policy["max_tokens"]}
+    
+    @classmethod
+    def model_price(cls, model: str) -> Dict:
+        """USD per million input, cached input and output tokens; zeros if unknown"""
+        prices = (cls.settings().get("model_prices") or {}).get(model) or {}
+        return {
+            "input": float(prices.get("input", 0.0)),
+            "cached_input": float(prices.get("cached_input", prices.get("input", 0.0))),
+            "output": float(prices.get("output", 0.0)),
+        }
+    
+    @classmethod
+    def hnsw_params(cls, route: str) -> Dict:
+        """HNSW space, M, construction_ef and search_ef for a route's collection"""
+        hnsw = cls.settings().get("hnsw") or {}
+        params = {**cls.HNSW_DEFAULTS, **(hnsw.get("default") or {}), **(hnsw.get(route) or {})}
+        unknown = set(params) - set(cls.HNSW_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown HNSW settings for {route}: {sorted(unknown)}")
+        if params["space"] not in cls.HNSW_SPACES:
+            raise ValueError(f"Unknown HNSW space for {route}: {params['space']}")
+        return params
+    
+    @classmethod
+    def hnsw_metadata(cls, route: str) -> Dict:
+        """hnsw_params as Chroma collection metadata"""
+        return {f"hnsw:{name}": value for name, value in cls.hnsw_params(route).items()}
+    
+    # Set once validate() has passed so repeated component start-up skips the checks
+    _validated = False
+    
     @classmethod
     def validate(cls):
-        if not cls.OPENAI_API_KEY:
+        if cls._validated:
+            return True
+        # Only the OpenAI embedding provider needs the key to index and query
+        if cls.EMBEDDING_PROVIDER.lower() == "openai" and not cls.OPENAI_API_KEY:
             raise ValueError("❌ OPENAI_API_KEY not found in environment or Streamlit secrets")
         if not cls.CORPUS_DIR.exists():
             raise ValueError(f"❌ Corpus directory not found: {cls.CORPUS_DIR}")
@@ -69,6 +280,7 @@ class Config:
         print("✅ Configuration validated")
         print(f"   Corpus path: {cls.CORPUS_DIR}")
         print(f"   Found folders: {[f.name for f in corpus_folders if f.is_dir()]}")
+        cls._validated = True
         return True
 
 config = Config()
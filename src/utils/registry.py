@@ -0,0 +1,60 @@
+# src/utils/registry.py
+"""
+Process-wide resource registry.
+
+Owns the single DatabaseHandler, VectorStore and AITrainingAssistant of the
+process. Streamlit re-executes the app script on every rerun and runs each
+browser session on its own thread, but this module is imported once, so
+every session resolves the same instances from here.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+
+class ResourceRegistry:
+    """Lazily creates and hands out the shared application resources"""
+
+    def __init__(self, db_path: str = "data/chatbot.db"):
+        self.db_path = db_path
+        self._db = None
+        self._vector_store = None
+        self._assistant = None
+        # Re-entrant: building the assistant resolves the vector store
+        self._lock = threading.RLock()
+
+    def get_db(self):
+        """Shared, pooled DatabaseHandler"""
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    from src.database.db_handler import DatabaseHandler
+                    self._db = DatabaseHandler(db_path=self.db_path)
+        return self._db
+
+    def get_vector_store(self):
+        """Shared VectorStore"""
+        if self._vector_store is None:
+            with self._lock:
+                if self._vector_store is None:
+                    from src.retrieval.vector_store import VectorStore
+                    self._vector_store = VectorStore()
+        return self._vector_store
+
+    def get_assistant(self, warm_up: bool = True):
+        """Shared AITrainingAssistant, warmed up before first use by default"""
+        if self._assistant is None:
+            with self._lock:
+                if self._assistant is None:
+                    from src.agents.assistant import AITrainingAssistant
+                    assistant = AITrainingAssistant(vector_store=self.get_vector_store())
+                    if warm_up:
+                        assistant.warm_up()
+                    self._assistant = assistant
+        return self._assistant
+
+
+registry = ResourceRegistry()
@@ -0,0 +1,272 @@
+# src/utils/resilience.py
+"""
+Deadlines, retries, circuit breaking and hedging for OpenAI calls.
+
+ResilientClient wraps the shared OpenAI client (with the SDK's own retries
+turned off) and is what the router, assistant, summarizer and embeddings
+call. Every call gets an overall deadline; retryable failures are retried
+with full-jitter exponential backoff inside that deadline; a shared
+circuit breaker fails fast while the upstream is unhealthy; and small,
+latency-critical calls (routing) can be hedged with a second request.
+"""
+
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict
+
+from src.utils.scheduler import SchedulerTimeout
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+RETRYABLE_ERROR_NAMES = {"APITimeoutError", "APIConnectionError", "TimeoutError", "DeadlineExceeded"}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call's overall deadline passed before it succeeded"""
+
+
+def gave_up_waiting(error: Exception) -> bool:
+    """
+    Whether a call failed in the local scheduler, before anything was sent.
+    The SDK wraps errors from the request hook in APIConnectionError.
+    """
+    while error is not None:
+        if isinstance(error, SchedulerTimeout):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection errors, 408/409/429 and 5xx responses are retryable"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed -> open after `failure_threshold` consecutive failures; open ->
+    half_open after `reset_timeout` seconds, letting one trial call through;
+    the trial's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_skipped(self):
+        """The allowed call never reached upstream; let another call be the trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class ResilienceMetrics:
+    """Thread-safe counters for calls, retries, failures and hedging"""
+
+    FIELDS = ("calls", "attempts", "retries", "successes", "failures",
+              "timeouts", "scheduler_timeouts", "breaker_rejections", "hedges", "hedge_wins")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field: str, amount: int = 1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class ResilientClient:
+    """OpenAI calls with deadlines, jittered retries, a circuit breaker and hedging"""
+
+    def __init__(
+        self,
+        client,
+        timeout: float = 30.0,
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 4.0,
+        breaker: CircuitBreaker = None,
+        hedge_workers: int = 8
+    ):
+        # Retries happen here, inside the deadline, not in the SDK
+        self.client = client.with_options(max_retries=0) if hasattr(client, "with_options") else client
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = ResilienceMetrics()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix="hedge")
+
+    def chat_completion(self, timeout: float = None, hedge_after: float = None, **params):
+        """
+        client.chat.completions.create with resilience
+
+        Args:
+            timeout: Overall deadline in seconds, retries included
+            hedge_after: Send a second identical request if the first has not
+                answered after this many seconds; the first success wins
+            **params: Passed to chat.completions.create
+        """
+        return self.call(
+            lambda attempt_timeout: self.client.chat.completions.create(timeout=attempt_timeout, **params),
+            timeout=timeout,
+            hedge_after=hedge_after
+        )
+
+    def embeddings(self, timeout: float = None, **params):
+        """client.embeddings.create with resilience"""
+        return self.call(
+            lambda attempt_timeout: self.client.embeddings.create(timeout=attempt_timeout, **params),
+            timeout=timeout
+        )
+
+    def call(self, request: Callable[[float], object], timeout: float = None, hedge_after: float = None):
+        """
+        Run `request(attempt_timeout)` until it succeeds, fails permanently
+        or the deadline passes
+
+        Raises:
+            CircuitOpenError: The breaker is open
+            DeadlineExceeded: No success before the deadline, including
+                when the local scheduler could not send it in time
+            Exception: The last non-retryable (or final) upstream error
+        """
+        self.metrics.incr("calls")
+        deadline = time.monotonic() + (timeout or self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not self.breaker.allow():
+                self.metrics.incr("breaker_rejections")
+                raise CircuitOpenError("OpenAI circuit breaker is open; failing fast")
+
+            if attempt:
+                self.metrics.incr("retries")
+            try:
+                if hedge_after is not None and hedge_after < remaining:
+                    result = self._hedged(request, remaining, hedge_after)
+                else:
+                    self.metrics.incr("attempts")
+                    result = request(remaining)
+            except Exception as e:
+                if gave_up_waiting(e):
+                    # Nothing was sent, so this says nothing about upstream health
+                    self.metrics.incr("scheduler_timeouts")
+                    self.breaker.record_skipped()
+                    raise DeadlineExceeded(
+                        f"OpenAI call was not scheduled within {timeout or self.timeout:.1f}s"
+                    ) from e
+                self.metrics.incr("failures")
+                if any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(e).__mro__):
+                    self.metrics.incr("timeouts")
+                if not is_retryable(e):
+                    # Upstream answered (e.g. a 400), so it is healthy
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+                # Full jitter: sleep uniformly up to the exponential backoff cap
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                time.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+                continue
+
+            self.breaker.record_success()
+            self.metrics.incr("successes")
+            return result
+
+        raise DeadlineExceeded(f"OpenAI call did not succeed within {timeout or self.timeout:.1f}s")
+
+    def _hedged(self, request: Callable[[float], object], remaining: float, hedge_after: float):
+        """Primary request plus one backup after `hedge_after`; first success wins"""
+        started = time.monotonic()
+        self.metrics.incr("attempts")
+        # Pool threads inherit the caller's context (e.g. its scheduling priority)
+        primary = self._hedge_pool.submit(contextvars.copy_context().run, request, remaining)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        self.metrics.incr("hedges")
+        self.metrics.incr("attempts")
+        backup = self._hedge_pool.submit(
+            contextvars.copy_context().run, request, remaining - (time.monotonic() - started)
+        )
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, started + remaining - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self.metrics.incr("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        raise DeadlineExceeded("Hedged OpenAI call did not finish before the deadline")
+
+    def stats(self) -> Dict:
+        """Metrics plus the current breaker state"""
+        return {
+            **self.metrics.snapshot(),
+            "breaker_state": self.breaker.state,
+            "breaker_failures": self.breaker.failures,
+            "breaker_times_opened": self.breaker.times_opened,
+        }
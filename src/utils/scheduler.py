@@ -0,0 +1,233 @@
+# src/utils/scheduler.py
+"""
+Priority-aware scheduling of outbound LLM calls.
+
+Every HTTP request the OpenAI client sends (router, answers, history
+summaries, embeddings) takes a slot from the process-wide LLMScheduler
+before it goes out. The scheduler enforces a requests-per-minute and a
+tokens-per-minute budget and decides who goes next when both are short:
+
+- interactive calls always go before background calls, so evaluation
+  runs and bulk pre-generation yield as soon as a live user is waiting;
+- within a priority class, users take turns (round robin over per-user
+  FIFO queues), so one busy user cannot starve the others.
+
+A call waits at most its own deadline; past that it is withdrawn without
+being sent (SchedulerTimeout), which the circuit breaker does not count as
+an upstream failure.
+
+The priority and user of a call come from call_context(), which the
+assistant sets per question and batch jobs set once for their whole run.
+Calls made outside any context are interactive and anonymous.
+"""
+
+import bisect
+import contextvars
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+# Upper bounds (ms) of the wait-time histogram buckets; the last is open-ended
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_call_context = contextvars.ContextVar("llm_call_context", default=(INTERACTIVE, None))
+
+
+class SchedulerTimeout(RuntimeError):
+    """The call was not granted a slot before its deadline; nothing was sent upstream"""
+
+
+@contextmanager
+def call_context(priority: str = INTERACTIVE, user=None):
+    """Schedule LLM calls made inside the block with this priority, on behalf of this user"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {priority}")
+    token = _call_context.set((priority, user))
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def current_context() -> Tuple[str, Optional[object]]:
+    """(priority, user) of the calling code"""
+    return _call_context.get()
+
+
+def estimate_tokens(body: Dict) -> int:
+    """
+    Tokens a request counts against the TPM budget: the prompt (or
+    embedding input) at about four characters per token, plus the
+    completion tokens it may generate
+    """
+    prompt = json.dumps(body.get("messages") or body.get("input") or "")
+    return max(1, len(prompt) // 4) + int(body.get("max_tokens") or body.get("max_completion_tokens") or 0)
+
+
+class _Bucket:
+    """Token bucket holding `burst_seconds` of budget; may go into debt for large requests"""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` (capped at capacity) is available; 0 if it is now"""
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed / self.rate)
+
+
+class _Ticket:
+    __slots__ = ("priority", "user", "tokens", "enqueued")
+
+    def __init__(self, priority: str, user, tokens: int):
+        self.priority = priority
+        self.user = user
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+
+
+class LLMScheduler:
+    """Grants outbound LLM calls within RPM/TPM budgets by priority, fairly across users"""
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, burst_seconds: float = 1.0):
+        """
+        Args:
+            requests_per_minute: Request budget; 0 means unlimited
+            tokens_per_minute: Token budget (see estimate_tokens); 0 means unlimited
+            burst_seconds: How much unused budget may accumulate for a burst
+        """
+        self._requests = _Bucket(requests_per_minute, burst_seconds) if requests_per_minute > 0 else None
+        self._tokens = _Bucket(tokens_per_minute, burst_seconds) if tokens_per_minute > 0 else None
+        self._cond = threading.Condition()
+        # Per priority: user -> FIFO of waiting tickets, in round-robin order
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}
+        self._stats = {
+            priority: {"granted": 0, "timeouts": 0, "tokens": 0, "max_depth": 0, "wait_ms_total": 0.0,
+                       "wait_histogram": [0] * (len(WAIT_BUCKETS_MS) + 1)}
+            for priority in PRIORITIES
+        }
+
+    def acquire(self, tokens: int = 1, priority: str = None, user=None, timeout: float = None) -> float:
+        """
+        Block until this call may be sent
+
+        Args:
+            tokens: Estimated tokens of the call
+            priority: INTERACTIVE or BACKGROUND; defaults to the call_context()
+            user: Fair-queuing key; defaults to the call_context()
+            timeout: Longest wait in seconds; None waits as long as it takes
+        Returns:
+            Seconds spent waiting
+        Raises:
+            SchedulerTimeout: No slot was granted within timeout
+        """
+        if priority is None:
+            priority, context_user = current_context()
+            user = context_user if user is None else user
+        ticket = _Ticket(priority, user, tokens)
+
+        with self._cond:
+            queue = self._queues[priority].setdefault(user, deque())
+            queue.append(ticket)
+            depth = sum(len(q) for q in self._queues[priority].values())
+            stats = self._stats[priority]
+            stats["max_depth"] = max(stats["max_depth"], depth)
+
+            deadline = None if timeout is None else ticket.enqueued + timeout
+            while True:
+                if self._head() is ticket:
+                    delay = self._budget_delay(ticket.tokens)
+                    if delay == 0.0:
+                        self._grant(ticket)
+                        break
+                else:
+                    delay = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._withdraw(ticket)
+                        raise SchedulerTimeout(f"No LLM call slot within {timeout:.1f}s")
+                    delay = remaining if delay is None else min(delay, remaining)
+                self._cond.wait(delay)
+
+        return time.monotonic() - ticket.enqueued
+
+    def _head(self) -> Optional[_Ticket]:
+        """Next ticket to serve: the first interactive user in turn, else the first background one"""
+        for priority in PRIORITIES:
+            users = self._queues[priority]
+            if users:
+                return users[next(iter(users))][0]
+        return None
+
+    def _budget_delay(self, tokens: int) -> float:
+        now = time.monotonic()
+        delay = 0.0
+        if self._requests is not None:
+            self._requests.refill(now)
+            delay = max(delay, self._requests.wait_for(1))
+        if self._tokens is not None:
+            self._tokens.refill(now)
+            delay = max(delay, self._tokens.wait_for(tokens))
+        return delay
+
+    def _withdraw(self, ticket: _Ticket):
+        """Drop a ticket that gave up waiting and let the next one move up"""
+        users = self._queues[ticket.priority]
+        queue = users[ticket.user]
+        queue.remove(ticket)
+        if not queue:
+            del users[ticket.user]
+        self._stats[ticket.priority]["timeouts"] += 1
+        self._cond.notify_all()
+
+    def _grant(self, ticket: _Ticket):
+        if self._requests is not None:
+            self._requests.level -= 1
+        if self._tokens is not None:
+            self._tokens.level -= ticket.tokens
+
+        users = self._queues[ticket.priority]
+        queue = users.pop(ticket.user)
+        queue.popleft()
+        if queue:
+            users[ticket.user] = queue  # back of the round robin
+
+        waited_ms = (time.monotonic() - ticket.enqueued) * 1000
+        stats = self._stats[ticket.priority]
+        stats["granted"] += 1
+        stats["tokens"] += ticket.tokens
+        stats["wait_ms_total"] += waited_ms
+        stats["wait_histogram"][bisect.bisect_left(WAIT_BUCKETS_MS, waited_ms)] += 1
+        self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        """Per priority: grants, timeouts, tokens, current and peak queue depth, and wait times"""
+        with self._cond:
+            report = {}
+            for priority in PRIORITIES:
+                stats = dict(self._stats[priority])
+                granted = stats["granted"]
+                histogram = stats.pop("wait_histogram")
+                stats["queue_depth"] = sum(len(q) for q in self._queues[priority].values())
+                stats["mean_wait_ms"] = stats.pop("wait_ms_total") / granted if granted else 0.0
+                stats["wait_histogram_ms"] = {
+                    (f"<={bound}" if i < len(WAIT_BUCKETS_MS) else f">{WAIT_BUCKETS_MS[-1]}"): count
+                    for i, (bound, count) in enumerate(zip(WAIT_BUCKETS_MS + (None,), histogram))
+                }
+                report[priority] = stats
+            return report
@@ -0,0 +1,118 @@
+# src/utils/singleflight.py
+"""
+Request coalescing for identical in-flight calls.
+
+When a cohort clicks the same example question at once, every click would
+otherwise pay for its own routing call, query embedding and generation.
+A FlightGroup lets the first caller for a key (the leader) make the
+upstream call while concurrent callers with the same key wait for it and
+share its result or exception. Nothing is cached: once the leader
+finishes the key is forgotten, so the next request goes upstream again.
+
+Groups are process-wide and named per layer (router, embedding,
+generation) so their metrics can be reported together.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of a question or prompt"""
+    return " ".join(text.split()).casefold()
+
+
+def request_key(*parts) -> str:
+    """
+    Stable key for a request, compared exactly as JSON. The question is
+    already sanitized once by the input guardrails before it reaches any
+    caller, so a flight is never shared by requests a cache would keep
+    apart (e.g. "IT policy" and "it policy").
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class FlightGroup:
+    """Coalesces concurrent calls that share a key into one upstream call"""
+
+    FIELDS = ("calls", "upstream_calls", "saved_calls", "failures", "max_waiters")
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait for the identical call already in flight"""
+        with self._lock:
+            self._counts["calls"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._counts["upstream_calls"] += 1
+            else:
+                flight.waiters += 1
+                self._counts["saved_calls"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._counts["failures"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                self._counts["max_waiters"] = max(self._counts["max_waiters"], flight.waiters)
+            flight.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Counters plus the calls currently in flight and waiting on them"""
+        with self._lock:
+            return {
+                **self._counts,
+                "in_flight": len(self._flights),
+                "waiting": sum(flight.waiters for flight in self._flights.values()),
+            }
+
+
+_groups: Dict[str, FlightGroup] = {}
+_groups_lock = threading.Lock()
+
+
+def flight_group(name: str) -> FlightGroup:
+    """The process-wide FlightGroup for a layer, created on first use"""
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = FlightGroup(name)
+        return _groups[name]
+
+
+def flight_stats() -> Dict[str, Dict[str, int]]:
+    """Metrics of every flight group, by name"""
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.stats() for group in groups}
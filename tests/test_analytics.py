@@ -0,0 +1,85 @@
+"""
+Usage analytics: typed columns and daily rollups are written with each
+message, and a rebuild from the messages table gives the same numbers.
+"""
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.database.db_handler import DatabaseHandler
+
+ANSWERS = [
+    {"route": "admin_policy", "sources": ["expense_policy.md", "expense_policy.md"], "blocked": False,
+     "reason": "", "latency_ms": 1200.0},
+    {"route": "admin_policy", "sources": ["leave_policy.md", "expense_policy.md"], "blocked": False,
+     "reason": "", "latency_ms": 800.0},
+    {"route": "guardrail_blocked", "sources": [], "blocked": True, "reason": "Content policy violation"},
+    {"route": "direct_llm", "sources": [], "blocked": False, "reason": ""},
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseHandler(db_path=str(tmp_path / "chatbot.db"))
+    for user_id, metadata in [(1, ANSWERS[0]), (1, ANSWERS[1]), (2, ANSWERS[2]), (3, ANSWERS[3])]:
+        db.save_message(user_id, f"s{user_id}", "user", "question")
+        db.save_message(user_id, f"s{user_id}", "assistant", "answer", metadata=metadata)
+    yield db
+    db.close()
+
+
+def snapshot(db):
+    return (db.get_route_stats(), db.get_block_reasons(), db.get_top_sources(), db.get_active_users())
+
+
+def test_rollups_are_maintained_on_write(db):
+    routes = {row["route"]: row for row in db.get_route_stats()}
+    assert routes["admin_policy"]["questions"] == 2
+    assert routes["admin_policy"]["avg_latency_ms"] == pytest.approx(1000.0)
+    assert routes["guardrail_blocked"]["blocked"] == 1
+    assert routes["direct_llm"]["avg_latency_ms"] is None
+
+    [reason] = db.get_block_reasons()
+    assert reason["reason"] == "Content policy violation"
+    assert reason["rate"] == pytest.approx(0.25)
+
+    # A source cited twice in one answer counts once
+    assert db.get_top_sources()[0] == {"source": "expense_policy.md", "citations": 2}
+    [today] = db.get_active_users()
+    assert (today["active_users"], today["messages"]) == (3, 8)
+
+    history = db.get_chat_history(1, "s1")
+    assert history[1]["metadata"] == ANSWERS[0]  # JSON metadata still round-trips
+
+
+def test_rebuild_backfills_legacy_rows_and_matches(db):
+    before = snapshot(db)
+    with db._connection() as conn:
+        conn.execute("UPDATE messages SET route = NULL, blocked = NULL, reason = NULL, latency_ms = NULL")
+        conn.execute("DELETE FROM message_sources")
+
+    assert db.rebuild_analytics() == len(ANSWERS)
+    assert snapshot(db) == before
+
+
+def test_existing_databases_gain_analytics_columns(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE messages (message_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL, session_id TEXT NOT NULL, role TEXT NOT NULL,
+                    content TEXT NOT NULL, metadata TEXT, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+    conn.execute("INSERT INTO messages (user_id, session_id, role, content, metadata) VALUES (?, ?, ?, ?, ?)",
+                 (1, "s1", "assistant", "answer", json.dumps(ANSWERS[0])))
+    conn.commit()
+    conn.close()
+
+    db = DatabaseHandler(db_path=str(path))
+    assert db.rebuild_analytics() == 1
+    assert db.get_route_stats()[0]["route"] == "admin_policy"
+    db.close()
@@ -0,0 +1,97 @@
+"""
+Batch answering: ordering, bounded in-flight window and resume.
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.agents.batch import answer_batch, completed_ids, read_questions
+from src.utils import clients
+from src.utils.scheduler import BACKGROUND, LLMScheduler, current_context
+
+
+class SlowEchoAssistant:
+    """Answers with the question after a random delay, tracking concurrency"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def answer(self, question):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(random.uniform(0, 0.01))
+        with self.lock:
+            self.active -= 1
+        return {"question": question, "answer": question.upper(), "route": "direct_llm", "sources": []}
+
+
+def test_results_come_back_in_input_order():
+    assistant = SlowEchoAssistant()
+    questions = [{"id": str(i), "question": f"question {i}"} for i in range(40)]
+
+    results = list(answer_batch(questions, concurrency=4, assistant=assistant))
+
+    assert [r["id"] for r in results] == [q["id"] for q in questions]
+    assert all(r["answer"] == f"QUESTION {r['id']}" for r in results)
+    assert 1 < assistant.peak <= 4
+
+
+def test_in_flight_window_bounds_submitted_work():
+    submitted = []
+
+    def questions():
+        for i in range(20):
+            submitted.append(i)
+            yield {"id": str(i), "question": f"q{i}"}
+
+    results = answer_batch(questions(), concurrency=2, assistant=SlowEchoAssistant(),
+                           max_in_flight=3)
+    first = next(results)
+    assert first["id"] == "0"
+    assert len(submitted) <= 3
+    results.close()
+
+
+def test_threads_share_the_live_scheduler_as_background_work(monkeypatch):
+    live = LLMScheduler(requests_per_minute=600)
+    monkeypatch.setattr(clients, "_scheduler", live)
+    contexts = []
+
+    class RecordingAssistant:
+        def answer(self, question):
+            contexts.append(current_context())
+            return {"question": question, "answer": "", "route": "direct_llm", "sources": []}
+
+    list(answer_batch(["a", "b", "c"], concurrency=2, assistant=RecordingAssistant(),
+                      requests_per_minute=0, tokens_per_minute=0))
+
+    assert clients.get_scheduler() is live
+    assert contexts == [(BACKGROUND, "batch")] * 3
+
+
+def test_resume_skips_answered_ids(tmp_path):
+    input_path = tmp_path / "questions.jsonl"
+    input_path.write_text("\n".join(
+        json.dumps({"id": f"q{i}", "question": f"question {i}"}) for i in range(5)
+    ))
+    output_path = tmp_path / "answers.jsonl"
+    output_path.write_text(
+        json.dumps({"id": "q0", "answer": "done"}) + "\n"
+        + json.dumps({"id": "q1", "answer": "done"}) + "\n"
+        + '{"id": "q2", "ans'  # interrupted write
+    )
+
+    questions = read_questions(str(input_path))
+    done = completed_ids(str(output_path))
+
+    assert done == {"q0", "q1"}
+    assert [q["id"] for q in questions if q["id"] not in done] == ["q2", "q3", "q4"]
@@ -0,0 +1,69 @@
+"""
+Batch API jobs against the local mock server.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+openai = pytest.importorskip("openai")
+
+from src.agents.bulk import BatchJobRunner
+from src.evaluation.mock_openai_server import MockOpenAIServer, mock_route
+
+
+ROUTER_SYSTEM = "You are a query classification assistant."
+
+
+def router_request(question):
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": ROUTER_SYSTEM},
+            {"role": "user", "content": question},
+        ],
+    }
+
+
+@pytest.fixture
+def server():
+    with MockOpenAIServer(batch_latency_ms=20) as server:
+        yield server
+
+
+def test_batch_results_join_by_custom_id_across_jobs(server):
+    client = openai.OpenAI(api_key="mock", base_url=server.base_url)
+    runner = BatchJobRunner(client=client, poll_interval=0.01, max_requests_per_job=4)
+    questions = {
+        f"route-{i}": question
+        for i, question in enumerate([
+            "How do I submit expenses?",
+            "What are our company values?",
+            "What does a product manager do?",
+            "Tell me a joke",
+            "How many PTO days do I get?",
+        ])
+    }
+
+    results = runner.run({cid: router_request(q) for cid, q in questions.items()})
+
+    assert server.state.requests["/v1/batches"] == 2
+    assert set(results) == set(questions)
+    for cid, question in questions.items():
+        content = results[cid]["body"]["choices"][0]["message"]["content"]
+        assert content == mock_route(question)
+
+
+def test_embedding_jobs_use_the_embeddings_endpoint(server):
+    client = openai.OpenAI(api_key="mock", base_url=server.base_url)
+    runner = BatchJobRunner(client=client, poll_interval=0.01)
+
+    results = runner.run(
+        {"embed-1": {"model": "text-embedding-3-small", "input": "hello"}},
+        endpoint="/v1/embeddings"
+    )
+
+    assert len(results["embed-1"]["body"]["data"][0]["embedding"]) == 1536
@@ -0,0 +1,84 @@
+"""
+Multi-session concurrency tests for the shared resources.
+
+Simulates several Streamlit sessions, each on its own thread, sharing the
+process-wide DatabaseHandler and ContentGuardrails instances.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils.registry import ResourceRegistry
+from src.guardrails.content_guardrails import ContentGuardrails
+
+SESSIONS = 12
+MESSAGES_PER_SESSION = 20
+
+
+def run_threads(target, count):
+    errors = []
+
+    def wrapper(i):
+        try:
+            target(i)
+        except Exception as e:  # pragma: no cover - surfaced by the assert below
+            errors.append(e)
+
+    threads = [threading.Thread(target=wrapper, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+
+
+def test_registry_hands_out_one_db_handler(tmp_path):
+    registry = ResourceRegistry(db_path=str(tmp_path / "chatbot.db"))
+    handlers = []
+    run_threads(lambda i: handlers.append(registry.get_db()), SESSIONS)
+    assert len({id(handler) for handler in handlers}) == 1
+
+
+def test_concurrent_sessions_share_pooled_db(tmp_path):
+    registry = ResourceRegistry(db_path=str(tmp_path / "chatbot.db"))
+
+    def session(i):
+        db = registry.get_db()
+        assert db.register_user(f"user{i}", "password123", f"user{i}@example.com")
+        user_id = db.authenticate_user(f"user{i}", "password123")
+        session_id = f"session-{i}"
+        db.create_session(user_id, session_id, "New Chat")
+        for n in range(MESSAGES_PER_SESSION):
+            role = "user" if n % 2 == 0 else "assistant"
+            db.save_message(user_id, session_id, role, f"message {n} from {i}",
+                            metadata={"route": "admin_policy"} if role == "assistant" else None)
+        db.update_session_name(session_id, f"Question from user {i}")
+
+    run_threads(session, SESSIONS)
+
+    db = registry.get_db()
+    for i in range(SESSIONS):
+        user_id = db.authenticate_user(f"user{i}", "password123")
+        history = db.get_chat_history(user_id, f"session-{i}")
+        assert len(history) == MESSAGES_PER_SESSION
+        assert all(m["content"].endswith(f"from {i}") for m in history)
+        sessions = db.get_user_sessions(user_id)
+        assert [s["session_name"] for s in sessions] == [f"Question from user {i}"]
+
+
+def test_shared_rate_limiter_is_exact_under_contention():
+    guardrails = ContentGuardrails()
+    allowed = []
+    lock = threading.Lock()
+
+    def request(i):
+        ok = guardrails._check_rate_limit(user_id=1)
+        with lock:
+            allowed.append(ok)
+
+    run_threads(request, 50)
+    assert sum(allowed) == guardrails.max_requests_per_minute
+    assert len(guardrails.user_request_history[1]) == guardrails.max_requests_per_minute
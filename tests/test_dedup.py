@@ -0,0 +1,66 @@
+"""
+Chunk deduplication: near-identical chunks are stored once with every
+source file and section citation they came from, and MMR keeps
+near-duplicates out of the selected context.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.chunking import document_citations
+from src.retrieval.dedup import deduplicate_chunks, document_sources, find_duplicate_groups, mmr_select
+
+POLICY = ("Employees must submit expense reports through the finance portal within thirty days "
+          "of incurring the cost, attaching itemised receipts for every purchase over twenty dollars.")
+
+
+def chunk(text, source, section):
+    return SimpleNamespace(page_content=text, metadata={
+        "source_file": source,
+        "section": section,
+        "citations": f"{source}#{section}",
+    })
+
+
+def test_near_duplicates_are_grouped_and_distinct_text_is_not():
+    texts = [POLICY, POLICY.replace("dollars", "euros"), "Laptops are issued by IT on your first day.", POLICY]
+
+    groups = find_duplicate_groups(texts)
+
+    assert sorted(groups) == [[0, 1, 3], [2]]
+
+
+def test_duplicates_keep_every_source_and_section_citation():
+    chunks = [
+        chunk(POLICY, "expense_policy.md", "Deadlines"),
+        chunk("Laptops are issued by IT on your first day.", "it_setup.md", "Hardware"),
+        chunk(POLICY, "travel_guidelines.md", "Expenses"),
+        chunk(POLICY, "expense_policy.md", "Deadlines"),
+    ]
+
+    kept = deduplicate_chunks(chunks)
+
+    assert len(kept) == 2
+    merged = kept[0]
+    assert merged.metadata["duplicate_count"] == 3
+    assert document_sources(merged) == ["expense_policy.md", "travel_guidelines.md"]
+    assert document_citations(merged) == ["expense_policy.md#Deadlines", "travel_guidelines.md#Expenses"]
+    assert document_citations(kept[1]) == ["it_setup.md#Hardware"]
+
+
+def test_mmr_skips_near_duplicates_and_keeps_relevance_order():
+    candidates = [
+        (chunk(POLICY, "a.md", "A"), 0.9),
+        (chunk(POLICY.replace("dollars", "euros"), "b.md", "B"), 0.89),
+        (chunk("Laptops are issued by IT on your first day.", "c.md", "C"), 0.5),
+        (chunk("Annual leave is requested in the HR system two weeks ahead.", "d.md", "D"), 0.4),
+    ]
+
+    selected = mmr_select(candidates, k=3)
+
+    assert [doc.metadata["source_file"] for doc in selected] == ["a.md", "c.md", "d.md"]
+    assert mmr_select(candidates, k=1) == [candidates[0][0]]
+    assert mmr_select([], k=3) == []
@@ -0,0 +1,103 @@
+"""
+Embedding providers: the local provider only picks ONNX when the model
+actually loads, OpenAI batches keep their order, an offline setup needs no
+API key, and a collection is never queried with another provider.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import src.retrieval.embeddings as embeddings_module
+from src.retrieval.embeddings import HashingEmbeddingProvider, create_embedding_provider
+from src.utils.config import Config
+
+
+class FakeOnnx(embeddings_module.EmbeddingProvider):
+    name = "onnx:fake"
+    fail = False
+
+    def _embed_batch(self, texts):
+        if self.fail:
+            raise OSError("model download failed")
+        return [[1.0, 0.0] for _ in texts]
+
+
+def test_hashing_embeddings_are_deterministic_unit_vectors():
+    provider = HashingEmbeddingProvider(dimension=64)
+    first, second = provider.embed_documents(["Submit receipts within 30 days", "Laptops on day one"])
+
+    assert provider.name == "hashing:64" and len(first) == 64
+    assert sum(x * x for x in first) == pytest.approx(1.0)
+    assert provider.embed_query("Submit receipts within 30 days") == first
+    assert first != second
+
+
+@pytest.mark.parametrize("fail, expected", [(False, "onnx:fake"), (True, "hashing")])
+def test_local_provider_falls_back_when_the_model_cannot_load(monkeypatch, fail, expected):
+    # The ONNX model downloads lazily on the first call, not in the constructor
+    monkeypatch.setattr(FakeOnnx, "fail", fail)
+    monkeypatch.setattr(embeddings_module, "OnnxEmbeddingProvider", FakeOnnx)
+
+    assert create_embedding_provider("local").name.startswith(expected)
+
+
+def test_openai_batches_keep_input_order(monkeypatch):
+    requests = []
+
+    def embeddings(timeout, model, input, **params):
+        requests.append((input, params))
+        # The API may return items in any order; `index` says which input they belong to
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+    monkeypatch.setattr(embeddings_module, "get_resilient_client", lambda: SimpleNamespace(embeddings=embeddings))
+    provider = embeddings_module.OpenAIEmbeddingProvider(model="m", dimensions=256, batch_size=2, num_threads=1)
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    assert provider.embed_documents(texts) == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert [len(batch) for batch, _ in requests] == [2, 2, 1]
+    assert requests[0][1] == {"dimensions": 256}
+    assert provider.name == "openai:m:256"
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError):
+        create_embedding_provider("word2vec")
+
+
+@pytest.mark.parametrize("provider, ok", [("hashing", True), ("local", True), ("openai", False)])
+def test_api_key_is_only_required_for_openai_embeddings(monkeypatch, provider, ok):
+    monkeypatch.setattr(Config, "_secrets", {"EMBEDDING_PROVIDER": provider, "OPENAI_API_KEY": None})
+    monkeypatch.setattr(Config, "_validated", False)
+
+    if ok:
+        assert Config.validate()
+    else:
+        with pytest.raises(ValueError):
+            Config.validate()
+
+
+def test_collection_from_another_provider_is_refused(tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+    from src.retrieval.vector_store import LEGACY_EMBEDDING_PROVIDER, VectorStore
+
+    store = VectorStore.__new__(VectorStore)
+    store.client = chromadb.PersistentClient(path=str(tmp_path))
+    store.client.create_collection("admin_policy_docs", metadata={"embedding_provider": "hashing:8"},
+                                   embedding_function=None)
+    store.client.create_collection("role_specific_docs", embedding_function=None)
+
+    store.embeddings = SimpleNamespace(name="onnx:all-MiniLM-L6-v2")
+    with pytest.raises(ValueError, match="hashing:8"):
+        store._open_collection("admin_policy")
+    # Collections from before providers were recorded hold OpenAI vectors
+    with pytest.raises(ValueError, match=LEGACY_EMBEDDING_PROVIDER):
+        store._open_collection("role_specific")
+
+    store.embeddings = SimpleNamespace(name="hashing:8")
+    store._open_collection("admin_policy")
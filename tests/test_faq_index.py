@@ -0,0 +1,143 @@
+"""
+FAQ index: built per corpus section, rebuilt only where sections change,
+stale entries never served, exact and nearest-neighbour lookup.
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.agents.assistant import AITrainingAssistant
+from src.retrieval.embeddings import HashingEmbeddingProvider
+from src.retrieval.faq_index import FAQIndex, corpus_sections
+from src.utils.config import Config
+
+MANIFEST = {"routes": {
+    "admin_policy": {"suggested_paths": ["corpus/policies/"]},
+    "direct_llm": {"suggested_paths": []},
+}}
+
+EXPENSES = """# Expense Policy
+
+## Submitting Expenses
+Submit receipts in the expense portal within 30 days.
+
+## Meals
+Meals are reimbursed up to the daily limit.
+"""
+
+
+class FakeClient:
+    """Answers every section with one question about its title"""
+
+    def __init__(self):
+        self.calls = []
+
+    def chat_completion(self, **params):
+        self.calls.append(params)
+        section = params["messages"][0]["content"].split("Section: ")[1].splitlines()[0]
+        title = section.split(" > ")[-1].lower()
+        pairs = [{"question": f"What is the policy on {title}?", "answer": f"See the {title} rules."}]
+        message = SimpleNamespace(content=json.dumps({"pairs": pairs}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setitem(Config._secrets, "OPENAI_MODEL", "gpt-4o-mini")
+    (tmp_path / "policies").mkdir()
+    (tmp_path / "policies" / "expense_policy.md").write_text(EXPENSES, encoding="utf-8")
+    return tmp_path
+
+
+def index_for(corpus):
+    return FAQIndex(HashingEmbeddingProvider(dimension=256), path=corpus / "faq_index.json", threshold=0.8)
+
+
+def test_sections_carry_route_citation_and_hash(corpus):
+    sections = corpus_sections(MANIFEST, corpus)
+
+    assert list(sections) == ["expense_policy.md#Submitting Expenses", "expense_policy.md#Meals"]
+    meals = sections["expense_policy.md#Meals"]
+    assert meals["route"] == "admin_policy"
+    assert meals["heading_path"] == "Expense Policy > Meals"
+    assert meals["hash"] != sections["expense_policy.md#Submitting Expenses"]["hash"]
+
+
+def test_build_then_exact_and_nearest_lookup(corpus):
+    client = FakeClient()
+    stats = index_for(corpus).build(client, corpus_sections(MANIFEST, corpus))
+
+    assert stats == {"reused": 0, "generated": 2, "failed": 0, "removed": 0, "entries": 2}
+    assert client.calls[0]["response_format"]["type"] == "json_schema"
+
+    index = index_for(corpus).load(corpus_sections(MANIFEST, corpus))
+    exact = index.lookup("  what is the policy on MEALS? ")
+    assert exact["match"] == "exact" and exact["citation"] == "expense_policy.md#Meals"
+
+    nearest = index.lookup("What is the policy on meals, please?")
+    assert nearest["match"] == "nearest" and nearest["source_file"] == "expense_policy.md"
+    assert index.lookup("How do I reset my laptop password?") is None
+
+
+def test_changed_section_is_skipped_until_rebuilt(corpus):
+    client = FakeClient()
+    index_for(corpus).build(client, corpus_sections(MANIFEST, corpus))
+
+    path = corpus / "policies" / "expense_policy.md"
+    path.write_text(EXPENSES.replace("daily limit", "per-diem rate"), encoding="utf-8")
+    current = corpus_sections(MANIFEST, corpus)
+
+    index = index_for(corpus).load(current)
+    assert index.stale_sections == 1
+    assert index.lookup("What is the policy on meals?") is None
+    assert index.lookup("What is the policy on submitting expenses?") is not None
+
+    client.calls.clear()
+    stats = index_for(corpus).build(client, current)
+    assert stats["reused"] == 1 and stats["generated"] == 1 and len(client.calls) == 1
+    assert index_for(corpus).load(current).lookup("What is the policy on meals?") is not None
+
+
+def test_assistant_serves_match_with_citation(corpus):
+    index_for(corpus).build(FakeClient(), corpus_sections(MANIFEST, corpus))
+    assistant = AITrainingAssistant.__new__(AITrainingAssistant)
+    assistant.faq = index_for(corpus).load(corpus_sections(MANIFEST, corpus))
+
+    result = assistant.faq_answer("What is the policy on meals?")
+    assert result["answer"] == "See the meals rules."
+    assert result["route"] == "admin_policy"
+    assert result["citations"] == ["expense_policy.md#Meals"]
+    assert assistant.faq_answer("What is the weather today?") is None
+
+
+def test_faq_miss_and_retrieval_embed_the_question_once(corpus):
+    pytest.importorskip("numpy")
+    pytest.importorskip("langchain_core")
+    from src.retrieval.quantized_index import QuantizedIndex
+
+    class CountingProvider(HashingEmbeddingProvider):
+        embedded = []
+
+        def _embed_batch(self, texts):
+            self.embedded.extend(texts)
+            return super()._embed_batch(texts)
+
+    embeddings = CountingProvider(dimension=256)
+    index_for(corpus).build(FakeClient(), corpus_sections(MANIFEST, corpus))
+    faq = FAQIndex(embeddings, path=corpus / "faq_index.json", threshold=0.8).load(corpus_sections(MANIFEST, corpus))
+    docs = [SimpleNamespace(page_content="Laptops are issued by IT.", metadata={})]
+    collection = QuantizedIndex(corpus / "index", embeddings, "int8").build_from_vectors(
+        docs, HashingEmbeddingProvider(dimension=256).embed_documents([docs[0].page_content])
+    )
+    embeddings.embedded.clear()
+
+    question = "How do I get a laptop?"
+    assert faq.lookup(question) is None
+    assert collection.similarity_search(question, k=1)[0].page_content == "Laptops are issued by IT."
+    assert embeddings.embedded == [question]
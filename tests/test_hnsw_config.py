@@ -0,0 +1,57 @@
+"""
+HNSW settings: config.yaml overrides Chroma's defaults per route, they
+become collection metadata, and a stored collection picks up a changed
+search_ef when it is opened.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils.config import Config
+
+
+def test_shipped_config_covers_every_rag_route():
+    for route in Config.ROUTES[:-1]:
+        assert set(Config.hnsw_params(route)) == set(Config.HNSW_DEFAULTS)
+
+
+def test_route_overrides_default_field_by_field(monkeypatch):
+    monkeypatch.setattr(Config, "_settings", {"hnsw": {
+        "default": {"M": 32},
+        "admin_policy": {"search_ef": 40, "space": "cosine"},
+    }})
+
+    assert Config.hnsw_params("admin_policy") == {"space": "cosine", "M": 32, "construction_ef": 100, "search_ef": 40}
+    assert Config.hnsw_params("role_specific")["search_ef"] == Config.HNSW_DEFAULTS["search_ef"]
+    assert Config.hnsw_metadata("admin_policy")["hnsw:search_ef"] == 40
+
+
+@pytest.mark.parametrize("settings", [{"admin_policy": {"ef": 10}}, {"default": {"space": "manhattan"}}])
+def test_invalid_settings_are_rejected(monkeypatch, settings):
+    monkeypatch.setattr(Config, "_settings", {"hnsw": settings})
+    with pytest.raises(ValueError):
+        Config.hnsw_params("admin_policy")
+
+
+def test_opening_a_collection_applies_search_ef(tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+    from src.retrieval.vector_store import VectorStore
+
+    store = VectorStore.__new__(VectorStore)
+    store.client = chromadb.PersistentClient(path=str(tmp_path))
+    store.embeddings = SimpleNamespace(name="hashing:8")
+    metadata = {"embedding_provider": "hashing:8", **Config.hnsw_metadata("admin_policy"), "hnsw:search_ef": 10}
+    store.client.create_collection("admin_policy_docs", metadata=metadata, embedding_function=None)
+
+    store._open_collection("admin_policy")
+    hnsw = store.client.get_collection("admin_policy_docs").configuration["hnsw"]
+    assert hnsw["ef_search"] == Config.hnsw_params("admin_policy")["search_ef"]
+
+    store.embeddings = SimpleNamespace(name="hashing:16")
+    with pytest.raises(ValueError):
+        store._open_collection("admin_policy")
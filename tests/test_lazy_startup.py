@@ -0,0 +1,42 @@
+"""
+Cold start: importing the assistant pulls in none of the heavy client
+libraries, and config secrets are resolved once, on first use.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils.config import Config
+
+ROOT = Path(__file__).parent.parent
+HEAVY_MODULES = ("openai", "chromadb", "langchain_community", "langchain_openai", "pandas", "streamlit", "dotenv")
+
+
+def test_importing_assistant_defers_heavy_modules():
+    code = (
+        "import sys; import src.agents.assistant; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_secret_is_resolved_once_and_cached(monkeypatch):
+    monkeypatch.setattr(Config, "_secrets", {})
+    calls = []
+    monkeypatch.setattr(Config, "_resolve_secret", staticmethod(lambda name, default=None: calls.append(name) or "v1"))
+
+    assert Config.OPENAI_MODEL == "v1"
+    assert Config.OPENAI_MODEL == "v1"
+    assert calls == ["OPENAI_MODEL"]
+
+
+def test_environment_is_read_without_streamlit(monkeypatch):
+    monkeypatch.setattr(Config, "_secrets", {})
+    monkeypatch.delitem(sys.modules, "streamlit", raising=False)
+    monkeypatch.setenv("ANSWER_MODE", "single_call")
+
+    assert Config.ANSWER_MODE == "single_call"
@@ -0,0 +1,111 @@
+"""
+Query-embedding micro-batching: concurrent callers share upstream batches,
+each gets its own result back, and the added wait is bounded.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.micro_batcher import MicroBatcher
+
+USERS = 64
+
+
+class SlowUpstream:
+    """Embeds by echoing each text's length; every call costs a round trip"""
+
+    def __init__(self, round_trip_s: float = 0.02):
+        self.round_trip_s = round_trip_s
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        time.sleep(self.round_trip_s)
+        return [[float(len(text))] for text in texts]
+
+
+def load(embed, users=USERS, queries_per_user=5):
+    """Each user embeds its own queries back to back; returns (results, latencies, elapsed)"""
+    results, latencies = {}, []
+    lock = threading.Lock()
+
+    def user(u):
+        for q in range(queries_per_user):
+            text = f"user {u} question {'x' * q}"
+            start = time.perf_counter()
+            vector = embed(text)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                results[text] = vector
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(u,)) for u in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, latencies, time.perf_counter() - start
+
+
+def test_results_fan_back_to_the_right_callers():
+    upstream = SlowUpstream()
+    batcher = MicroBatcher(upstream, max_batch_size=16, max_wait_ms=5)
+
+    results, _, _ = load(batcher.submit)
+
+    assert len(results) == USERS * 5
+    assert all(vector == [float(len(text))] for text, vector in results.items())
+    assert max(len(batch) for batch in upstream.batches) <= 16
+    stats = batcher.stats()
+    assert stats["items"] == USERS * 5 and stats["batches"] == len(upstream.batches)
+
+
+def test_fewer_upstream_calls_and_bounded_latency_under_load():
+    single = SlowUpstream()
+    _, _, unbatched_s = load(lambda text: single([text])[0])
+
+    batched = SlowUpstream()
+    batcher = MicroBatcher(batched, max_batch_size=32, max_wait_ms=5)
+    _, latencies, batched_s = load(batcher.submit)
+
+    assert len(batched.batches) * 4 <= len(single.batches)
+    assert batcher.stats()["mean_batch"] >= 4
+    # A query waits at most one window plus its own round trip (with scheduling slack)
+    assert max(latencies) < 0.005 + 0.02 + 0.1
+    assert batched_s < unbatched_s * 2
+
+
+def test_lone_caller_waits_at_most_the_window():
+    batcher = MicroBatcher(SlowUpstream(round_trip_s=0), max_batch_size=32, max_wait_ms=5)
+    start = time.perf_counter()
+    assert batcher.submit("hello") == [5.0]
+    assert time.perf_counter() - start < 0.05
+
+
+def test_a_failed_batch_fails_every_caller_in_it():
+    def broken(texts):
+        time.sleep(0.01)
+        raise ConnectionError("upstream down")
+
+    batcher = MicroBatcher(broken, max_batch_size=8, max_wait_ms=20)
+    errors = []
+
+    def call():
+        try:
+            batcher.submit("q")
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 8
+    assert batcher.stats()["failures"] == 1
@@ -0,0 +1,89 @@
+"""
+Streaming output scanner: any chunking of an answer releases exactly
+sanitize_output(answer), tone is judged on whole words, and per-chunk work
+stays bounded.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import src.guardrails.streaming as streaming_module
+from src.guardrails.content_guardrails import UNPROFESSIONAL_WORDS, ContentGuardrails, ResponseGuardrails
+from src.guardrails.streaming import StreamingOutputScanner
+
+ANSWERS = [
+    "Call HR at 555-123-4567 or 555.123.4567. SSN 123-45-6789 must never be shared.",
+    "Card 4111111111111111 was charged; ref 1234567890123456789 is not a card.",
+    "Codes: 12-34-5678, 123-456-78901, 5551234567, v1.2.3 and 2024-01-31.",
+    "Room 12 on floor 3. " * 5 + "Reach us at 800-555-0199",
+    "1" * 100 + " then 123-45-6789 then " + "9-" * 40 + "555-123-4567",
+    "No digits here at all, just policy text.",
+]
+
+
+def chunked(text, rng):
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, 8)
+        yield text[pos:pos + size]
+        pos += size
+
+
+@pytest.mark.parametrize("answer", ANSWERS)
+def test_any_chunking_matches_full_sanitize(answer):
+    expected = ContentGuardrails().sanitize_output(answer)
+    rng = random.Random(answer)
+    for _ in range(50):
+        scanner = StreamingOutputScanner()
+        assert "".join(scanner.stream(chunked(answer, rng))) == expected
+    assert "".join(StreamingOutputScanner().stream(answer)) == expected
+
+
+def test_masks_are_released_as_soon_as_the_match_ends():
+    scanner = StreamingOutputScanner()
+    assert scanner.feed("SSN 123-45-") == "SSN "
+    assert scanner.feed("6789") == ""
+    assert scanner.feed(" ok") == "XXX-XX-XXXX ok"
+    assert scanner.masked_count == 1
+
+
+@pytest.mark.parametrize("answer, professional", [
+    ("Check your benefits portal.", True),
+    ("Your manager approves it, yo.", False),
+    ("Sure bro, here you go", False),
+    ("Brochures are in the lobby", True),
+])
+def test_tone_uses_whole_words(answer, professional):
+    assert ResponseGuardrails.ensure_professional_tone(answer) is professional
+    scanner = StreamingOutputScanner()
+    list(scanner.stream(chunked(answer, random.Random(0))))
+    assert scanner.professional is professional
+
+
+def test_per_chunk_work_is_bounded(monkeypatch):
+    scanned = []
+    mask_text = streaming_module.mask_text
+
+    def counting_mask_text(text, start=0, end=None):
+        scanned.append(len(text))
+        return mask_text(text, start, end)
+
+    monkeypatch.setattr(streaming_module, "mask_text", counting_mask_text)
+    answer = ("Expenses go to finance. " + "7" * 50 + " ") * 400
+    scanner = StreamingOutputScanner()
+    max_chunk = 8
+    for chunk in chunked(answer, random.Random(1)):
+        scanner.feed(chunk)
+        # Held text never grows with the length of the answer
+        assert len(scanner._buffer) <= scanner.lookbehind
+        assert len(scanner._tone_carry) <= max(len(w) for w in UNPROFESSIONAL_WORDS)
+    scanner.finish()
+
+    # Each release masks the new text plus at most the held-back tail
+    assert len(scanned) > 100
+    assert max(scanned) <= 1 + scanner.lookbehind + max_chunk
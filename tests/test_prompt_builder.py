@@ -0,0 +1,153 @@
+"""
+Token-budgeted prompts and the rolling history summary: context is fitted
+best first within the budget, old turns are summarized per session in the
+background, and summaries never cross sessions.
+"""
+
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import src.agents.history as history_module
+from src.agents.history import HistorySummarizer
+from src.prompts.builder import PromptBuilder, count_message_tokens, count_tokens
+from src.utils.config import config
+from src.utils.scheduler import BACKGROUND, current_context
+
+
+class FakeClient:
+    """Summarizes by listing the contents of the turns it was given"""
+
+    def __init__(self, gate: threading.Event = None):
+        self.calls = []
+        self.gate = gate
+
+    def chat_completion(self, **kwargs):
+        self.calls.append((current_context(), kwargs["messages"][0]["content"]))
+        if self.gate:
+            self.gate.wait(5)
+        prompt = kwargs["messages"][0]["content"]
+        turns = [line.split(": ", 1)[1] for line in prompt.splitlines() if line.startswith(("user: ", "assistant: "))]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=" | ".join(turns)))])
+
+
+@pytest.fixture
+def make_summarizer(monkeypatch):
+    def make(client):
+        monkeypatch.setattr(history_module, "get_resilient_client", lambda: client)
+        return HistorySummarizer()
+    return make
+
+
+def conversation(turns, tag=""):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"{tag}question {i}"})
+        messages.append({"role": "assistant", "content": f"{tag}answer {i}"})
+    return messages
+
+
+def test_fit_context_drops_lowest_ranked_and_truncates_the_last():
+    builder = PromptBuilder()
+    long_chunk = "word " * 400
+    fitted = builder.fit_context(["best chunk", long_chunk, "never reached"], 100)
+
+    assert fitted[0] == "best chunk"
+    assert len(fitted) == 2 and count_tokens(fitted[1]) <= 100 - count_tokens("best chunk")
+    # Too little room left for a useful fragment: the chunk is dropped
+    first = "x " * 80
+    room = count_tokens(first) + config.MIN_CHUNK_TOKENS - 1
+    assert builder.fit_context([first, "y " * 400], room) == [first]
+
+
+def test_build_stays_within_budget_and_keeps_the_question():
+    builder = PromptBuilder(budget=300, history_budget=100)
+    result = builder.build(
+        "You are helpful.",
+        "Context: {context}\nQuestion: {question}",
+        "Where are receipts submitted?",
+        conversation(3),
+        chunks=["chunk " * 100 for _ in range(5)],
+    )
+
+    assert result["prompt_tokens"] == count_message_tokens(result["messages"]) <= 300
+    assert 0 < result["chunks_used"] < 5
+    assert result["messages"][0]["role"] == "system"
+    assert result["messages"][-1]["content"].endswith("Question: Where are receipts submitted?")
+
+
+def test_summary_does_not_block_the_turn_and_runs_in_the_background(make_summarizer):
+    gate = threading.Event()
+    client = FakeClient(gate)
+    summarizer = make_summarizer(client)
+    older = conversation(2)
+
+    # The summary is not ready yet: the turn proceeds without one
+    assert summarizer("session-a", older) == ""
+    gate.set()
+    summarizer.wait(5)
+
+    assert summarizer("session-a", older) == "question 0 | answer 0 | question 1 | answer 1"
+    assert len(client.calls) == 1
+    assert client.calls[0][0] == (BACKGROUND, "session-a")
+
+
+def test_new_turns_are_folded_into_the_existing_summary(make_summarizer):
+    client = FakeClient()
+    summarizer = make_summarizer(client)
+    history = conversation(3)
+
+    summarizer("session-a", history[:4])
+    summarizer.wait(5)
+    summarizer("session-a", history)
+    summarizer.wait(5)
+
+    # The second call only sends the turns the summary did not cover yet
+    assert "question 0" not in client.calls[1][1].split("New turns")[-1]
+    assert "question 2" in client.calls[1][1]
+    assert summarizer("session-a", history) == "question 2 | answer 2"
+    assert len(client.calls) == 2
+
+
+def test_summaries_are_not_shared_between_sessions(make_summarizer):
+    client = FakeClient()
+    summarizer = make_summarizer(client)
+    # Same opening question, different private follow-ups
+    alice = [{"role": "user", "content": "question 0"}, {"role": "assistant", "content": "alice secret"}]
+    bob = [{"role": "user", "content": "question 0"}, {"role": "assistant", "content": "bob answer"}]
+
+    summarizer("alice", alice)
+    summarizer.wait(5)
+    assert summarizer("bob", bob) == ""
+    summarizer.wait(5)
+    assert "alice" not in summarizer("bob", bob)
+
+
+def test_without_a_session_the_summary_is_keyed_on_the_turns(make_summarizer):
+    gate = threading.Event()
+    client = FakeClient(gate)
+    summarizer = make_summarizer(client)
+    alice = conversation(2, "alice ")
+
+    # No blocking call on the turn: the summary is folded in the background
+    assert summarizer(None, alice[:2]) == ""
+    gate.set()
+    summarizer.wait(5)
+    assert summarizer(None, alice[:2]) == "alice question 0 | alice answer 0"
+    assert summarizer(None, conversation(1, "bob ")) == ""
+    summarizer.wait(5)
+
+    # A longer history reuses the summary of its leading turns and only
+    # sends the new ones
+    assert summarizer(None, alice) == "alice question 0 | alice answer 0"
+    summarizer.wait(5)
+    assert "alice question 0" not in client.calls[-1][1].split("New turns")[-1]
+    assert summarizer(None, alice) == "alice question 1 | alice answer 1"
+    assert summarizer(None, conversation(1, "bob ")) == "bob question 0 | bob answer 0"
+    assert len(client.calls) == 3
+    assert all(priority == BACKGROUND for (priority, _), _ in client.calls)
@@ -0,0 +1,94 @@
+"""
+Prompt-cache friendly layout: the static prompt and context lead in a
+fixed order, usage reports cached tokens, and the mock server's prefix
+cache behaves like the provider's.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.evaluation.mock_openai_server import MockOpenAIState, mock_chat_completion
+from src.prompts.builder import PromptBuilder
+from src.prompts.templates import RAG_CONTEXT_TEMPLATE, RAG_QUESTION_TEMPLATE, RAG_SYSTEM_PROMPT
+from src.retrieval.chunking import chunk_sort_key
+from src.utils.clients import completion_usage
+
+
+def doc(source, index, text):
+    return SimpleNamespace(page_content=text, metadata={"source_file": source, "chunk_index": index})
+
+
+DOCS = [
+    doc("travel_guidelines.md", 3, "Book travel through the portal."),
+    doc("expense_policy.md", 1, "Submit receipts within 30 days."),
+    doc("expense_policy.md", 0, "Meals are reimbursed up to the daily limit."),
+]
+
+
+def build(docs, question="How do I claim expenses?", history=None):
+    return PromptBuilder().build_cacheable(
+        RAG_SYSTEM_PROMPT,
+        RAG_CONTEXT_TEMPLATE,
+        RAG_QUESTION_TEMPLATE,
+        question,
+        history or [],
+        chunks=[d.page_content for d in docs],
+        chunk_keys=[chunk_sort_key(d) for d in docs],
+    )
+
+
+def test_static_prompt_and_context_come_before_history_and_question():
+    history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}]
+    messages = build(DOCS, history=history)["messages"]
+
+    assert [m["role"] for m in messages] == ["system", "system", "user", "assistant", "user"]
+    assert messages[0]["content"] == RAG_SYSTEM_PROMPT
+    assert messages[1]["content"].startswith("Context from company documents:")
+    assert messages[-1]["content"].startswith("Question: How do I claim expenses?")
+
+
+def test_context_order_does_not_depend_on_retrieval_rank():
+    forward = build(DOCS)
+    backward = build(list(reversed(DOCS)), question="Different wording entirely?")
+
+    assert forward["messages"][:2] == backward["messages"][:2]
+    assert forward["stable_prefix_tokens"] == backward["stable_prefix_tokens"]
+    context = forward["messages"][1]["content"]
+    assert context.index("Meals") < context.index("Submit") < context.index("Book")
+
+
+def test_completion_usage_reads_sdk_objects_and_batch_bodies():
+    body = {"usage": {"prompt_tokens": 1500, "completion_tokens": 40,
+                      "prompt_tokens_details": {"cached_tokens": 1280}}}
+    response = SimpleNamespace(usage=SimpleNamespace(
+        prompt_tokens=1500, completion_tokens=40,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=1280)))
+    expected = {"prompt_tokens": 1500, "completion_tokens": 40, "cached_tokens": 1280}
+
+    assert completion_usage(body) == expected
+    assert completion_usage(response) == expected
+    assert completion_usage({"usage": {"prompt_tokens": 10, "completion_tokens": 2}})["cached_tokens"] == 0
+    assert completion_usage(SimpleNamespace(usage=None)) == {}
+
+
+def test_mock_prefix_cache_needs_minimum_and_counts_whole_blocks():
+    state = MockOpenAIState()
+    long_prefix = [{"role": "system", "content": "Policy text. " * 600}]
+    short = [{"role": "system", "content": "Short prompt."}, {"role": "user", "content": "Hi"}]
+
+    assert state.cached_tokens(short) == 0
+    assert state.cached_tokens(short) == 0
+
+    first = state.cached_tokens(long_prefix + [{"role": "user", "content": "Question one?"}])
+    second = state.cached_tokens(long_prefix + [{"role": "user", "content": "Another question?"}])
+    assert first == 0
+    assert second >= state.cache_min_tokens
+    assert second % state.cache_block_tokens == 0
+
+    body = {"model": "gpt-4o-mini", "messages": long_prefix + [{"role": "user", "content": "Another question?"}]}
+    usage = mock_chat_completion(body, cached_tokens=second)["usage"]
+    assert usage["prompt_tokens_details"]["cached_tokens"] == second
+    assert usage["prompt_tokens"] > second
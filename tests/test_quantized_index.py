@@ -0,0 +1,76 @@
+"""
+Quantized vector index: int8 and binary codes find the same neighbours as
+a full-precision scan, distances match Chroma's space, and an index is
+never opened with other embedding settings.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+
+from src.retrieval.embeddings import HashingEmbeddingProvider
+from src.retrieval.quantized_index import QuantizedIndex, quantize_binary, quantize_int8
+
+TEXTS = [
+    "Submit expense reports in the expense portal within 30 days.",
+    "Meals are reimbursed up to the daily limit when travelling.",
+    "Laptops are issued by IT on your first day.",
+    "Request annual leave in the HR system two weeks ahead.",
+    "The security team rotates badge access every quarter.",
+    "Timesheets are due every Friday by 5pm.",
+]
+
+
+@pytest.fixture
+def embeddings():
+    return HashingEmbeddingProvider(dimension=256)
+
+
+def build(tmp_path, embeddings, quantization):
+    docs = [Document(page_content=text, metadata={"source_file": f"doc{i}.md"}) for i, text in enumerate(TEXTS)]
+    return QuantizedIndex(tmp_path / quantization, embeddings, quantization).build(docs)
+
+
+def test_codes_are_compact_and_close_to_the_vectors():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((100, 64)).astype(np.float32)
+
+    codes, scale = quantize_int8(vectors)
+    assert codes.dtype == np.int8 and codes.nbytes == vectors.nbytes // 4
+    assert np.abs(codes * scale - vectors).max() <= scale.max() / 2 + 1e-6
+    assert quantize_binary(vectors).shape == (100, 8)
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_quantized_search_matches_full_precision(tmp_path, embeddings, quantization):
+    exact = build(tmp_path, embeddings, "none")
+    index = build(tmp_path, embeddings, quantization)
+
+    for text in ["How do I submit an expense report?", "When are timesheets due?", "first day laptop"]:
+        expected = exact.similarity_search_with_score(text, k=2)
+        found = index.similarity_search_with_score(text, k=2)
+        assert [doc.page_content for doc, _ in found] == [doc.page_content for doc, _ in expected]
+        # Rescored in full precision: the same squared L2 distances
+        assert [d for _, d in found] == pytest.approx([d for _, d in expected], abs=1e-5)
+
+
+def test_reopened_index_keeps_documents_and_rejects_other_settings(tmp_path, embeddings):
+    build(tmp_path, embeddings, "int8")
+
+    index = QuantizedIndex(tmp_path / "int8", embeddings, "int8").load()
+    assert len(index) == len(TEXTS)
+    assert index.similarity_search("expense portal", k=1)[0].metadata["source_file"] == "doc0.md"
+    assert set(index.size_bytes()) == {"codes.npy", "scale.npy", "vectors.npy", "documents.json", "meta.json"}
+
+    with pytest.raises(ValueError):
+        QuantizedIndex(tmp_path / "int8", embeddings, "binary").load()
+    with pytest.raises(ValueError):
+        QuantizedIndex(tmp_path / "int8", HashingEmbeddingProvider(dimension=128), "int8").load()
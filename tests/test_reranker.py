@@ -0,0 +1,122 @@
+"""
+Rerank stage: relevant chunks first, scores in [0, 1], cached by
+(question, chunk) and evicted least recently used.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.retrieval.reranker import LexicalReranker, RerankCache, chunk_id, create_reranker
+
+
+def doc(text, source="handbook.md", index=0):
+    return SimpleNamespace(page_content=text, metadata={"source_file": source, "chunk_index": index})
+
+
+DOCS = [
+    doc("Laptops are issued by IT on your first day.", index=0),
+    doc("Submit expense reports in the expense portal within 30 days of purchase.", index=1),
+    doc("The cafeteria is open from 8am to 3pm.", index=2),
+]
+
+
+class CountingReranker(LexicalReranker):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.scored = 0
+
+    def _score_batch(self, query, texts):
+        self.scored += len(texts)
+        return super()._score_batch(query, texts)
+
+
+def test_lexical_reranker_puts_relevant_chunk_first():
+    ranked = LexicalReranker().rerank("How do I submit an expense report?", DOCS)
+
+    assert ranked[0][0] is DOCS[1]
+    assert all(0.0 <= score <= 1.0 for _, score in ranked)
+    assert ranked[0][1] > ranked[1][1]
+    assert len(LexicalReranker().rerank("expense report", DOCS, top_n=2)) == 2
+
+
+def test_scores_are_cached_per_question_and_chunk():
+    reranker = CountingReranker()
+    first = reranker.rerank("How do I submit an expense report?", DOCS)
+    # Normalized to the same question, with one new chunk
+    extra = doc("Expense reports need a receipt.", index=3)
+    second = reranker.rerank("how do I submit an EXPENSE report? ", DOCS + [extra])
+
+    assert reranker.scored == 4
+    assert [(d, s) for d, s in second if d is not extra] == first
+    assert reranker.cache.stats()["hits"] == 3
+
+
+def test_cache_evicts_least_recently_used():
+    cache = RerankCache(max_size=2)
+    cache.put(("q", "a"), 0.1)
+    cache.put(("q", "b"), 0.2)
+    assert cache.get(("q", "a")) == 0.1
+    cache.put(("q", "c"), 0.3)
+
+    assert cache.get(("q", "b")) is None
+    assert cache.get(("q", "a")) == 0.1 and cache.get(("q", "c")) == 0.3
+
+
+def test_chunk_id_depends_on_source_position_and_text():
+    assert chunk_id(doc("text")) == chunk_id(doc("text"))
+    assert chunk_id(doc("text")) != chunk_id(doc("text", index=1))
+    assert chunk_id(doc("text")) != chunk_id(doc("text", source="other.md"))
+
+
+def test_reranking_off_by_name():
+    assert create_reranker("none") is None
+    assert isinstance(create_reranker("lexical"), LexicalReranker)
+
+
+class FakeCollection:
+    def similarity_search_with_score(self, query, k):
+        return [(d, 0.1 * i) for i, d in enumerate(DOCS[:k])]
+
+
+def store_with(monkeypatch, create):
+    import threading
+    import src.retrieval.vector_store as vector_store_module
+    from src.retrieval.vector_store import VectorStore
+
+    monkeypatch.setattr(vector_store_module, "create_reranker", create)
+    store = VectorStore.__new__(VectorStore)
+    store.collections = {"admin_policy": FakeCollection()}
+    store._collections_lock = threading.Lock()
+    store._reranker, store._reranker_loaded, store._reranker_lock = None, False, threading.Lock()
+    return store
+
+
+def test_unavailable_reranker_is_tried_once_and_retrieval_goes_on(monkeypatch):
+    attempts = []
+
+    def create():
+        attempts.append(1)
+        raise OSError("offline: cannot download the cross-encoder")
+
+    store = store_with(monkeypatch, create)
+    for _ in range(3):
+        assert [d.page_content for d in store.query("laptops", "admin_policy", k=1)] == [DOCS[0].page_content]
+    assert store.load_reranker() is None
+    assert len(attempts) == 1
+
+
+def test_retrieval_failure_becomes_an_error_answer():
+    from src.agents.assistant import AITrainingAssistant
+
+    def failing_query(question, route):
+        raise RuntimeError("index unavailable")
+
+    assistant = AITrainingAssistant.__new__(AITrainingAssistant)
+    assistant.vector_store = SimpleNamespace(query=failing_query)
+
+    result = assistant._rag_answer("How do I submit expenses?", "admin_policy", [])
+    assert result["error"] == "index unavailable"
+    assert result["route"] == "admin_policy" and result["sources"] == []
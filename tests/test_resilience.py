@@ -0,0 +1,208 @@
+"""
+Retries, deadlines, circuit breaking and hedging for upstream calls.
+
+The unit tests drive ResilientClient.call with plain callables; the last
+tests run the real OpenAI SDK against the fault-injecting mock server.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils.resilience import (
+    CircuitBreaker, CircuitOpenError, DeadlineExceeded, ResilientClient, is_retryable
+)
+
+
+class UpstreamError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def failing(times, error):
+    """Callable that raises `error` for the first `times` calls, then succeeds"""
+    calls = []
+
+    def request(timeout):
+        calls.append(timeout)
+        if len(calls) <= times:
+            raise error
+        return "ok"
+
+    request.calls = calls
+    return request
+
+
+def make_client(raw=None, **kwargs):
+    kwargs.setdefault("base_delay", 0.001)
+    kwargs.setdefault("max_delay", 0.002)
+    return ResilientClient(raw or object(), **kwargs)
+
+
+def test_retryable_errors():
+    assert is_retryable(UpstreamError(429))
+    assert is_retryable(UpstreamError(503))
+    assert is_retryable(DeadlineExceeded())
+    assert not is_retryable(UpstreamError(400))
+    assert not is_retryable(CircuitOpenError())
+
+
+def test_retries_transient_errors_then_succeeds():
+    client = make_client(max_retries=2)
+    request = failing(2, UpstreamError(500))
+
+    assert client.call(request) == "ok"
+    assert len(request.calls) == 3
+    stats = client.stats()
+    assert stats["retries"] == 2 and stats["successes"] == 1
+    assert stats["breaker_state"] == "closed"
+
+
+def test_client_errors_are_not_retried():
+    client = make_client(max_retries=3)
+    request = failing(5, UpstreamError(400))
+
+    with pytest.raises(UpstreamError):
+        client.call(request)
+    assert len(request.calls) == 1
+
+
+def test_attempt_timeouts_shrink_to_the_deadline():
+    client = make_client(max_retries=5, base_delay=0.05, max_delay=0.05,
+                         breaker=CircuitBreaker(failure_threshold=100))
+    request = failing(10, UpstreamError(503))
+
+    with pytest.raises((UpstreamError, DeadlineExceeded)):
+        client.call(request, timeout=0.12)
+    assert all(timeout <= 0.12 for timeout in request.calls)
+    assert request.calls == sorted(request.calls, reverse=True)
+
+
+def test_breaker_opens_fails_fast_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    client = make_client(max_retries=0, breaker=breaker)
+
+    for _ in range(3):
+        with pytest.raises(UpstreamError):
+            client.call(failing(1, UpstreamError(502)))
+    assert breaker.state == "open"
+
+    request = failing(0, None)
+    with pytest.raises(CircuitOpenError):
+        client.call(request)
+    assert request.calls == []  # Upstream was never touched
+
+    time.sleep(0.06)
+    assert client.call(request) == "ok"  # Half-open trial succeeds
+    assert breaker.state == "closed"
+    assert client.stats()["breaker_rejections"] == 1
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_hedged_call_takes_the_faster_backup():
+    client = make_client()
+    first_call = threading.Event()
+
+    def request(timeout):
+        if not first_call.is_set():
+            first_call.set()
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    start = time.perf_counter()
+    assert client.call(request, timeout=2.0, hedge_after=0.05) == "fast"
+    assert time.perf_counter() - start < 0.4
+    stats = client.stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+
+@pytest.fixture
+def mock_server():
+    from src.evaluation.mock_openai_server import MockOpenAIServer
+    with MockOpenAIServer() as server:
+        yield server
+
+
+def sdk_client(server, **kwargs):
+    openai = pytest.importorskip("openai")
+    return make_client(openai.OpenAI(api_key="mock", base_url=server.base_url), **kwargs)
+
+
+ROUTER_PARAMS = {
+    "model": "gpt-4o-mini",
+    "messages": [
+        {"role": "system", "content": "You are a query classification assistant."},
+        {"role": "user", "content": "How do I submit expenses?"},
+    ],
+}
+
+
+def test_sdk_calls_survive_injected_server_errors(mock_server):
+    client = sdk_client(mock_server, max_retries=2)
+    mock_server.state.inject(status=500, count=2)
+
+    response = client.chat_completion(**ROUTER_PARAMS)
+
+    assert response.choices[0].message.content == "admin_policy"
+    assert mock_server.state.requests["/v1/chat/completions"] == 3
+
+
+def test_sdk_hung_call_is_cut_off_by_the_deadline(mock_server):
+    client = sdk_client(mock_server, max_retries=0)
+    mock_server.state.inject(hang_s=2.0)
+
+    start = time.perf_counter()
+    with pytest.raises(Exception) as error:
+        client.chat_completion(timeout=0.3, **ROUTER_PARAMS)
+    assert is_retryable(error.value)
+    assert time.perf_counter() - start < 1.5
+
+
+def test_sdk_hedge_routes_around_a_hung_call(mock_server):
+    client = sdk_client(mock_server)
+    mock_server.state.inject(hang_s=2.0)
+
+    start = time.perf_counter()
+    response = client.chat_completion(timeout=1.5, hedge_after=0.1, **ROUTER_PARAMS)
+
+    assert response.choices[0].message.content == "admin_policy"
+    assert time.perf_counter() - start < 1.0
+    assert client.stats()["hedge_wins"] == 1
+
+
+def test_sdk_scheduler_wait_ends_at_the_deadline_without_tripping_the_breaker(mock_server, monkeypatch):
+    openai = pytest.importorskip("openai")
+    from src.utils import clients
+    from src.utils.scheduler import LLMScheduler
+
+    scheduler = LLMScheduler(requests_per_minute=60)
+    scheduler._requests.level = 0.0  # next slot in one second
+    monkeypatch.setattr(clients, "_scheduler", scheduler)
+    raw = openai.OpenAI(api_key="mock", base_url=mock_server.base_url,
+                        http_client=openai.DefaultHttpxClient(event_hooks={"request": [clients._schedule_request]}))
+    client = make_client(raw, max_retries=2, breaker=CircuitBreaker(failure_threshold=1))
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        client.chat_completion(timeout=0.2, **ROUTER_PARAMS)
+
+    assert time.perf_counter() - start < 0.8
+    assert client.breaker.state == "closed" and client.breaker.failures == 0
+    assert client.stats()["scheduler_timeouts"] == 1
+    assert mock_server.state.requests.get("/v1/chat/completions", 0) == 0
@@ -0,0 +1,85 @@
+"""
+Per-route generation policy: config.yaml overrides the built-in defaults
+field by field, and the router and answer routes use their own policy.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.agents.router import QueryRouter
+from src.utils.clients import usage_cost
+from src.utils.config import Config
+
+
+@pytest.fixture(autouse=True)
+def default_model(monkeypatch):
+    monkeypatch.setitem(Config._secrets, "OPENAI_MODEL", "gpt-4o-mini")
+
+
+def test_shipped_config_covers_every_route():
+    for route in [*Config.ROUTES, "router", "single_call"]:
+        policy = Config.route_policy(route)
+        assert set(policy) == {"model", "max_tokens", "temperature", "timeout"}
+        assert policy["model"]
+    assert Config.route_policy("router")["max_tokens"] <= 8
+
+
+def test_yaml_overrides_defaults_field_by_field(monkeypatch):
+    monkeypatch.setattr(Config, "_settings", {"route_policies": {"direct_llm": {"model": "small-model", "max_tokens": 100}}})
+
+    direct = Config.route_policy("direct_llm")
+    assert direct["model"] == "small-model"
+    assert direct["max_tokens"] == 100
+    assert direct["temperature"] == Config.ROUTE_POLICY_DEFAULTS["direct_llm"]["temperature"]
+    assert Config.route_policy("admin_policy")["model"] == "gpt-4o-mini"
+    assert "timeout" not in Config.completion_params("direct_llm")
+
+    with pytest.raises(ValueError):
+        Config.route_policy("unknown")
+
+
+def test_router_requests_use_router_policy(monkeypatch):
+    monkeypatch.setattr(Config, "_settings", {"route_policies": {"router": {"model": "router-model", "max_tokens": 4}}})
+    router = QueryRouter.__new__(QueryRouter)
+
+    params = router.request_params(router.build_messages("How do I submit expenses?"))
+    assert params["model"] == "router-model"
+    assert params["max_tokens"] == 4
+    assert params["temperature"] == 0.0
+
+
+def test_usage_cost_discounts_cached_tokens(monkeypatch):
+    monkeypatch.setattr(Config, "_settings", {"model_prices": {"m": {"input": 1.0, "cached_input": 0.5, "output": 2.0}}})
+    usage = {"prompt_tokens": 1_000_000, "completion_tokens": 1_000_000, "cached_tokens": 400_000}
+
+    assert usage_cost(usage, "m") == pytest.approx(0.6 + 0.2 + 2.0)
+    assert usage_cost(usage, "unpriced") == 0.0
+    assert usage_cost({}, "m") == 0.0
+
+
+def test_route_costs_bucket_blocked_and_faq_answers_at_zero_cost(monkeypatch):
+    pd = pytest.importorskip("pandas")
+    from src.evaluation.evaluator import Evaluator
+
+    monkeypatch.setattr(Config, "_settings", {"model_prices": {"gpt-4o-mini": {"input": 1.0, "output": 2.0}}})
+    evaluator = Evaluator.__new__(Evaluator)
+    evaluator.eval_df = pd.DataFrame({"question": ["My SSN is 123-45-6789", "How many PTO days?", "Expenses?"]})
+    usage = {"prompt_tokens": 1_000_000, "completion_tokens": 0}
+    evaluator._answers = {
+        0: {"route": "guardrail_blocked", "blocked": True, "sources": []},
+        1: {"route": "admin_policy", "faq_match": {"score": 0.97}, "trace": {"mode": "faq", "total_ms": 2.0}},
+        2: {"route": "admin_policy", "usage": usage, "router_usage": usage, "trace": {"mode": "two_call"}},
+    }
+
+    results = evaluator.evaluate_route_costs()
+
+    routes = results["routes"]
+    assert set(routes) == {"guardrail_blocked", "faq", "admin_policy"}
+    assert routes["guardrail_blocked"]["cost_usd"] == routes["faq"]["cost_usd"] == 0.0
+    assert routes["guardrail_blocked"]["model"] is None
+    assert routes["admin_policy"]["questions"] == 1
+    assert results["total_cost_usd"] == pytest.approx(2.0)
@@ -0,0 +1,62 @@
+"""
+Router prompt construction: history only for context-dependent questions.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.agents.router import QueryRouter
+from src.prompts.builder import count_tokens
+
+LONG_ANSWER = "The expense policy says to submit receipts within 30 days. " * 40
+HISTORY = [
+    {"role": "user", "content": "How do I submit travel expenses?"},
+    {"role": "assistant", "content": LONG_ANSWER},
+    {"role": "user", "content": "What is the reimbursement limit for hotels? " * 20},
+    {"role": "assistant", "content": LONG_ANSWER},
+]
+
+
+@pytest.fixture
+def router():
+    # Prompt building needs no API client
+    return QueryRouter.__new__(QueryRouter)
+
+
+@pytest.mark.parametrize("question", [
+    "Does that apply to contractors too?",
+    "Who approves it?",
+    "What about interns?",
+    "And the deadline?",
+    "Tell me more about the process",
+])
+def test_follow_ups_need_history(question):
+    assert QueryRouter.needs_history(question)
+
+
+@pytest.mark.parametrize("question", [
+    "What are the company's core values?",
+    "How do I request IT access on my first day?",
+    "What does a Product Manager do in this organization?",
+])
+def test_standalone_questions_skip_history(question):
+    assert not QueryRouter.needs_history(question)
+
+
+def test_standalone_prompt_ignores_history(router):
+    question = "What are the company's core values?"
+    assert router.build_messages(question, HISTORY) == router.build_messages(question)
+
+
+def test_follow_up_prompt_uses_short_user_snippets(router):
+    messages = router.build_messages("Does that apply to contractors too?", HISTORY)
+
+    assert [m["role"] for m in messages] == ["system", "user"]
+    prompt = messages[-1]["content"]
+    assert "How do I submit travel expenses?" in prompt
+    assert "receipts within 30 days" not in prompt  # No assistant answers
+    assert count_tokens(prompt) < 120
@@ -0,0 +1,150 @@
+"""
+LLM call scheduler: interactive calls go before background ones, users
+take turns, and the budgets keep a rate-limited mock API free of 429s.
+"""
+
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.evaluation.mock_openai_server import MockOpenAIServer
+from src.utils.scheduler import (
+    BACKGROUND, INTERACTIVE, LLMScheduler, SchedulerTimeout, call_context, current_context, estimate_tokens
+)
+
+
+def drained(rpm: float) -> LLMScheduler:
+    """Scheduler whose request bucket starts empty, so every call queues"""
+    scheduler = LLMScheduler(requests_per_minute=rpm)
+    scheduler._requests.level = 0.0
+    return scheduler
+
+
+def wait_for_depth(scheduler, priority, depth, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while scheduler.stats()[priority]["queue_depth"] < depth:
+        assert time.monotonic() < deadline, "callers never queued"
+        time.sleep(0.005)
+
+
+def start_callers(scheduler, grants, lock, callers):
+    threads = []
+    for priority, user in callers:
+        def call(priority=priority, user=user):
+            scheduler.acquire(1, priority, user)
+            with lock:
+                grants.append((priority, user))
+        thread = threading.Thread(target=call)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def test_interactive_calls_jump_queued_background_work():
+    scheduler = drained(rpm=1200)  # one grant every 50 ms
+    grants, lock = [], threading.Lock()
+
+    threads = start_callers(scheduler, grants, lock, [(BACKGROUND, "batch")] * 6)
+    wait_for_depth(scheduler, BACKGROUND, 6)
+    threads += start_callers(scheduler, grants, lock, [(INTERACTIVE, f"user-{i}") for i in range(3)])
+    wait_for_depth(scheduler, INTERACTIVE, 3)
+    with lock:
+        already = len(grants)
+    for thread in threads:
+        thread.join()
+
+    assert [priority for priority, _ in grants[already:already + 3]] == [INTERACTIVE] * 3
+    stats = scheduler.stats()
+    assert stats[INTERACTIVE]["granted"] == 3 and stats[BACKGROUND]["granted"] == 6
+    assert stats[BACKGROUND]["max_depth"] == 6
+    assert sum(stats[BACKGROUND]["wait_histogram_ms"].values()) == 6
+
+
+def test_users_take_turns_within_a_priority():
+    scheduler = drained(rpm=1200)
+    grants, lock = [], threading.Lock()
+
+    threads = start_callers(scheduler, grants, lock, [(INTERACTIVE, "busy")] * 6)
+    wait_for_depth(scheduler, INTERACTIVE, 6)
+    threads += start_callers(scheduler, grants, lock, [(INTERACTIVE, "quiet")] * 2)
+    wait_for_depth(scheduler, INTERACTIVE, 8)
+    for thread in threads:
+        thread.join()
+
+    users = [user for _, user in grants]
+    assert users.index("quiet") <= 2
+    assert [i for i, user in enumerate(users) if user == "quiet"][-1] <= 4
+
+
+def test_wait_is_bounded_by_the_timeout():
+    scheduler = drained(rpm=60)  # next grant in one second
+
+    start = time.monotonic()
+    with pytest.raises(SchedulerTimeout):
+        scheduler.acquire(1, INTERACTIVE, "user-1", timeout=0.1)
+    assert time.monotonic() - start < 0.5
+
+    # The abandoned ticket leaves the queue and does not hold up later calls
+    stats = scheduler.stats()[INTERACTIVE]
+    assert (stats["queue_depth"], stats["timeouts"], stats["granted"]) == (0, 1, 0)
+    scheduler._requests.level = 1.0
+    scheduler.acquire(1, INTERACTIVE, "user-2", timeout=0.1)
+    assert scheduler.stats()[INTERACTIVE]["granted"] == 1
+
+
+def test_call_context_sets_and_restores_priority():
+    assert current_context() == (INTERACTIVE, None)
+    with call_context(BACKGROUND, "evaluator"):
+        assert current_context() == (BACKGROUND, "evaluator")
+    assert current_context() == (INTERACTIVE, None)
+    with pytest.raises(ValueError):
+        with call_context("urgent"):
+            pass
+
+
+def test_budgets_keep_rate_limited_mock_free_of_429s():
+    body = {"model": "m", "messages": [{"role": "user", "content": "How do I submit expenses?"}],
+            "max_tokens": 100}
+    statuses = []
+    lock = threading.Lock()
+
+    def post(server, scheduler=None, calls=5):
+        for _ in range(calls):
+            if scheduler is not None:
+                scheduler.acquire(estimate_tokens(body))
+            request = urllib.request.Request(f"{server.base_url}/chat/completions",
+                                             data=json.dumps(body).encode("utf-8"))
+            try:
+                status = urllib.request.urlopen(request).status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            with lock:
+                statuses.append(status)
+
+    def flood(server, scheduler=None, workers=6):
+        threads = [threading.Thread(target=post, args=(server, scheduler)) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    with MockOpenAIServer() as server:
+        # ~120 tokens per call: the token limit binds before the request limit
+        server.state.requests_per_minute = 6000
+        server.state.tokens_per_minute = 120000
+
+        flood(server)
+        assert 429 in statuses
+        time.sleep(1.0)
+
+        statuses.clear()
+        flood(server, LLMScheduler(requests_per_minute=5400, tokens_per_minute=108000))
+        assert statuses == [200] * 30
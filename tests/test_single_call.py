@@ -0,0 +1,79 @@
+"""
+Single-call mode: one structured-output completion returns the route,
+answer and sources; invalid replies fall back to the two-call pipeline.
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.agents.single_call import RESPONSE_FORMAT, SingleCallAnswerer, parse_routed_answer
+from src.evaluation.mock_openai_server import mock_chat_completion
+from src.prompts.builder import PromptBuilder
+from src.utils.config import Config
+
+
+def doc(source, text):
+    return SimpleNamespace(page_content=text, metadata={"source_file": source})
+
+
+HITS = {
+    "general_company": [doc("company_overview.md", "Core hours are 12:00-16:00. " * 30)],
+    "role_specific": [doc("data_analyst_role.md", "Analysts own dashboards.")],
+    "admin_policy": [doc("expense_policy.md", "Submit receipts within 30 days."),
+                     doc("travel_guidelines.md", "Book travel through the portal.")],
+}
+
+
+class FakeAssistant:
+    def __init__(self, reply=None):
+        self.vector_store = SimpleNamespace(query_routes=lambda question, k=None: HITS)
+        self.prompt_builder = PromptBuilder()
+        self.reply = reply
+        self.requests = []
+
+    def generate(self, route, params):
+        self.requests.append(params)
+        content = self.reply
+        if content is None:  # Behave like the mock server
+            content = mock_chat_completion(params)["choices"][0]["message"]["content"]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture(autouse=True)
+def model(monkeypatch):
+    monkeypatch.setitem(Config._secrets, "OPENAI_MODEL", "gpt-4o-mini")
+
+
+def test_one_request_with_previews_from_every_route():
+    assistant = FakeAssistant()
+    result = SingleCallAnswerer(assistant).answer("How do I submit an expense report?", [])
+
+    [params] = assistant.requests
+    assert params["response_format"] == RESPONSE_FORMAT
+    prompt = params["messages"][-1]["content"]
+    assert all(f"[{route}]" in prompt for route in HITS)
+    assert prompt.count("Core hours") < 30  # Previews are truncated
+    assert result["route"] == "admin_policy"
+    assert result["sources"] == ["expense_policy.md", "travel_guidelines.md"]
+    assert result["context_used"]
+
+
+@pytest.mark.parametrize("reply", [
+    "not json",
+    json.dumps({"route": "sports", "answer": "Go team", "sources": []}),
+    json.dumps({"route": "admin_policy", "answer": "", "sources": []}),
+])
+def test_invalid_replies_return_none_for_fallback(reply):
+    assert SingleCallAnswerer(FakeAssistant(reply)).answer("How do I submit expenses?", []) is None
+
+
+def test_sources_must_have_been_shown_for_the_chosen_route():
+    reply = json.dumps({"route": "admin_policy", "answer": "Within 30 days.",
+                        "sources": ["expense_policy.md", "company_overview.md", "made_up.md"]})
+    assert parse_routed_answer(reply, HITS)["sources"] == ["expense_policy.md"]
@@ -0,0 +1,166 @@
+"""
+Single-flight coalescing: N simultaneous identical requests make exactly
+one upstream call at the router, embedding and generation layers.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.agents.assistant import AITrainingAssistant
+from src.agents.router import QueryRouter
+from src.retrieval.embeddings import HashingEmbeddingProvider
+from src.utils.config import Config
+from src.utils.singleflight import FlightGroup, request_key
+
+N = 16
+
+
+class GatedUpstream:
+    """Counts calls and holds each one open until every waiter has joined"""
+
+    def __init__(self, group: FlightGroup, result=None):
+        self.group = group
+        self.result = result
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            self.calls += 1
+        deadline = time.monotonic() + 5
+        while self.group.stats()["waiting"] < N - 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def run_concurrently(fn, args_list):
+    results = [None] * len(args_list)
+    errors = []
+
+    def worker(i):
+        try:
+            results[i] = fn(*args_list[i])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(args_list))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_identical_calls_share_one_upstream_call():
+    group = FlightGroup("test")
+    upstream = GatedUpstream(group, result=object())
+
+    results, errors = run_concurrently(group.do, [("key", upstream)] * N)
+
+    assert not errors
+    assert upstream.calls == 1
+    assert all(result is upstream.result for result in results)
+    stats = group.stats()
+    assert stats["upstream_calls"] == 1 and stats["saved_calls"] == N - 1
+    assert stats["max_waiters"] == N - 1 and stats["in_flight"] == 0
+
+
+def test_waiters_share_the_leaders_error_and_nothing_is_cached():
+    group = FlightGroup("test")
+    upstream = GatedUpstream(group, result=TimeoutError("upstream timed out"))
+
+    _, errors = run_concurrently(group.do, [("key", upstream)] * N)
+
+    assert len(errors) == N and all(e is errors[0] for e in errors)
+    assert group.stats()["failures"] == 1
+    assert group.do("key", lambda: "fresh") == "fresh"
+
+
+def test_request_key_is_exact():
+    messages = [{"role": "user", "content": "What is IT policy?"}]
+    assert request_key("admin_policy", "v1", messages) == request_key("admin_policy", "v1", list(messages))
+    # Differently cased questions and models are different requests
+    assert request_key("admin_policy", "v1", messages) != request_key(
+        "admin_policy", "v1", [{"role": "user", "content": "what is it policy?"}])
+    assert request_key({"model": "gpt-4o-mini"}) != request_key({"model": "GPT-4o-mini"})
+    assert request_key("admin_policy", "v1", messages) != request_key("admin_policy", "v2", messages)
+    assert request_key("admin_policy", "v1", messages) != request_key("role_specific", "v1", messages)
+
+
+def test_router_coalesces_identical_questions(monkeypatch):
+    monkeypatch.setitem(Config._secrets, "OPENAI_MODEL", "gpt-4o-mini")
+    router = QueryRouter.__new__(QueryRouter)
+    router.valid_routes = ["general_company", "role_specific", "admin_policy", "direct_llm"]
+    router.flights = FlightGroup("router")
+    upstream = GatedUpstream(router.flights, result=completion("admin_policy"))
+    router.client = SimpleNamespace(chat_completion=upstream)
+
+    results, errors = run_concurrently(router.classify_with_confidence,
+                                       [("How do I submit expenses?",)] * N)
+
+    assert not errors and upstream.calls == 1
+    assert {r["route"] for r in results} == {"admin_policy"}
+
+
+def test_generation_coalesces_per_route_and_corpus_version():
+    assistant = AITrainingAssistant.__new__(AITrainingAssistant)
+    assistant.generation_flights = FlightGroup("generation")
+    assistant.vector_store = SimpleNamespace(corpus_version="v1")
+    upstream = GatedUpstream(assistant.generation_flights, result=completion("Use the portal."))
+    assistant.client = SimpleNamespace(chat_completion=upstream)
+    params = {"model": "m", "messages": [{"role": "user", "content": "How do I submit expenses?"}]}
+
+    results, errors = run_concurrently(assistant.generate, [("admin_policy", params)] * N)
+
+    assert not errors and upstream.calls == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_query_embeddings_coalesce(monkeypatch):
+    import src.retrieval.embeddings as embeddings
+
+    group = FlightGroup("embedding")
+    monkeypatch.setattr(embeddings, "flight_group", lambda name: group)
+    provider = HashingEmbeddingProvider(dimension=64)
+    upstream = GatedUpstream(group, result=[[0.0] * 64])
+    provider._embed_batch = upstream
+
+    results, errors = run_concurrently(provider.embed_query, [("How do I submit expenses?",)] * N)
+
+    assert not errors and upstream.calls == 1
+    assert all(r == [0.0] * 64 for r in results)
+
+
+def test_differently_cased_queries_in_flight_keep_their_own_vectors(monkeypatch):
+    import src.retrieval.embeddings as embeddings
+
+    group = FlightGroup("embedding")
+    monkeypatch.setattr(embeddings, "flight_group", lambda name: group)
+    provider = HashingEmbeddingProvider(dimension=64)
+    both_started = threading.Barrier(2, timeout=5)
+
+    def upstream(texts):
+        # Only returns once both questions are in flight at the same time
+        both_started.wait()
+        return [[float(c.isupper()) for c in text] for text in texts]
+
+    provider._embed_batch = upstream
+    questions = ["What is IT policy?", "what is it policy?"]
+
+    results, errors = run_concurrently(provider.embed_query, [(q,) for q in questions])
+
+    assert not errors
+    for question, vector in zip(questions, results):
+        assert vector == [float(c.isupper()) for c in question]
+        assert provider.query_cache.get(question) == vector
@@ -0,0 +1,105 @@
+"""
+Start-up: the assistant warms every route in parallel and reports per-step
+timings, and collection handles are opened once and shared.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import src.agents.assistant as assistant_module
+from src.agents.assistant import AITrainingAssistant, format_startup_report
+
+
+class FakeVectorStore:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.warmed = []
+
+    def rag_routes(self):
+        return ["general_company", "role_specific", "admin_policy"]
+
+    def warm_up_route(self, route):
+        if route in self.failing:
+            raise RuntimeError("collection missing")
+        self.warmed.append(route)
+        return 0.0
+
+    def load_reranker(self):
+        self.warmed.append("reranker")
+
+
+def assistant_with(vector_store, monkeypatch):
+    monkeypatch.setattr(assistant_module, "get_openai_client", lambda: None)
+    assistant = AITrainingAssistant.__new__(AITrainingAssistant)
+    assistant.vector_store = vector_store
+    assistant.ready = False
+    assistant.startup_report = {"init_ms": 12.0}
+    return assistant
+
+
+def test_warm_up_times_every_step_and_marks_ready(monkeypatch):
+    store = FakeVectorStore()
+    assistant = assistant_with(store, monkeypatch)
+
+    report = assistant.warm_up()
+
+    assert assistant.ready and report["failed"] == []
+    assert set(report["steps_ms"]) == {"openai_client", "reranker", "collection:general_company",
+                                       "collection:role_specific", "collection:admin_policy"}
+    assert sorted(store.warmed) == sorted(store.rag_routes() + ["reranker"])
+    # Already warm: no second pass
+    assert assistant.warm_up() is report and len(store.warmed) == 4
+
+    summary = format_startup_report(report)
+    assert "init 12 ms" in summary and "collection:admin_policy" in summary
+
+
+def test_failed_step_is_reported_and_not_ready(monkeypatch):
+    assistant = assistant_with(FakeVectorStore(failing={"role_specific"}), monkeypatch)
+
+    report = assistant.warm_up()
+
+    assert not assistant.ready
+    assert report["failed"] == ["collection:role_specific"]
+    assert "failed: collection:role_specific" in format_startup_report(report)
+
+
+def test_collection_handle_is_opened_once(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    pytest.importorskip("langchain_core")
+    from langchain_core.documents import Document
+
+    from src.retrieval.embeddings import HashingEmbeddingProvider
+    from src.retrieval.quantized_index import QuantizedIndex
+    from src.retrieval.vector_store import VectorStore
+    from src.utils.config import Config
+
+    monkeypatch.setattr(Config, "CHROMA_DIR", tmp_path)
+    monkeypatch.setattr(Config, "VECTOR_QUANTIZATION", "int8")
+    embeddings = HashingEmbeddingProvider(dimension=64)
+    QuantizedIndex(VectorStore._quantized_path("admin_policy"), embeddings).build(
+        [Document(page_content="Submit expenses within 30 days.", metadata={})]
+    )
+    store = VectorStore.__new__(VectorStore)
+    store.embeddings = embeddings
+    store.collections = {}
+    store._collections_lock = threading.Lock()
+
+    loads = []
+    original_load = QuantizedIndex.load
+    monkeypatch.setattr(QuantizedIndex, "load", lambda self: loads.append(1) or original_load(self))
+    handles = []
+    threads = [threading.Thread(target=lambda: handles.append(store._get_collection("admin_policy")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(handle is handles[0] for handle in handles)
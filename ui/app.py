@@ -7,9 +7,8 @@ from datetime import datetime
 # Add parent to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.agents.assistant import AITrainingAssistant
 from src.utils.config import config
-from src.database.db_handler import DatabaseHandler
+from src.utils.registry import registry
 
 # Page config
 st.set_page_config(
@@ -290,29 +289,30 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Simple module-level caches to avoid Streamlit's "Running <fn>" UI during first-run
-_db_cache = None
-_assistant_cache = None
-
+# Shared resources live in the process-wide registry: Streamlit re-executes
+# this script on every rerun, so module globals here would not survive
 def load_database():
-    """Load database handler once and cache it in-module."""
-    global _db_cache
-    if _db_cache is None:
-        _db_cache = DatabaseHandler()
-    return _db_cache
+    """Return the process-wide database handler."""
+    return registry.get_db()
 
 
 def load_assistant():
-    """Load assistant once and cache it in-module. Suppresses stdout/stderr."""
-    global _assistant_cache
-    if _assistant_cache is None:
-        import io
-        import contextlib
+    """
+    Return the process-wide, warmed-up assistant. Start-up chatter is
+    suppressed; the warm-up timings are logged once per process instead.
+    """
+    import io
+    import contextlib
 
-        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
-            _assistant_cache = AITrainingAssistant()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        assistant = registry.get_assistant()
+    from src.agents.assistant import format_startup_report
 
-    return _assistant_cache
+    report = assistant.startup_report
+    if not report.get("logged"):
+        report["logged"] = True
+        print(format_startup_report(report))
+    return assistant
 
 # Initialize session state
 if "authenticated" not in st.session_state:
@@ -331,6 +331,10 @@ if "assistant" not in st.session_state:
     st.session_state.assistant = None
 if "show_guardrails_info" not in st.session_state:
     st.session_state.show_guardrails_info = False
+if "sessions_cache" not in st.session_state:
+    st.session_state.sessions_cache = {}
+if "question_count" not in st.session_state:
+    st.session_state.question_count = 0
 
 def login_page():
     """Display login/register page"""
@@ -425,6 +429,47 @@ def login_page():
                     else:
                         st.warning("⚠️ Please fill in all required fields")
 
+ROUTE_CLASSES = {
+    "general_company": "route-company",
+    "role_specific": "route-role",
+    "admin_policy": "route-policy",
+    "direct_llm": "route-direct"
+}
+
+EXAMPLE_QUESTIONS = [
+    "What are our company values?",
+    "What does a Product Manager do?",
+    "How do I submit expenses?",
+    "What tools does a Data Analyst use?",
+    "How do I request PTO?",
+]
+
+# Only the most recent messages are rendered on every rerun; older ones
+# are drawn on demand so rerun cost stays flat for long conversations
+MAX_RENDERED_MESSAGES = 50
+
+# The sidebar stats fragment re-reads the question count on this interval,
+# so answers (drawn by the chat fragment) show up without an app rerun
+STATS_REFRESH_SECONDS = 2
+
+def get_user_sessions_cached(user_id: int):
+    """Session list for the sidebar, cached until a session is created, deleted or renamed"""
+    cache = st.session_state.sessions_cache
+    if cache.get("user_id") != user_id:
+        cache.clear()
+        cache["user_id"] = user_id
+        cache["sessions"] = st.session_state.db.get_user_sessions(user_id)
+    return cache["sessions"]
+
+def invalidate_sessions_cache():
+    """Drop the cached session list so the next sidebar render reloads it"""
+    st.session_state.sessions_cache = {}
+
+def set_messages(messages):
+    """Replace the current conversation and its running question count"""
+    st.session_state.messages = messages
+    st.session_state.question_count = sum(1 for m in messages if m["role"] == "user")
+
 def create_new_session():
     """Create a new chat session"""
     session_id = str(uuid.uuid4())
@@ -435,32 +480,21 @@ def create_new_session():
         session_id,
         session_name
     )
+    invalidate_sessions_cache()
     
     st.session_state.current_session_id = session_id
-    st.session_state.messages = []
+    set_messages([])
 
 def update_session_name(session_id: str, first_question: str):
     """Update session name with the first question"""
-    try:
-        import sqlite3
-        conn = sqlite3.connect("data/chatbot.db")
-        cursor = conn.cursor()
-        
-        # Truncate question for clean display
-        if len(first_question) > 50:
-            session_name = first_question[:50] + "..."
-        else:
-            session_name = first_question
-        
-        cursor.execute(
-            "UPDATE sessions SET session_name = ? WHERE session_id = ?",
-            (session_name, session_id)
-        )
-        
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Error updating session name: {e}")
+    # Truncate question for clean display
+    if len(first_question) > 50:
+        session_name = first_question[:50] + "..."
+    else:
+        session_name = first_question
+    
+    st.session_state.db.update_session_name(session_id, session_name)
+    invalidate_sessions_cache()
 
 def load_session(session_id: str):
     """Load a previous chat session"""
@@ -472,23 +506,84 @@ def load_session(session_id: str):
         session_id
     )
     
-    st.session_state.messages = messages
+    set_messages(messages)
 
-def chat_page():
-    """Main chat interface"""
+def build_message_extras(metadata: dict) -> dict:
+    """Pre-render the route badge and source badges for an assistant message once"""
+    route = metadata.get("route", "unknown")
     
-    # CRITICAL: Ensure assistant is loaded
-    if st.session_state.assistant is None:
-        with st.spinner("🚀 Initializing AI Assistant..."):
-            st.session_state.assistant = load_assistant()
+    if route == "guardrail_blocked":
+        badge_html = '<span class="route-badge route-blocked">🚫 Blocked by Guardrails</span>'
+    else:
+        route_class = ROUTE_CLASSES.get(route, "route-direct")
+        badge_html = f'<span class="route-badge {route_class}">Route: {route}</span>'
     
-    # Handle example question selection
-    user_input = None
-    if "selected_question" in st.session_state:
-        user_input = st.session_state.selected_question
-        del st.session_state.selected_question
+    sources_html = " ".join(
+        [f'<span class="source-badge">{source}</span>' for source in metadata.get("sources") or []]
+    )
     
-    # Sidebar
+    return {
+        "badge_html": badge_html,
+        "reason": metadata.get("reason") if route == "guardrail_blocked" else "",
+        "sources_html": sources_html
+    }
+
+def render_message(message: dict):
+    """Render one chat message, reusing its pre-rendered badges"""
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+        
+        if message["role"] != "assistant" or "metadata" not in message:
+            return
+        
+        extras = message.get("extras")
+        if extras is None:
+            extras = message["extras"] = build_message_extras(message["metadata"])
+        
+        st.markdown(extras["badge_html"], unsafe_allow_html=True)
+        if extras["reason"]:
+            st.caption(f"Reason: {extras['reason']}")
+        if extras["sources_html"]:
+            st.markdown("**📚 Sources:**")
+            st.markdown(extras["sources_html"], unsafe_allow_html=True)
+
+@st.fragment
+def session_list():
+    """Sidebar session list; reruns on its own for deletes of other sessions"""
+    sessions = get_user_sessions_cached(st.session_state.user_id)
+    
+    if sessions:
+        st.markdown("#### Recent Conversations")
+        for session in sessions[:10]:
+            is_current = session["session_id"] == st.session_state.current_session_id
+            
+            col1, col2 = st.columns([4, 1])
+            
+            with col1:
+                if st.button(
+                    session["session_name"],
+                    key=f"session_{session['session_id']}",
+                    use_container_width=True,
+                    type="primary" if is_current else "secondary"
+                ):
+                    load_session(session["session_id"])
+                    st.rerun()
+            
+            with col2:
+                if st.button("🗑️", key=f"delete_{session['session_id']}", type="secondary"):
+                    st.session_state.db.delete_session(
+                        st.session_state.user_id,
+                        session["session_id"]
+                    )
+                    invalidate_sessions_cache()
+                    if is_current:
+                        create_new_session()
+                        st.rerun()
+                    else:
+                        st.rerun(scope="fragment")
+
+def sidebar():
+    """Sidebar: account, safety info, history, system info and examples"""
     with st.sidebar:
         # Friendly greeting
         st.markdown(f"### 👋 Hello, {st.session_state.username}!")
@@ -500,7 +595,8 @@ def chat_page():
                 st.session_state.user_id = None
                 st.session_state.username = None
                 st.session_state.current_session_id = None
-                st.session_state.messages = []
+                set_messages([])
+                invalidate_sessions_cache()
                 st.session_state.assistant = None
                 st.rerun()
         
@@ -534,34 +630,7 @@ def chat_page():
             st.rerun()
         
         # Display previous sessions
-        sessions = st.session_state.db.get_user_sessions(st.session_state.user_id)
-        
-        if sessions:
-            st.markdown("#### Recent Conversations")
-            for session in sessions[:10]:
-                is_current = session["session_id"] == st.session_state.current_session_id
-                
-                col1, col2 = st.columns([4, 1])
-                
-                with col1:
-                    if st.button(
-                        session["session_name"],
-                        key=f"session_{session['session_id']}",
-                        use_container_width=True,
-                        type="primary" if is_current else "secondary"
-                    ):
-                        load_session(session["session_id"])
-                        st.rerun()
-                
-                with col2:
-                    if st.button("🗑️", key=f"delete_{session['session_id']}", type="secondary"):
-                        st.session_state.db.delete_session(
-                            st.session_state.user_id,
-                            session["session_id"]
-                        )
-                        if is_current:
-                            create_new_session()
-                        st.rerun()
+        session_list()
         
         st.markdown("---")
         
@@ -586,77 +655,40 @@ def chat_page():
         
         # Example Questions
         st.markdown("#### 💡 Example Questions")
-        example_questions = [
-            "What are our company values?",
-            "What does a Product Manager do?",
-            "How do I submit expenses?",
-            "What tools does a Data Analyst use?",
-            "How do I request PTO?",
-        ]
-        
-        for question in example_questions:
+        for question in EXAMPLE_QUESTIONS:
             if st.button(question, key=question, use_container_width=True, type="secondary"):
                 st.session_state.selected_question = question
                 st.rerun()
         
         st.markdown("---")
         
-        # Session Stats
-        st.markdown("#### 📈 Stats")
-        total_questions = len([m for m in st.session_state.messages if m["role"] == "user"])
-        st.metric("Total Questions", total_questions)
-    
-    # Main content area
-    st.markdown('<div class="main-header">🤖 AI Training Assistant</div>', unsafe_allow_html=True)
-    st.markdown('<p class="subtitle">Ask me anything about company policies, roles, or onboarding</p>', unsafe_allow_html=True)
-    
-    # Small safety notice with better styling
-    st.markdown("""
-    <div class="info-box-small">
-    🛡️ Protected by Content Safety Guardrails - All inputs validated for safe interactions
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("---")
-    
-    # Create session if needed
-    if not st.session_state.current_session_id:
-        create_new_session()
+        session_stats()
+
+@st.fragment(run_every=STATS_REFRESH_SECONDS)
+def session_stats():
+    """Sidebar stats; refreshes on a timer without rerunning the chat area"""
+    st.markdown("#### 📈 Stats")
+    st.metric("Total Questions", st.session_state.question_count)
+
+@st.fragment
+def chat_area():
+    """Message list, chat input and answering; reruns without the sidebar"""
+    # Handle example question selection
+    user_input = None
+    if "selected_question" in st.session_state:
+        user_input = st.session_state.selected_question
+        del st.session_state.selected_question
     
-    # Display messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-            
-            # Metadata for assistant messages
-            if message["role"] == "assistant" and "metadata" in message:
-                metadata = message["metadata"]
-                route = metadata.get("route", "unknown")
-                
-                # Show blocked route with guardrails badge
-                if route == "guardrail_blocked":
-                    st.markdown('<span class="route-badge route-blocked">🚫 Blocked by Guardrails</span>', 
-                              unsafe_allow_html=True)
-                    if metadata.get("reason"):
-                        st.caption(f"Reason: {metadata['reason']}")
-                else:
-                    route_class = {
-                        "general_company": "route-company",
-                        "role_specific": "route-role",
-                        "admin_policy": "route-policy",
-                        "direct_llm": "route-direct"
-                    }.get(route, "route-direct")
-                    
-                    st.markdown(f'<span class="route-badge {route_class}">Route: {route}</span>', 
-                              unsafe_allow_html=True)
-                
-                # Sources
-                if metadata.get("sources"):
-                    st.markdown("**📚 Sources:**")
-                    sources_html = " ".join(
-                        [f'<span class="source-badge">{source}</span>' for source in metadata["sources"]]
-                    )
-                    st.markdown(sources_html, unsafe_allow_html=True)
+    # Display messages (older ones only on demand)
+    messages = st.session_state.messages
+    hidden = len(messages) - MAX_RENDERED_MESSAGES
+    if hidden > 0:
+        with st.expander(f"Show {hidden} earlier messages"):
+            if st.toggle("Load earlier messages", key="show_earlier_messages"):
+                for message in messages[:hidden]:
+                    render_message(message)
+    for message in messages[max(hidden, 0):]:
+        render_message(message)
     
     # Chat input
     if not user_input:
@@ -667,7 +699,9 @@ def chat_page():
         is_first_message = len(st.session_state.messages) == 0
         
         # Add user message
-        st.session_state.messages.append({"role": "user", "content": user_input})
+        user_message = {"role": "user", "content": user_input}
+        st.session_state.messages.append(user_message)
+        st.session_state.question_count += 1
         st.session_state.db.save_message(
             st.session_state.user_id,
             st.session_state.current_session_id,
@@ -679,8 +713,7 @@ def chat_page():
         if is_first_message:
             update_session_name(st.session_state.current_session_id, user_input)
         
-        with st.chat_message("user"):
-            st.markdown(user_input)
+        render_message(user_message)
         
         # Get response with guardrails validation
         with st.chat_message("assistant"):
@@ -688,56 +721,42 @@ def chat_page():
                 # CRITICAL: Check assistant exists before calling
                 if st.session_state.assistant is None:
                     st.session_state.assistant = load_assistant()
-                conversation_history = []
-                for msg in st.session_state.messages:
-                    conversation_history.append({
-                        "role": msg["role"],
-                        "content": msg["content"]
-                    })
+                # Prior turns only; the new question is passed separately
+                conversation_history = [
+                    {"role": msg["role"], "content": msg["content"]}
+                    for msg in st.session_state.messages[:-1]
+                ]
                 # Call assistant with user_id for rate limiting and guardrails
                 result = st.session_state.assistant.answer(
                     user_input, 
-                    user_id=st.session_state.user_id
+                    user_id=st.session_state.user_id,
+                    conversation_history=conversation_history,
+                    session_id=st.session_state.current_session_id
                 )
             
-            st.markdown(result["answer"])
-            
-            # Display metadata with guardrails info
-            route = result["route"]
-            
-            if result.get("blocked"):
-                st.markdown('<span class="route-badge route-blocked">🚫 Blocked by Guardrails</span>', 
-                          unsafe_allow_html=True)
-                if result.get("reason"):
-                    st.caption(f"Reason: {result['reason']}")
-            else:
-                route_class = {
-                    "general_company": "route-company",
-                    "role_specific": "route-role",
-                    "admin_policy": "route-policy",
-                    "direct_llm": "route-direct"
-                }.get(route, "route-direct")
-                
-                st.markdown(f'<span class="route-badge {route_class}">Route: {route}</span>', 
-                          unsafe_allow_html=True)
+            metadata = {
+                "route": result["route"],
+                "sources": result.get("sources", []),
+                "blocked": result.get("blocked", False),
+                "reason": result.get("reason", ""),
+                "latency_ms": result.get("trace", {}).get("total_ms")
+            }
+            extras = build_message_extras(metadata)
             
-            if result.get("sources"):
+            st.markdown(result["answer"])
+            st.markdown(extras["badge_html"], unsafe_allow_html=True)
+            if extras["reason"]:
+                st.caption(f"Reason: {extras['reason']}")
+            if extras["sources_html"]:
                 st.markdown("**📚 Sources:**")
-                sources_html = " ".join(
-                    [f'<span class="source-badge">{source}</span>' for source in result["sources"]]
-                )
-                st.markdown(sources_html, unsafe_allow_html=True)
+                st.markdown(extras["sources_html"], unsafe_allow_html=True)
         
         # Save response
         st.session_state.messages.append({
             "role": "assistant",
             "content": result["answer"],
-            "metadata": {
-                "route": result["route"],
-                "sources": result.get("sources", []),
-                "blocked": result.get("blocked", False),
-                "reason": result.get("reason", "")
-            }
+            "metadata": metadata,
+            "extras": extras
         })
         
         st.session_state.db.save_message(
@@ -745,15 +764,44 @@ def chat_page():
             st.session_state.current_session_id,
             "assistant",
             result["answer"],
-            metadata={
-                "route": result["route"],
-                "sources": result.get("sources", []),
-                "blocked": result.get("blocked", False),
-                "reason": result.get("reason", "")
-            }
+            metadata=metadata
         )
         
-        st.rerun()
+        # The sidebar session list (outside this fragment) shows the new
+        # session name after the first message; the question count is picked
+        # up by the stats fragment on its own
+        if is_first_message:
+            st.rerun(scope="app")
+
+def chat_page():
+    """Main chat interface"""
+    
+    # CRITICAL: Ensure assistant is loaded
+    if st.session_state.assistant is None:
+        with st.spinner("🚀 Initializing AI Assistant..."):
+            st.session_state.assistant = load_assistant()
+    
+    # Create session if needed
+    if not st.session_state.current_session_id:
+        create_new_session()
+    
+    # Sidebar
+    sidebar()
+    
+    # Main content area
+    st.markdown('<div class="main-header">🤖 AI Training Assistant</div>', unsafe_allow_html=True)
+    st.markdown('<p class="subtitle">Ask me anything about company policies, roles, or onboarding</p>', unsafe_allow_html=True)
+    
+    # Small safety notice with better styling
+    st.markdown("""
+    <div class="info-box-small">
+    🛡️ Protected by Content Safety Guardrails - All inputs validated for safe interactions
+    </div>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    chat_area()
     
     # Footer
     st.markdown("""
@@ -762,6 +810,7 @@ def chat_page():
     </div>
     """, unsafe_allow_html=True)
 
+
 # Main app
 def main():
     if not st.session_state.authenticated: